@@ -4,6 +4,7 @@ Comprehensive Benchmark Analysis Script
 Analyzes the master_results_all_batches.csv to generate key insights
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 import json
@@ -11,6 +12,8 @@ from collections import defaultdict
 from datetime import datetime
 import os
 
+from columnar_cache import ANSWER_LENGTH_SUFFIX, load_results_frame
+
 # Configuration
 CSV_FILE = "master_results_all_batches.csv"
 OUTPUT_DIR = "analysis_output"
@@ -26,14 +29,80 @@ API_DISPLAY_NAMES = {
 }
 
 
+TIMEOUT_PATTERN = 'timed out|timeout'
+COMPLEXITY_BINS = [0, 50, 200, 500, float('inf')]
+COMPLEXITY_LABELS = ['Very Short (<50)', 'Short (50-200)', 'Medium (200-500)', 'Long (500+)']
+
+
+def categorize_query(query_text):
+    """Infer a query category from its text"""
+    query_lower = str(query_text).lower()
+
+    if 'linkedin' in query_lower or 'ceo' in query_lower or 'founder' in query_lower:
+        return 'Company/LinkedIn Research'
+    elif any(word in query_lower for word in ['what is', 'who is', 'when was', 'where is', 'how to']):
+        return 'Q&A/Informational'
+    elif 'summarize' in query_lower or 'summary of' in query_lower:
+        return 'Summarization'
+    elif len(query_lower) < 50:
+        return 'Short Query'
+    elif len(query_lower) > 500:
+        return 'Long/Complex Query'
+    else:
+        return 'General Search'
+
+
+def answer_lengths(df, api):
+    """Answer lengths for one API, precomputed by the columnar cache when available."""
+    if f'{api}{ANSWER_LENGTH_SUFFIX}' in df:
+        return df[f'{api}{ANSWER_LENGTH_SUFFIX}'].to_numpy()
+    return df[f'{api}_answer'].fillna('').astype(str).str.len().to_numpy()
+
+
+def melt_results(df, apis):
+    """
+    Reshape the wide results CSV into one row per (query, api).
+
+    Every per-API derived value the analyses need is computed here once:
+    success/failure flags, timeout detection, answer length and source count.
+
+    Returns:
+        DataFrame with columns row, api, succeeded, failed, timed_out,
+        response_time, answer_length, num_sources
+    """
+    blocks = []
+    for api in apis:
+        success = df[f'{api}_success']
+        blocks.append(pd.DataFrame({
+            'row': np.arange(len(df)),
+            'api': api,
+            # NaN success counts as neither succeeded nor failed, as in the CSV
+            'succeeded': (success == True).to_numpy(),
+            'failed': (success == False).to_numpy(),
+            'response_time': df[f'{api}_response_time_s'].to_numpy(),
+            'num_sources': df[f'{api}_num_sources'].fillna(0).to_numpy(),
+            'answer_length': answer_lengths(df, api),
+            'error': df[f'{api}_error'].to_numpy()
+        }))
+
+    long_df = pd.concat(blocks, ignore_index=True)
+    long_df['api'] = pd.Categorical(long_df['api'], categories=apis)
+    long_df['timed_out'] = long_df['error'].fillna('').astype(str).str.contains(TIMEOUT_PATTERN, case=False)
+    return long_df.drop(columns=['error'])
+
+
 class BenchmarkAnalyzer:
     """Main analyzer class for benchmark results"""
 
     def __init__(self, csv_path):
         print(f"Loading data from {csv_path}...")
-        self.df = pd.read_csv(csv_path)
+        # Analyses only need answer lengths, so the answer text is never loaded
+        self.df = load_results_frame(csv_path, include_text=False)
         self.insights = {}
         self.apis = APIS
+        self.total_queries = len(self.df)
+        self.long_df = melt_results(self.df, self.apis)
+        self.successful = self.long_df[self.long_df['succeeded']]
 
         # Create output directory
         os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -67,49 +136,51 @@ class BenchmarkAnalyzer:
         print(f"  - insights_summary.json")
         print(f"  - recommendations.txt")
 
-    def analyze_performance_rankings(self):
-        """Analyze overall performance metrics"""
-        print("\n📊 ANALYZING PERFORMANCE RANKINGS...")
+    def _compute_performance_rankings(self):
+        """Compute overall performance metrics per API"""
+        total_queries = self.total_queries
+        by_api = self.long_df.groupby('api', observed=False)
+        successes = by_api['succeeded'].sum()
+        timeouts = by_api['timed_out'].sum()
+
+        ok_by_api = self.successful.groupby('api', observed=False)
+        times = ok_by_api['response_time']
+        time_stats = pd.DataFrame({
+            'count': ok_by_api.size(),
+            'mean': times.mean(),
+            'median': times.median(),
+            'p95': times.quantile(0.95),
+            'p99': times.quantile(0.99),
+            'answer_length': ok_by_api['answer_length'].mean(),
+            'sources': ok_by_api['num_sources'].mean()
+        })
 
         results = {}
-
         for api in self.apis:
-            success_col = f'{api}_success'
-            time_col = f'{api}_response_time_s'
-            answer_col = f'{api}_answer'
-            sources_col = f'{api}_num_sources'
-            error_col = f'{api}_error'
-
-            # Calculate metrics
-            total_queries = len(self.df)
-            successes = self.df[success_col].sum()
-            success_rate = (successes / total_queries) * 100
-
-            # Response time stats (only for successful queries)
-            successful_times = self.df[self.df[success_col] == True][time_col]
-
-            # Count timeouts
-            timeouts = self.df[error_col].fillna('').str.contains('timed out|timeout', case=False, na=False).sum()
-
-            # Answer length stats
-            answer_lengths = self.df[self.df[success_col] == True][answer_col].fillna('').str.len()
-
-            # Source count stats
-            source_counts = self.df[self.df[success_col] == True][sources_col].fillna(0)
+            stats = time_stats.loc[api]
+            has_successes = stats['count'] > 0
+            success_rate = (successes[api] / total_queries) * 100
 
             results[api] = {
                 'total_queries': total_queries,
-                'successes': int(successes),
+                'successes': int(successes[api]),
                 'success_rate': round(success_rate, 2),
-                'timeouts': int(timeouts),
-                'avg_response_time': round(successful_times.mean(), 2) if len(successful_times) > 0 else None,
-                'median_response_time': round(successful_times.median(), 2) if len(successful_times) > 0 else None,
-                'p95_response_time': round(successful_times.quantile(0.95), 2) if len(successful_times) > 0 else None,
-                'p99_response_time': round(successful_times.quantile(0.99), 2) if len(successful_times) > 0 else None,
-                'avg_answer_length': round(answer_lengths.mean(), 0) if len(answer_lengths) > 0 else 0,
-                'avg_sources': round(source_counts.mean(), 1) if len(source_counts) > 0 else 0
+                'timeouts': int(timeouts[api]),
+                'avg_response_time': round(stats['mean'], 2) if has_successes else None,
+                'median_response_time': round(stats['median'], 2) if has_successes else None,
+                'p95_response_time': round(stats['p95'], 2) if has_successes else None,
+                'p99_response_time': round(stats['p99'], 2) if has_successes else None,
+                'avg_answer_length': round(stats['answer_length'], 0) if has_successes else 0,
+                'avg_sources': round(stats['sources'], 1) if has_successes else 0
             }
 
+        return results
+
+    def analyze_performance_rankings(self):
+        """Analyze overall performance metrics"""
+        print("\n📊 ANALYZING PERFORMANCE RANKINGS...")
+
+        results = self._compute_performance_rankings()
         self.insights['performance_rankings'] = results
 
         # Print summary
@@ -119,25 +190,23 @@ class BenchmarkAnalyzer:
             print(f"  {API_DISPLAY_NAMES[api]:20s}: {metrics['success_rate']:5.1f}% success | "
                   f"{metrics['avg_response_time']:5.2f}s avg | {metrics['avg_sources']:4.1f} sources")
 
-    def analyze_speed_vs_quality(self):
-        """Analyze the trade-off between speed and quality"""
-        print("\n⚡ ANALYZING SPEED VS QUALITY TRADE-OFFS...")
+    def _compute_speed_vs_quality(self):
+        """Compute speed and answer-size metrics per API"""
+        ok_by_api = self.successful.groupby('api', observed=False)
+        stats = pd.DataFrame({
+            'count': ok_by_api.size(),
+            'time': ok_by_api['response_time'].mean(),
+            'answer_length': ok_by_api['answer_length'].mean(),
+            'sources': ok_by_api['num_sources'].mean()
+        })
 
         results = {}
-
         for api in self.apis:
-            success_col = f'{api}_success'
-            time_col = f'{api}_response_time_s'
-            answer_col = f'{api}_answer'
-            sources_col = f'{api}_num_sources'
-
-            # Get successful queries only
-            successful = self.df[self.df[success_col] == True]
-
-            if len(successful) > 0:
-                avg_time = successful[time_col].mean()
-                avg_answer_length = successful[answer_col].fillna('').str.len().mean()
-                avg_sources = successful[sources_col].fillna(0).mean()
+            row = stats.loc[api]
+            if row['count'] > 0:
+                avg_time = row['time']
+                avg_answer_length = row['answer_length']
+                avg_sources = row['sources']
 
                 # Calculate "quality per second" metrics
                 chars_per_second = avg_answer_length / avg_time if avg_time > 0 else 0
@@ -151,6 +220,13 @@ class BenchmarkAnalyzer:
                     'sources_per_second': round(sources_per_second, 2)
                 }
 
+        return results
+
+    def analyze_speed_vs_quality(self):
+        """Analyze the trade-off between speed and quality"""
+        print("\n⚡ ANALYZING SPEED VS QUALITY TRADE-OFFS...")
+
+        results = self._compute_speed_vs_quality()
         self.insights['speed_vs_quality'] = results
 
         # Print top performers
@@ -160,48 +236,36 @@ class BenchmarkAnalyzer:
             print(f"  {i}. {API_DISPLAY_NAMES[api]:20s}: {metrics['chars_per_second']:6.1f} chars/sec "
                   f"({metrics['avg_answer_length']:.0f} chars in {metrics['avg_response_time']:.2f}s)")
 
-    def analyze_by_category(self):
-        """Analyze performance by query category if available"""
-        print("\n📁 ANALYZING BY QUERY CATEGORY...")
-
-        # Try to infer categories from query content
-        def categorize_query(query_text):
-            query_lower = str(query_text).lower()
-
-            if 'linkedin' in query_lower or 'ceo' in query_lower or 'founder' in query_lower:
-                return 'Company/LinkedIn Research'
-            elif any(word in query_lower for word in ['what is', 'who is', 'when was', 'where is', 'how to']):
-                return 'Q&A/Informational'
-            elif 'summarize' in query_lower or 'summary of' in query_lower:
-                return 'Summarization'
-            elif len(query_lower) < 50:
-                return 'Short Query'
-            elif len(query_lower) > 500:
-                return 'Long/Complex Query'
-            else:
-                return 'General Search'
-
+    def _compute_by_category(self):
+        """Compute success rates per inferred query category"""
         # Add category column
         self.df['category'] = self.df['query'].apply(categorize_query)
 
-        # Analyze performance by category
+        # Success counts per (category, api) in one aggregation
         categories = self.df['category'].unique()
-        results = {}
+        category_sizes = self.df['category'].value_counts()
+        success_counts = self.long_df.assign(
+            category=self.df['category'].to_numpy()[self.long_df['row']]
+        ).groupby(['category', 'api'], observed=False)['succeeded'].sum()
 
+        results = {}
         for category in categories:
-            cat_df = self.df[self.df['category'] == category]
-            cat_results = {}
-
-            for api in self.apis:
-                success_col = f'{api}_success'
-                success_rate = (cat_df[success_col].sum() / len(cat_df)) * 100
-                cat_results[api] = {
-                    'query_count': len(cat_df),
-                    'success_rate': round(success_rate, 1)
+            query_count = int(category_sizes[category])
+            results[category] = {
+                api: {
+                    'query_count': query_count,
+                    'success_rate': round((success_counts[(category, api)] / query_count) * 100, 1)
                 }
+                for api in self.apis
+            }
 
-            results[category] = cat_results
+        return results
+
+    def analyze_by_category(self):
+        """Analyze performance by query category if available"""
+        print("\n📁 ANALYZING BY QUERY CATEGORY...")
 
+        results = self._compute_by_category()
         self.insights['category_analysis'] = results
 
         # Print category winners
@@ -212,30 +276,31 @@ class BenchmarkAnalyzer:
             query_count = winner[1]['query_count']
             print(f"  {category:30s}: {API_DISPLAY_NAMES[winner[0]]:20s} ({winner[1]['success_rate']:.1f}% | {query_count} queries)")
 
-    def analyze_failures(self):
-        """Analyze failure patterns and timeouts"""
-        print("\n❌ ANALYZING FAILURES AND TIMEOUTS...")
+    def _compute_failures(self):
+        """Compute failure and timeout counts per API"""
+        failures = self.long_df[self.long_df['failed']].groupby('api', observed=False)
+        failure_counts = failures.size()
+        timeout_counts = failures['timed_out'].sum()
 
         results = {}
-
         for api in self.apis:
-            success_col = f'{api}_success'
-            error_col = f'{api}_error'
-
-            failures = self.df[self.df[success_col] == False]
-
-            # Count error types
-            errors = failures[error_col].fillna('Unknown')
-            timeout_count = errors.str.contains('timed out|timeout', case=False, na=False).sum()
-            other_errors = len(failures) - timeout_count
+            total_failures = int(failure_counts[api])
+            timeout_count = int(timeout_counts[api])
 
             results[api] = {
-                'total_failures': len(failures),
-                'timeouts': int(timeout_count),
-                'other_errors': int(other_errors),
-                'timeout_rate': round((timeout_count / len(self.df)) * 100, 2) if len(self.df) > 0 else 0
+                'total_failures': total_failures,
+                'timeouts': timeout_count,
+                'other_errors': total_failures - timeout_count,
+                'timeout_rate': round((timeout_count / self.total_queries) * 100, 2) if self.total_queries > 0 else 0
             }
 
+        return results
+
+    def analyze_failures(self):
+        """Analyze failure patterns and timeouts"""
+        print("\n❌ ANALYZING FAILURES AND TIMEOUTS...")
+
+        results = self._compute_failures()
         self.insights['failure_analysis'] = results
 
         # Print timeout leaders (problems)
@@ -245,34 +310,41 @@ class BenchmarkAnalyzer:
             if metrics['timeout_rate'] > 0:
                 print(f"  {API_DISPLAY_NAMES[api]:20s}: {metrics['timeouts']:4d} timeouts ({metrics['timeout_rate']:5.2f}% of all queries)")
 
-    def analyze_sources(self):
-        """Analyze source citation patterns"""
-        print("\n📚 ANALYZING SOURCE CITATIONS...")
+    def _compute_sources(self):
+        """Compute source citation statistics per API"""
+        ok_by_api = self.successful.groupby('api', observed=False)
+        sources = ok_by_api['num_sources']
+        stats = pd.DataFrame({
+            'count': ok_by_api.size(),
+            'mean': sources.mean(),
+            'median': sources.median(),
+            'max': sources.max(),
+            'min': sources.min()
+        })
+        # Correlation between sources and answer length
+        correlations = ok_by_api[['num_sources', 'answer_length']].corr()
 
         results = {}
-
         for api in self.apis:
-            success_col = f'{api}_success'
-            sources_col = f'{api}_num_sources'
-            answer_col = f'{api}_answer'
-
-            successful = self.df[self.df[success_col] == True]
-
-            if len(successful) > 0:
-                source_counts = successful[sources_col].fillna(0)
-                answer_lengths = successful[answer_col].fillna('').str.len()
-
-                # Calculate correlation between sources and answer length
-                correlation = source_counts.corr(answer_lengths) if len(source_counts) > 1 else 0
+            row = stats.loc[api]
+            if row['count'] > 0:
+                correlation = correlations.loc[(api, 'num_sources'), 'answer_length'] if row['count'] > 1 else 0
 
                 results[api] = {
-                    'avg_sources': round(source_counts.mean(), 1),
-                    'median_sources': int(source_counts.median()),
-                    'max_sources': int(source_counts.max()),
-                    'min_sources': int(source_counts.min()),
+                    'avg_sources': round(row['mean'], 1),
+                    'median_sources': int(row['median']),
+                    'max_sources': int(row['max']),
+                    'min_sources': int(row['min']),
                     'source_answer_correlation': round(correlation, 3)
                 }
 
+        return results
+
+    def analyze_sources(self):
+        """Analyze source citation patterns"""
+        print("\n📚 ANALYZING SOURCE CITATIONS...")
+
+        results = self._compute_sources()
         self.insights['source_analysis'] = results
 
         # Print source depth leaders
@@ -282,39 +354,46 @@ class BenchmarkAnalyzer:
             print(f"  {API_DISPLAY_NAMES[api]:20s}: {metrics['avg_sources']:5.1f} avg sources | "
                   f"Correlation with answer length: {metrics['source_answer_correlation']:5.3f}")
 
-    def analyze_query_complexity(self):
-        """Analyze performance across different query complexities"""
-        print("\n🔤 ANALYZING QUERY COMPLEXITY IMPACT...")
-
+    def _compute_query_complexity(self):
+        """Compute success rates and latency per query length bucket"""
         # Define query complexity buckets
         self.df['query_complexity'] = pd.cut(
             self.df['query_length'],
-            bins=[0, 50, 200, 500, float('inf')],
-            labels=['Very Short (<50)', 'Short (50-200)', 'Medium (200-500)', 'Long (500+)']
+            bins=COMPLEXITY_BINS,
+            labels=COMPLEXITY_LABELS
         )
 
-        results = {}
+        complexity = self.df['query_complexity'].to_numpy()[self.long_df['row']]
+        bucket_sizes = self.df['query_complexity'].value_counts()
+        by_bucket = self.long_df.assign(query_complexity=complexity).groupby(['query_complexity', 'api'], observed=False)
+        success_counts = by_bucket['succeeded'].sum()
+        avg_times = self.successful.assign(
+            query_complexity=complexity[self.successful.index]
+        ).groupby(['query_complexity', 'api'], observed=False)['response_time'].mean()
 
-        for complexity in self.df['query_complexity'].cat.categories:
-            complex_df = self.df[self.df['query_complexity'] == complexity]
+        results = {}
+        for bucket in self.df['query_complexity'].cat.categories:
+            query_count = int(bucket_sizes[bucket])
             complex_results = {}
 
-            for api in self.apis:
-                success_col = f'{api}_success'
-                time_col = f'{api}_response_time_s'
-
-                if len(complex_df) > 0:
-                    success_rate = (complex_df[success_col].sum() / len(complex_df)) * 100
-                    avg_time = complex_df[complex_df[success_col] == True][time_col].mean()
-
+            if query_count > 0:
+                for api in self.apis:
+                    avg_time = avg_times.get((bucket, api), float('nan'))
                     complex_results[api] = {
-                        'query_count': len(complex_df),
-                        'success_rate': round(success_rate, 1),
+                        'query_count': query_count,
+                        'success_rate': round((success_counts[(bucket, api)] / query_count) * 100, 1),
                         'avg_response_time': round(avg_time, 2) if not pd.isna(avg_time) else None
                     }
 
-            results[str(complexity)] = complex_results
+            results[str(bucket)] = complex_results
+
+        return results
+
+    def analyze_query_complexity(self):
+        """Analyze performance across different query complexities"""
+        print("\n🔤 ANALYZING QUERY COMPLEXITY IMPACT...")
 
+        results = self._compute_query_complexity()
         self.insights['complexity_analysis'] = results
 
         # Print insights
@@ -409,7 +488,7 @@ class BenchmarkAnalyzer:
         with open(report_path, 'w') as f:
             f.write("# Benchmark Analysis Report\n\n")
             f.write(f"*Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n\n")
-            f.write(f"**Dataset**: {len(self.df)} queries across {len(self.apis)} APIs\n\n")
+            f.write(f"**Dataset**: {self.total_queries} queries across {len(self.apis)} APIs\n\n")
 
             f.write("---\n\n")
 
@@ -545,7 +624,19 @@ class BenchmarkAnalyzer:
 
 def main():
     """Main execution"""
-    analyzer = BenchmarkAnalyzer(CSV_FILE)
+    parser = argparse.ArgumentParser(description='Analyze benchmark results and generate insights')
+    parser.add_argument('csv_path', nargs='?', default=CSV_FILE, help=f'Results CSV (default: {CSV_FILE})')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Fold only rows appended since the last run into the saved aggregates')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='With --incremental, rebuild the aggregates from every row')
+    args = parser.parse_args()
+
+    if args.incremental:
+        from incremental_analysis import IncrementalAnalyzer
+        analyzer = IncrementalAnalyzer(args.csv_path, rebuild=args.rebuild)
+    else:
+        analyzer = BenchmarkAnalyzer(args.csv_path)
     analyzer.run_full_analysis()
 
     print("\n" + "="*80)
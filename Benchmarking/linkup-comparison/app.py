@@ -1,7 +1,17 @@
 """Flask web application for API comparison interface."""
-from flask import Flask, render_template, jsonify, request, send_file
-from executor import QueryExecutor
-from database import QueryDatabase, ResultsDatabase
+import json
+import threading
+from contextlib import closing
+from flask import Flask, render_template, jsonify, request, send_file, Response, stream_with_context
+from database import QueryDatabase, get_results_database
+from benchmark_results import BenchmarkResultsStore
+from fanout import FanOutEngine
+from runner import CheckpointedRunner
+from response_cache import ResponseCache, CachedExecutor
+from rate_limiter import AdaptiveRateLimiter, RateLimitedExecutor
+from hedging import HedgedExecutor
+from jobs import JobQueue, TERMINAL_STATUSES
+from mock_providers import create_query_executor
 from config import Config
 
 app = Flask(__name__)
@@ -9,7 +19,37 @@ app.config['DEBUG'] = Config.DEBUG
 
 # Initialize components
 query_db = QueryDatabase()
-results_db = ResultsDatabase()
+results_db = get_results_database()
+benchmark_store = BenchmarkResultsStore('master_results_all_batches.csv')
+response_cache = ResponseCache()
+job_queue = JobQueue()
+
+
+rate_limiter = AdaptiveRateLimiter()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Get the process-wide QueryExecutor.
+
+    It is created once so HTTP connections, per-provider rate limits and
+    observed latency budgets carry over between requests.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = HedgedExecutor(RateLimitedExecutor(create_query_executor(), rate_limiter))
+        return _executor
+
+
+def make_executor(use_cache: bool = True):
+    """Get the shared executor, served from the response cache unless disabled."""
+    executor = get_executor()
+    if use_cache:
+        return CachedExecutor(executor, response_cache, query_db)
+    return executor
 
 
 @app.route('/')
@@ -42,39 +82,64 @@ def get_queries():
 
 @app.route('/api/execute', methods=['POST'])
 def execute_queries():
-    """Execute selected queries across APIs."""
+    """
+    Queue selected queries to run across APIs, checkpointing each response.
+
+    Returns a job immediately; poll /api/jobs/<job_id> or stream
+    /api/jobs/<job_id>/events for progress. Pass run_id with resume=true to
+    continue an interrupted run, or with rerun_failures_for=[api, ...] to
+    retry only that API's failed pairs. Responses come from the providers,
+    not the response cache, unless use_cache=true: a cache hit carries the
+    timing of the call that filled it, not a fresh measurement.
+    """
     data = request.json
     query_ids = data.get('query_ids', [])
     api_names = data.get('api_names', None)
+    run_id = data.get('run_id', None)
+    resume = bool(data.get('resume', False))
+    rerun_failures_for = data.get('rerun_failures_for', None)
+    use_cache = bool(data.get('use_cache', False))
+
+    if (resume or rerun_failures_for) and not run_id:
+        return jsonify({
+            'success': False,
+            'error': 'run_id is required to resume or rerun failures'
+        }), 400
+
+    if run_id and not (resume or rerun_failures_for) and results_db.run_exists(run_id):
+        return jsonify({
+            'success': False,
+            'error': f'Run {run_id} already exists; pass resume=true to continue it or use a new run_id'
+        }), 409
+
+    def work(job_run_id, on_response):
+        runner = CheckpointedRunner(make_executor(use_cache), query_db, results_db)
+
+        # Empty query_ids executes all queries
+        summary = runner.run(
+            query_ids=query_ids or None,
+            api_names=api_names,
+            run_id=job_run_id,
+            resume=resume,
+            rerun_failures_for=rerun_failures_for,
+            on_response=on_response
+        )
+        summary.pop('results_file', None)
+        return summary
 
     try:
-        executor = QueryExecutor()
-
-        if not query_ids:
-            # Execute all queries
-            summary = executor.execute_from_database(
-                api_names=api_names,
-                save=True
-            )
-        else:
-            # Execute specific queries
-            summary = executor.execute_from_database(
-                query_ids=query_ids,
-                api_names=api_names,
-                save=True
-            )
+        job = job_queue.submit(work, {
+            'query_ids': query_ids,
+            'api_names': api_names,
+            'resume': resume,
+            'rerun_failures_for': rerun_failures_for,
+            'use_cache': use_cache
+        }, run_id=run_id)
 
         return jsonify({
             'success': True,
-            'summary': {
-                'total_queries': summary['total_queries'],
-                'total_responses': summary['total_responses'],
-                'total_time': summary['total_time'],
-                'apis_used': summary['apis_used'],
-                'successful': summary['successful'],
-                'failed': summary['failed']
-            }
-        })
+            'job': job
+        }), 202
 
     except Exception as e:
         return jsonify({
@@ -83,6 +148,61 @@ def execute_queries():
         }), 500
 
 
+@app.route('/api/jobs')
+def list_jobs():
+    """List benchmark jobs started by this process."""
+    return jsonify({
+        'success': True,
+        'jobs': job_queue.list_jobs()
+    })
+
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """Get a job's status, progress, partial summary and ETA."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': 'Job not found'
+        }), 404
+
+    return jsonify({
+        'success': True,
+        'job': job
+    })
+
+
+@app.route('/api/jobs/<job_id>/events')
+def job_events(job_id):
+    """Stream a job's progress as server-sent events until it finishes."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': 'Job not found'
+        }), 404
+
+    def generate():
+        current = job
+        yield sse_event('progress', current)
+        while current['status'] not in TERMINAL_STATUSES:
+            version = current['version']
+            current = job_queue.wait_for_change(job_id, version)
+            if current['version'] == version:
+                # Keep idle connections open through proxies
+                yield ': keepalive\n\n'
+            else:
+                yield sse_event('progress', current)
+        yield sse_event('done', current)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @app.route('/api/results')
 def get_results():
     """Get latest results or specific run results."""
@@ -150,51 +270,105 @@ def browse():
 @app.route('/api/benchmark-results')
 def get_benchmark_results():
     """Get all benchmark results from CSV for browsing."""
-    import pandas as pd
-    import os
+    try:
+        if not benchmark_store.exists():
+            return jsonify({
+                'success': False,
+                'error': 'Benchmark results file not found'
+            }), 404
+
+        # Without paging parameters, serve the full dataset (parsed once per
+        # file version and pre-serialized)
+        if 'page' not in request.args:
+            return Response(benchmark_store.get_payload(), mimetype='application/json')
+
+        apis = request.args.get('apis', '')
+        return jsonify(benchmark_store.get_page(
+            page=request.args.get('page', 1, type=int),
+            page_size=min(request.args.get('page_size', 20, type=int), 200),
+            search=request.args.get('search', ''),
+            apis=[api for api in apis.split(',') if api] or None,
+            filter_mode=request.args.get('filter', 'all'),
+            search_scope=request.args.get('scope', 'query')
+        ))
+
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 
+@app.route('/api/benchmark-results/<int:query_num>')
+def get_benchmark_result(query_num):
+    """Get full answers for a single benchmark query."""
     try:
-        csv_path = 'master_results_all_batches.csv'
-        if not os.path.exists(csv_path):
+        if not benchmark_store.exists():
             return jsonify({
                 'success': False,
                 'error': 'Benchmark results file not found'
             }), 404
 
-        # Read CSV
-        df = pd.read_csv(csv_path)
-
-        # Convert to list of dictionaries for easier frontend consumption
-        results = []
-        apis = ['linkup_standard', 'linkup_deep', 'perplexity', 'exa', 'you', 'tavily', 'valyu']
-
-        for idx, row in df.iterrows():
-            query_result = {
-                'query_num': int(row['query_num']),
-                'query': row['query'],
-                'query_length': int(row['query_length']),
-                'apis': {}
-            }
-
-            # Extract data for each API
-            for api in apis:
-                query_result['apis'][api] = {
-                    'success': bool(row.get(f'{api}_success', False)),
-                    'response_time': float(row.get(f'{api}_response_time_s', 0)) if pd.notna(row.get(f'{api}_response_time_s')) else None,
-                    'answer': str(row.get(f'{api}_answer', '')) if pd.notna(row.get(f'{api}_answer')) else '',
-                    'num_sources': int(row.get(f'{api}_num_sources', 0)) if pd.notna(row.get(f'{api}_num_sources')) else 0,
-                    'source_urls': str(row.get(f'{api}_source_urls', '')) if pd.notna(row.get(f'{api}_source_urls')) else '',
-                    'error': str(row.get(f'{api}_error', '')) if pd.notna(row.get(f'{api}_error')) else None
-                }
-
-            results.append(query_result)
+        query = benchmark_store.get_query(query_num)
+        if query is None:
+            return jsonify({
+                'success': False,
+                'error': f'Query {query_num} not found'
+            }), 404
+
+        return jsonify({
+            'success': True,
+            'query': query
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/search')
+def search_benchmark_results():
+    """Ranked full-text search over benchmark queries and answers."""
+    text = request.args.get('q', '')
+
+    if not text.strip():
+        return jsonify({
+            'success': False,
+            'error': 'No search text provided'
+        }), 400
+
+    try:
+        if not benchmark_store.exists():
+            return jsonify({
+                'success': False,
+                'error': 'Benchmark results file not found'
+            }), 404
 
+        hits = benchmark_store.search(
+            text,
+            scope=request.args.get('scope', 'all'),
+            limit=min(request.args.get('limit', 50, type=int), 500)
+        )
         return jsonify({
             'success': True,
-            'total_queries': len(results),
-            'queries': results
+            'total_hits': len(hits),
+            'hits': hits
         })
 
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
     except Exception as e:
         return jsonify({
             'success': False,
@@ -222,17 +396,11 @@ def compare_apis():
         }), 400
 
     try:
-        executor = QueryExecutor()
+        executor = make_executor(data.get('use_cache', True))
 
-        # Execute queries and organize results by query
-        results_by_query = []
-
-        for query in queries:
-            query_results = executor.execute_single_query(query, apis)
-            results_by_query.append({
-                'query': query,
-                'responses': query_results
-            })
+        # Fan out every (query, API) pair concurrently; results come back
+        # grouped by query in the order the queries were given
+        results_by_query = FanOutEngine(executor).run(queries, apis)
 
         return jsonify({
             'success': True,
@@ -246,6 +414,105 @@ def compare_apis():
         }), 500
 
 
+@app.route('/api/cache/stats')
+def cache_stats():
+    """Get response cache hit/miss counters and size."""
+    try:
+        return jsonify({
+            'success': True,
+            'stats': response_cache.get_stats()
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/rate-limits')
+def rate_limit_stats():
+    """Get the current adaptive request rate and 429 count per provider."""
+    return jsonify({
+        'success': True,
+        'providers': rate_limiter.get_stats()
+    })
+
+
+@app.route('/api/latency-budgets')
+def latency_budget_stats():
+    """Get each provider's hedge delay, attempt timeouts and hedge/retry counts."""
+    try:
+        return jsonify({
+            'success': True,
+            'providers': get_executor().get_stats()
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/cache/clear', methods=['POST'])
+def clear_cache():
+    """Remove every cached provider response."""
+    try:
+        response_cache.clear()
+        return jsonify({'success': True})
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+def sse_event(event: str, data) -> str:
+    """Format a single Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@app.route('/api/compare/stream', methods=['POST'])
+def compare_apis_stream():
+    """Execute queries across selected APIs, streaming each response as it finishes."""
+    data = request.json
+    apis = data.get('apis', [])
+    queries = data.get('queries', [])
+
+    if not apis:
+        return jsonify({
+            'success': False,
+            'error': 'No APIs selected'
+        }), 400
+
+    if not queries:
+        return jsonify({
+            'success': False,
+            'error': 'No queries provided'
+        }), 400
+
+    def generate():
+        yield sse_event('start', {'queries': queries, 'apis': apis})
+        delivered = 0
+        try:
+            engine = FanOutEngine(make_executor(data.get('use_cache', True)))
+            # Closed as soon as the client disconnects, cancelling the calls not yet made
+            with closing(engine.iter_completed(queries, apis)) as responses:
+                for query_index, api_index, response in responses:
+                    yield sse_event('response', {
+                        'query_index': query_index,
+                        'api_index': api_index,
+                        'query': queries[query_index],
+                        'response': response
+                    })
+                    delivered += 1
+        except Exception as e:
+            yield sse_event('error', {'error': str(e)})
+        yield sse_event('done', {'total_responses': delivered})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 if __name__ == '__main__':
     # Validate configuration
     try:
@@ -0,0 +1,280 @@
+"""In-memory index of master benchmark results for the browse endpoints."""
+import json
+import os
+import threading
+from typing import List, Dict, Any
+
+import pandas as pd
+
+from analyze_benchmark_results import APIS
+from columnar_cache import load_results_frame
+from search_index import InvertedIndex
+
+LINKUP_APIS = ['linkup_standard', 'linkup_deep']
+COMPETITOR_APIS = ['perplexity', 'exa', 'you', 'tavily', 'valyu']
+FILTER_MODES = ('all', 'linkup-wins', 'linkup-fails', 'timeouts')
+SEARCH_SCOPES = ('query', 'all')
+ANSWER_PREVIEW_CHARS = 300
+
+
+class BenchmarkResultsStore:
+    """
+    Parses the master results CSV once into per-column lists and serves
+    requests from memory. The file is re-parsed only when its mtime changes.
+    """
+
+    def __init__(self, csv_path: str = "master_results_all_batches.csv", apis: List[str] = None):
+        self.csv_path = csv_path
+        self.apis = apis or APIS
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._columns = None
+        self._payload = None
+        self._index = None
+
+    def exists(self) -> bool:
+        """Check whether the underlying CSV file is present."""
+        return os.path.exists(self.csv_path)
+
+    def _refresh(self):
+        """Reload the CSV if it changed on disk since the last parse."""
+        mtime = os.stat(self.csv_path).st_mtime_ns
+        if mtime == self._mtime:
+            return
+
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            self._columns = self._load_columns()
+            self._payload = None
+            self._index = None
+            self._mtime = mtime
+
+    def _load_columns(self) -> Dict[str, Any]:
+        """Parse the results (via the columnar cache when fresh) into plain Python lists, one per field."""
+        df = load_results_frame(self.csv_path)
+        columns = {
+            'query_num': df['query_num'].astype(int).tolist(),
+            'query': df['query'].astype(str).tolist(),
+            'query_length': df['query_length'].astype(int).tolist(),
+            'apis': {}
+        }
+
+        def text_column(name, missing):
+            if name not in df:
+                return [missing] * len(df)
+            col = df[name]
+            return [str(v) if notna else missing for v, notna in zip(col.tolist(), col.notna().tolist())]
+
+        for api in self.apis:
+            success = df[f'{api}_success'].fillna(False).astype(bool) if f'{api}_success' in df else pd.Series(False, index=df.index)
+            times = df[f'{api}_response_time_s'] if f'{api}_response_time_s' in df else pd.Series(float('nan'), index=df.index)
+            sources = df[f'{api}_num_sources'] if f'{api}_num_sources' in df else pd.Series(0, index=df.index)
+
+            columns['apis'][api] = {
+                'success': success.tolist(),
+                'response_time': [float(v) if notna else None for v, notna in zip(times.tolist(), times.notna().tolist())],
+                'answer': text_column(f'{api}_answer', ''),
+                'num_sources': sources.fillna(0).astype(int).tolist(),
+                'source_urls': text_column(f'{api}_source_urls', ''),
+                'error': text_column(f'{api}_error', None)
+            }
+
+        columns['row_by_query_num'] = {num: idx for idx, num in enumerate(columns['query_num'])}
+        columns['filters'] = self._compute_filters(columns)
+        return columns
+
+    def _compute_filters(self, columns: Dict[str, Any]) -> Dict[str, List[int]]:
+        """Precompute the row indices matching each browse filter mode."""
+        api_columns = columns['apis']
+        linkup = [api for api in LINKUP_APIS if api in api_columns]
+        competitors = [api for api in COMPETITOR_APIS if api in api_columns]
+        filters = {mode: [] for mode in FILTER_MODES}
+
+        for idx in range(len(columns['query_num'])):
+            filters['all'].append(idx)
+            linkup_succeeded = any(api_columns[api]['success'][idx] for api in linkup)
+            competitor_succeeded = [api_columns[api]['success'][idx] for api in competitors]
+
+            # Linkup succeeded where at least one competitor failed
+            if linkup_succeeded and not all(competitor_succeeded):
+                filters['linkup-wins'].append(idx)
+
+            # Linkup failed where at least one competitor succeeded
+            if not linkup_succeeded and any(competitor_succeeded):
+                filters['linkup-fails'].append(idx)
+
+            if any('timeout' in (api_columns[api]['error'][idx] or '').lower() for api in api_columns):
+                filters['timeouts'].append(idx)
+
+        return filters
+
+    def get_index(self) -> InvertedIndex:
+        """Get the full-text index over queries and answers, built on first use."""
+        self._refresh()
+        cached = self._index
+        if cached is not None and cached[0] == self._mtime:
+            return cached[1]
+
+        with self._lock:
+            mtime, columns = self._mtime, self._columns
+            if self._index is not None and self._index[0] == mtime:
+                return self._index[1]
+
+            index = InvertedIndex()
+            for idx, query in enumerate(columns['query']):
+                index.add(idx, 'query', query)
+                for api, api_columns in columns['apis'].items():
+                    index.add(idx, api, api_columns['answer'][idx])
+            index.finalize()
+
+            self._index = (mtime, index)
+            return index
+
+    def search(self, text: str, scope: str = 'all', limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Ranked full-text search over queries and (optionally) answers.
+
+        Args:
+            text: Search text
+            scope: 'query' to match query text only, 'all' to include answers
+            limit: Maximum number of hits
+
+        Returns:
+            List of hits with query_num, query, score and matched fields
+        """
+        if scope not in SEARCH_SCOPES:
+            raise ValueError(f"Unknown search scope: {scope}")
+
+        index = self.get_index()
+        columns = self._columns
+        hits = index.search(text, fields=['query'] if scope == 'query' else None, limit=limit)
+
+        return [{
+            'query_num': columns['query_num'][row],
+            'query': columns['query'][row],
+            'score': round(score, 4),
+            'matched_fields': matched
+        } for row, score, matched in hits]
+
+    def __len__(self) -> int:
+        self._refresh()
+        return len(self._columns['query_num'])
+
+    def get_row(self, idx: int) -> Dict[str, Any]:
+        """Assemble the API payload dict for a single row."""
+        columns = self._columns
+        return {
+            'query_num': columns['query_num'][idx],
+            'query': columns['query'][idx],
+            'query_length': columns['query_length'][idx],
+            'apis': {
+                api: {field: values[idx] for field, values in api_columns.items()}
+                for api, api_columns in columns['apis'].items()
+            }
+        }
+
+    def get_preview_row(self, idx: int, apis: List[str], answer_chars: int) -> Dict[str, Any]:
+        """Assemble a list-view row with answers truncated and source URLs omitted."""
+        columns = self._columns
+        row = {
+            'query_num': columns['query_num'][idx],
+            'query': columns['query'][idx],
+            'query_length': columns['query_length'][idx],
+            'apis': {}
+        }
+
+        for api in apis:
+            api_columns = columns['apis'][api]
+            answer = api_columns['answer'][idx]
+            row['apis'][api] = {
+                'success': api_columns['success'][idx],
+                'response_time': api_columns['response_time'][idx],
+                'answer': answer[:answer_chars],
+                'answer_length': len(answer),
+                'num_sources': api_columns['num_sources'][idx],
+                'error': api_columns['error'][idx]
+            }
+
+        return row
+
+    def get_query(self, query_num: int) -> Dict[str, Any]:
+        """Get the full row, including complete answers, for one query number."""
+        self._refresh()
+        idx = self._columns['row_by_query_num'].get(query_num)
+        if idx is None:
+            return None
+        return self.get_row(idx)
+
+    def get_page(self, page: int = 1, page_size: int = 20, search: str = '',
+                 apis: List[str] = None, filter_mode: str = 'all',
+                 search_scope: str = 'query',
+                 answer_chars: int = ANSWER_PREVIEW_CHARS) -> Dict[str, Any]:
+        """
+        Get one page of filtered results for the browse view.
+
+        Args:
+            page: 1-based page number
+            page_size: Queries per page
+            search: Search text, matched through the full-text index and
+                returned in relevance order
+            apis: Subset of APIs to include in each row (defaults to all)
+            filter_mode: One of FILTER_MODES
+            search_scope: 'query' to search query text only, 'all' to include answers
+            answer_chars: Maximum answer characters returned per API
+
+        Returns:
+            Dictionary with pagination metadata and the page's rows
+        """
+        self._refresh()
+        columns = self._columns
+
+        if filter_mode not in FILTER_MODES:
+            raise ValueError(f"Unknown filter mode: {filter_mode}")
+        apis = [api for api in (apis or self.apis) if api in columns['apis']]
+
+        if search_scope not in SEARCH_SCOPES:
+            raise ValueError(f"Unknown search scope: {search_scope}")
+
+        matches = columns['filters'][filter_mode]
+        if search.strip():
+            hits = self.get_index().search(search, fields=['query'] if search_scope == 'query' else None)
+            allowed = None if filter_mode == 'all' else set(matches)
+            matches = [row for row, _, _ in hits if allowed is None or row in allowed]
+
+        page_size = max(1, page_size)
+        total_pages = max(1, -(-len(matches) // page_size))
+        page = max(1, min(page, total_pages))
+        start = (page - 1) * page_size
+
+        return {
+            'success': True,
+            'total_queries': len(columns['query_num']),
+            'filtered_queries': len(matches),
+            'page': page,
+            'page_size': page_size,
+            'total_pages': total_pages,
+            'queries': [self.get_preview_row(idx, apis, answer_chars) for idx in matches[start:start + page_size]]
+        }
+
+    def get_all(self) -> List[Dict]:
+        """Get every row in the shape served by /api/benchmark-results."""
+        self._refresh()
+        return [self.get_row(idx) for idx in range(len(self._columns['query_num']))]
+
+    def get_payload(self) -> bytes:
+        """Get the full /api/benchmark-results response, serialized once per file version."""
+        self._refresh()
+        cached = self._payload
+        if cached is not None and cached[0] == self._mtime:
+            return cached[1]
+
+        mtime = self._mtime
+        queries = self.get_all()
+        payload = json.dumps({
+            'success': True,
+            'total_queries': len(queries),
+            'queries': queries
+        }).encode('utf-8')
+        self._payload = (mtime, payload)
+        return payload
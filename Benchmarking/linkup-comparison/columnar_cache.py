@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Columnar Parquet cache of the master results CSV
+Stores a typed copy next to the CSV so loaders can read only the columns
+they need, skipping full answer text entirely for numeric analyses.
+Needs the optional `pyarrow` package; without it loaders read the CSV.
+"""
+
+import argparse
+import os
+from typing import List
+
+import pandas as pd
+
+# Suffixes of the per-API columns that hold bulky text
+TEXT_SUFFIXES = ('_answer', '_source_urls')
+ANSWER_LENGTH_SUFFIX = '_answer_length'
+# Parquet metadata keys recording which CSV the cache was built from
+SOURCE_MTIME_KEY = b'source_mtime_ns'
+SOURCE_SIZE_KEY = b'source_size'
+
+
+def pyarrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def cache_path_for(csv_path: str) -> str:
+    """Get the Parquet cache path for a CSV (same name, .parquet extension)."""
+    return os.path.splitext(csv_path)[0] + '.parquet'
+
+
+def api_names(columns: List[str]) -> List[str]:
+    """Get the API names present in a results table, in column order."""
+    return [column[:-len('_success')] for column in columns if column.endswith('_success')]
+
+
+def add_answer_lengths(df: pd.DataFrame) -> pd.DataFrame:
+    """Add an {api}_answer_length column for every {api}_answer column."""
+    for api in api_names(list(df.columns)):
+        answer_col = f'{api}_answer'
+        if answer_col in df:
+            df[f'{api}{ANSWER_LENGTH_SUFFIX}'] = df[answer_col].fillna('').astype(str).str.len()
+    return df
+
+
+def is_fresh(csv_path: str, cache_path: str = None) -> bool:
+    """Check whether the Parquet cache was built from the CSV as it is now."""
+    cache_path = cache_path or cache_path_for(csv_path)
+    if not pyarrow_available() or not os.path.exists(cache_path):
+        return False
+
+    import pyarrow.parquet as pq
+
+    metadata = pq.read_schema(cache_path).metadata or {}
+    stat = os.stat(csv_path)
+    return (metadata.get(SOURCE_MTIME_KEY) == str(stat.st_mtime_ns).encode()
+            and metadata.get(SOURCE_SIZE_KEY) == str(stat.st_size).encode())
+
+
+def convert(csv_path: str, cache_path: str = None) -> str:
+    """
+    Write a typed Parquet copy of a results CSV.
+
+    Numeric columns and precomputed {api}_answer_length columns come first,
+    and the answer and source URL text is written last, so readers that
+    leave them out never decompress them.
+
+    Returns:
+        Path of the written cache
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    cache_path = cache_path or cache_path_for(csv_path)
+    stat = os.stat(csv_path)
+
+    df = add_answer_lengths(pd.read_csv(csv_path))
+    text_columns = [c for c in df.columns if c.endswith(TEXT_SUFFIXES)]
+    df = df[[c for c in df.columns if c not in text_columns] + text_columns]
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        SOURCE_MTIME_KEY: str(stat.st_mtime_ns).encode(),
+        SOURCE_SIZE_KEY: str(stat.st_size).encode()
+    })
+
+    # Write atomically so concurrent readers never see a partial file
+    tmp_path = cache_path + '.tmp'
+    pq.write_table(table, tmp_path, compression='zstd')
+    os.replace(tmp_path, cache_path)
+    return cache_path
+
+
+def load_results_frame(csv_path: str, include_text: bool = True, build: bool = True) -> pd.DataFrame:
+    """
+    Load the master results, from the Parquet cache when it is fresh.
+
+    Args:
+        csv_path: Path to the results CSV
+        include_text: Load {api}_answer and {api}_source_urls; numeric
+            analyses pass False and use {api}_answer_length instead
+        build: Rebuild a missing or stale cache first (when pyarrow is
+            installed and the directory is writable)
+
+    Returns:
+        DataFrame with the CSV's columns plus {api}_answer_length
+    """
+    cache_path = cache_path_for(csv_path)
+    if build and pyarrow_available() and not is_fresh(csv_path, cache_path):
+        try:
+            convert(csv_path, cache_path)
+        except (OSError, ValueError, TypeError):
+            # Read-only deployments (e.g. Vercel) or columns Arrow cannot
+            # type fall back to the CSV
+            pass
+
+    if is_fresh(csv_path, cache_path):
+        import pyarrow.parquet as pq
+
+        columns = pq.read_schema(cache_path).names
+        if not include_text:
+            columns = [c for c in columns if not c.endswith(TEXT_SUFFIXES)]
+        return pd.read_parquet(cache_path, columns=columns, memory_map=True)
+
+    if include_text:
+        return add_answer_lengths(pd.read_csv(csv_path))
+
+    # Without a cache the answers still have to be parsed once to measure them
+    df = add_answer_lengths(pd.read_csv(csv_path))
+    return df[[c for c in df.columns if not c.endswith(TEXT_SUFFIXES)]]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Build the columnar Parquet cache of a benchmark results CSV'
+    )
+    parser.add_argument('csv_path', nargs='?', default='master_results_all_batches.csv',
+                        help='Results CSV to convert (default: master_results_all_batches.csv)')
+    parser.add_argument('--output', default=None, help='Cache path (default: <csv name>.parquet)')
+
+    args = parser.parse_args()
+
+    if not pyarrow_available():
+        raise SystemExit("Building the Parquet cache requires the 'pyarrow' package")
+
+    print(f"Converting {args.csv_path}...")
+    path = convert(args.csv_path, args.output)
+    print(f"  ✓ {path} ({os.path.getsize(path) / 1024 / 1024:.1f} MB, "
+          f"CSV {os.path.getsize(args.csv_path) / 1024 / 1024:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,13 @@
 """Database and storage management."""
 import json
 import os
+import sqlite3
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
 from config import Config
+from results_io import JSONL_EXTENSIONS, JSONLWriter, is_jsonl, iter_jsonl, iter_run_responses, run_finished
 
 
 class QueryDatabase:
@@ -41,19 +45,266 @@ class QueryDatabase:
         return list(set(q['category'] for q in self.queries))
 
 
+class RunWriter:
+    """
+    Incrementally writes one run as JSONL: a header line, one line per
+    response as it arrives, and a footer with totals on close.
+    """
+
+    def __init__(self, filepath: str, run_id: str, on_close=None, resume: bool = False):
+        self.filepath = filepath
+        self.run_id = run_id
+        self.timestamp = datetime.now().isoformat()
+        self.resumed = resume
+        self.total_responses = 0
+        self._queries = set()
+        self._on_close = on_close
+        self._writer = JSONLWriter(filepath, append=resume)
+        if resume:
+            # Later records for the same (query_id, api_name) supersede earlier ones
+            self._writer.write({'type': 'run_resume', 'timestamp': self.timestamp})
+        else:
+            self._writer.write({'type': 'run', 'run_id': run_id, 'timestamp': self.timestamp})
+
+    def append(self, result: Dict):
+        """Persist a single API response."""
+        self._writer.write(result)
+        self.total_responses += 1
+        self._queries.add(result['query'])
+
+    def close(self):
+        """Write the footer and register the run."""
+        if self._writer is None:
+            return
+        self._writer.write({
+            'type': 'run_end',
+            'total_queries': len(self._queries),
+            'total_responses': self.total_responses
+        })
+        self._writer.close()
+        self._writer = None
+        if self._on_close:
+            self._on_close(self)
+
+    def abort(self):
+        """Close the file without a footer, leaving the run resumable rather than finished."""
+        if self._writer is None:
+            return
+        self._writer.close()
+        self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # A run interrupted by an exception must not look finished
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
 class ResultsDatabase:
     """Manager for storing and retrieving API results."""
 
-    def __init__(self, results_dir: str = None):
+    MANIFEST_FILENAME = 'runs_manifest.jsonl'
+    # An unfinished run untouched this long is assumed abandoned and re-read once
+    IN_PROGRESS_RESYNC_SECONDS = 60
+    FILE_FORMATS = ('json', 'jsonl', 'jsonl.gz', 'jsonl.zst')
+
+    def __init__(self, results_dir: str = None, file_format: str = None):
         # Use /tmp in serverless environments (Vercel, AWS Lambda, etc.)
         if results_dir is None:
             results_dir = '/tmp/data' if os.getenv('VERCEL') else Config.RESULTS_DIR
         self.results_dir = results_dir
+        self.manifest_path = os.path.join(self.results_dir, self.MANIFEST_FILENAME)
         os.makedirs(self.results_dir, exist_ok=True)
 
+        self.file_format = file_format or os.getenv('RESULTS_FORMAT', 'json')
+        if self.file_format not in self.FILE_FORMATS:
+            raise ValueError(f"Unknown results format: {self.file_format}")
+
+    def _list_result_files(self) -> List[str]:
+        """List results files in the results directory."""
+        return [
+            f for f in os.listdir(self.results_dir)
+            if f.startswith('results_') and (f.endswith('.json') or is_jsonl(f))
+        ]
+
+    @staticmethod
+    def _run_id_from_filename(filename: str) -> str:
+        """Strip the results_ prefix and format extension from a filename."""
+        run_id = filename[len('results_'):]
+        for ext in JSONL_EXTENSIONS + ('.json',):
+            if run_id.endswith(ext):
+                return run_id[:-len(ext)]
+        return run_id
+
+    def run_exists(self, run_id: str) -> bool:
+        """Check whether a run with this ID has been saved."""
+        return self._find_run_file(run_id) is not None
+
+    def _find_run_file(self, run_id: str) -> str:
+        """Get the path of a run's results file in whichever format it was saved."""
+        for ext in ('.json',) + JSONL_EXTENSIONS:
+            filepath = os.path.join(self.results_dir, f"results_{run_id}{ext}")
+            if os.path.exists(filepath):
+                return filepath
+        return None
+
+    def _read_run_header(self, filename: str) -> Dict:
+        """Read a run's header fields, streaming JSONL files rather than loading them."""
+        filepath = os.path.join(self.results_dir, filename)
+        if not is_jsonl(filename):
+            with open(filepath, 'r') as f:
+                return json.load(f)
+
+        header = self._read_jsonl_header(filepath)
+        queries = set()
+        total_responses = 0
+        for record in iter_run_responses(filepath):
+            total_responses += 1
+            queries.add(record.get('query'))
+
+        header.update(total_queries=len(queries), total_responses=total_responses,
+                      in_progress=not run_finished(filepath))
+        return header
+
+    def _read_jsonl_header(self, filepath: str) -> Dict:
+        """Read run_id and timestamp from the first line of a JSONL run."""
+        header = {'run_id': self._run_id_from_filename(os.path.basename(filepath)), 'timestamp': None}
+        for record in iter_jsonl(filepath):
+            if record.get('type') == 'run':
+                header.update(run_id=record['run_id'], timestamp=record['timestamp'])
+            break
+        return header
+
+    def _manifest_entry(self, filename: str, data: Dict) -> Dict:
+        """Build the manifest record for one results file."""
+        return {
+            'filename': filename,
+            'mtime': os.stat(os.path.join(self.results_dir, filename)).st_mtime_ns,
+            'run_id': data['run_id'],
+            'timestamp': data['timestamp'],
+            'total_queries': data['total_queries'],
+            'total_responses': data['total_responses'],
+            'in_progress': data.get('in_progress', False)
+        }
+
+    def _append_manifest(self, entry: Dict):
+        """Append one record to the runs manifest."""
+        with open(self.manifest_path, 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+
+    def _read_manifest(self) -> Dict[str, Dict]:
+        """Read the runs manifest, keyed by filename. Later records win."""
+        entries = {}
+        if not os.path.exists(self.manifest_path):
+            return entries
+
+        with open(self.manifest_path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Ignore a partially written trailing line
+                    continue
+                entries[entry['filename']] = entry
+
+        return entries
+
+    def _sync_manifest(self) -> Dict[str, Dict]:
+        """
+        Get manifest entries for every results file on disk.
+
+        Files added, removed or rewritten outside save_results are detected by
+        comparing the directory listing and mtimes, and only those files are
+        parsed before the manifest is rewritten.
+
+        A JSONL run still being written changes its mtime on every append, so
+        once listed it is not re-read until it goes quiet for
+        IN_PROGRESS_RESYNC_SECONDS; its totals lag until then or until
+        RunWriter.close registers the finished run.
+        """
+        entries = self._read_manifest()
+        files = self._list_result_files()
+        changed = len(entries) != len(files)
+
+        synced = {}
+        for filename in files:
+            entry = entries.get(filename)
+            mtime = os.stat(os.path.join(self.results_dir, filename)).st_mtime_ns
+            if entry is not None and entry.get('mtime') != mtime and entry.get('in_progress') \
+                    and time.time() - mtime / 1e9 < self.IN_PROGRESS_RESYNC_SECONDS:
+                synced[filename] = entry
+                continue
+            if entry is None or entry.get('mtime') != mtime:
+                entry = self._manifest_entry(filename, self._read_run_header(filename))
+                changed = True
+            synced[filename] = entry
+
+        if changed:
+            tmp_path = self.manifest_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                for entry in synced.values():
+                    f.write(json.dumps(entry) + '\n')
+            os.replace(tmp_path, self.manifest_path)
+
+        return synced
+
+    def open_run(self, run_id: str = None, resume: bool = False, overwrite: bool = False) -> RunWriter:
+        """
+        Start an incrementally written JSONL run.
+
+        Each response passed to RunWriter.append is flushed to disk immediately,
+        so a crash mid-run keeps every response collected so far.
+
+        Args:
+            run_id: Optional run ID, will generate timestamp-based if not provided
+            resume: Append to the existing run with this ID; without it an
+                existing run ID is rejected rather than overwritten
+            overwrite: Replace an existing run with this ID instead
+
+        Returns:
+            RunWriter for the run; close it to finish the run
+        """
+        if not run_id:
+            run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        existing = self._find_run_file(run_id) if resume or not overwrite else None
+        if existing and not resume:
+            raise ValueError(f"Run {run_id} already exists; resume it or use a new run ID")
+        if existing and not is_jsonl(existing):
+            raise ValueError(f"Run {run_id} is stored as JSON; only JSONL runs can be resumed")
+
+        if existing:
+            filename = os.path.basename(existing)
+        else:
+            file_format = self.file_format if self.file_format != 'json' else 'jsonl'
+            filename = f"results_{run_id}.{file_format}"
+
+        def register(writer):
+            if writer.resumed:
+                # Totals cover the whole run, not just this session
+                data = self._read_run_header(filename)
+            else:
+                data = {
+                    'run_id': writer.run_id,
+                    'timestamp': writer.timestamp,
+                    'total_queries': len(writer._queries),
+                    'total_responses': writer.total_responses
+                }
+            self._append_manifest(self._manifest_entry(filename, data))
+
+        return RunWriter(os.path.join(self.results_dir, filename), run_id,
+                         on_close=register, resume=bool(existing))
+
     def save_results(self, results: List[Dict], run_id: str = None) -> str:
         """
-        Save API results to JSON file.
+        Save API results to a JSON (or JSONL, per file_format) file.
 
         Args:
             results: List of API response dictionaries
@@ -65,6 +316,12 @@ class ResultsDatabase:
         if not run_id:
             run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
 
+        if self.file_format != 'json':
+            with self.open_run(run_id, overwrite=True) as writer:
+                for result in results:
+                    writer.append(result)
+            return writer.filepath
+
         filename = f"results_{run_id}.json"
         filepath = os.path.join(self.results_dir, filename)
 
@@ -79,8 +336,41 @@ class ResultsDatabase:
         with open(filepath, 'w') as f:
             json.dump(data, f, indent=2)
 
+        self._append_manifest(self._manifest_entry(filename, data))
+
         return filepath
 
+    def _resolve_run_file(self, run_id: str = None) -> str:
+        """Get the results file for run_id, or for the most recent run."""
+        if run_id:
+            return self._find_run_file(run_id)
+
+        files = self._list_result_files()
+        if not files:
+            return None
+        latest = max(files, key=self._run_id_from_filename)
+        return os.path.join(self.results_dir, latest)
+
+    def iter_results(self, run_id: str = None) -> Iterator[Dict]:
+        """
+        Stream a run's responses one at a time.
+
+        JSONL runs are read line by line; legacy JSON runs are loaded in full.
+
+        Args:
+            run_id: Run ID to read. If None, reads most recent.
+        """
+        filepath = self._resolve_run_file(run_id)
+        if not filepath:
+            return
+
+        if not is_jsonl(filepath):
+            with open(filepath, 'r') as f:
+                yield from json.load(f)['results']
+            return
+
+        yield from iter_run_responses(filepath)
+
     def load_results(self, run_id: str = None) -> Dict:
         """
         Load results from file.
@@ -91,38 +381,37 @@ class ResultsDatabase:
         Returns:
             Dictionary containing results data
         """
-        if run_id:
-            filename = f"results_{run_id}.json"
-            filepath = os.path.join(self.results_dir, filename)
-        else:
-            # Get most recent results file
-            files = [f for f in os.listdir(self.results_dir) if f.startswith('results_') and f.endswith('.json')]
-            if not files:
-                return None
-            files.sort(reverse=True)
-            filepath = os.path.join(self.results_dir, files[0])
-
-        if not os.path.exists(filepath):
+        filepath = self._resolve_run_file(run_id)
+        if not filepath or not os.path.exists(filepath):
             return None
 
-        with open(filepath, 'r') as f:
-            return json.load(f)
+        if not is_jsonl(filepath):
+            with open(filepath, 'r') as f:
+                return json.load(f)
+
+        data = self._read_jsonl_header(filepath)
+        results = list(iter_run_responses(filepath))
+
+        data.update(
+            total_queries=len(set(r['query'] for r in results)),
+            total_responses=len(results),
+            results=results
+        )
+        return data
 
     def list_runs(self) -> List[Dict]:
         """List all available result runs."""
-        files = [f for f in os.listdir(self.results_dir) if f.startswith('results_') and f.endswith('.json')]
+        entries = self._sync_manifest()
         runs = []
 
-        for filename in sorted(files, reverse=True):
-            filepath = os.path.join(self.results_dir, filename)
-            with open(filepath, 'r') as f:
-                data = json.load(f)
-                runs.append({
-                    'run_id': data['run_id'],
-                    'timestamp': data['timestamp'],
-                    'total_queries': data['total_queries'],
-                    'total_responses': data['total_responses']
-                })
+        for filename in sorted(entries, key=self._run_id_from_filename, reverse=True):
+            entry = entries[filename]
+            runs.append({
+                'run_id': entry['run_id'],
+                'timestamp': entry['timestamp'],
+                'total_queries': entry['total_queries'],
+                'total_responses': entry['total_responses']
+            })
 
         return runs
 
@@ -156,3 +445,334 @@ class ResultsDatabase:
             'timestamp': data['timestamp'],
             'comparisons': list(comparison.values())
         }
+
+
+class SQLiteResultsDatabase:
+    """
+    SQLite-backed results storage with the same interface as ResultsDatabase.
+
+    Runs, queries and responses live in separate tables indexed by run_id,
+    query text and api_name, so per-query and per-API lookups across runs
+    are indexed reads rather than whole-file parses.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            run_id TEXT PRIMARY KEY,
+            timestamp TEXT NOT NULL,
+            total_queries INTEGER NOT NULL,
+            total_responses INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS queries (
+            id INTEGER PRIMARY KEY,
+            run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+            position INTEGER NOT NULL,
+            query TEXT NOT NULL,
+            UNIQUE (run_id, query)
+        );
+        CREATE TABLE IF NOT EXISTS responses (
+            id INTEGER PRIMARY KEY,
+            run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+            query_id INTEGER NOT NULL REFERENCES queries(id) ON DELETE CASCADE,
+            api_name TEXT,
+            success INTEGER,
+            response_time REAL,
+            data TEXT NOT NULL,
+            -- The response's own query_id, set for checkpointed runs; NULLs never conflict
+            checkpoint_query_id INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS idx_queries_query ON queries(query);
+        CREATE INDEX IF NOT EXISTS idx_responses_run ON responses(run_id);
+        CREATE INDEX IF NOT EXISTS idx_responses_query ON responses(query_id);
+        CREATE INDEX IF NOT EXISTS idx_responses_api ON responses(api_name, run_id);
+    """
+    # Created after migrate_schema, which adds the column to older databases
+    CHECKPOINT_INDEX = """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_responses_checkpoint
+            ON responses(run_id, checkpoint_query_id, api_name);
+    """
+    INSERT_RESPONSE = (
+        'INSERT INTO responses (run_id, query_id, api_name, success, response_time, data, checkpoint_query_id) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?) '
+        'ON CONFLICT (run_id, checkpoint_query_id, api_name) DO UPDATE SET '
+        'query_id = excluded.query_id, success = excluded.success, '
+        'response_time = excluded.response_time, data = excluded.data'
+    )
+
+    def __init__(self, db_path: str = None):
+        if db_path is None:
+            results_dir = '/tmp/data' if os.getenv('VERCEL') else Config.RESULTS_DIR
+            os.makedirs(results_dir, exist_ok=True)
+            db_path = os.path.join(results_dir, 'results.db')
+        self.db_path = db_path
+
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+            self._migrate_schema(conn)
+            conn.executescript(self.CHECKPOINT_INDEX)
+
+    @staticmethod
+    def _migrate_schema(conn: sqlite3.Connection):
+        """Add checkpoint_query_id to databases created before it existed, keeping the latest duplicate."""
+        columns = {row['name'] for row in conn.execute('PRAGMA table_info(responses)')}
+        if 'checkpoint_query_id' in columns:
+            return
+        conn.execute('ALTER TABLE responses ADD COLUMN checkpoint_query_id INTEGER')
+        conn.execute("UPDATE responses SET checkpoint_query_id = json_extract(data, '$.query_id')")
+        conn.execute(
+            'DELETE FROM responses WHERE checkpoint_query_id IS NOT NULL AND id NOT IN ('
+            'SELECT MAX(id) FROM responses WHERE checkpoint_query_id IS NOT NULL '
+            'GROUP BY run_id, checkpoint_query_id, api_name)'
+        )
+
+    def _insert_response(self, conn: sqlite3.Connection, run_id: str, query_row_id: int, result: Dict):
+        """Store one response, replacing an earlier record of the same (query_id, api_name) in the run."""
+        conn.execute(self.INSERT_RESPONSE, (
+            run_id, query_row_id, result.get('api_name'),
+            int(bool(result.get('success', False))), result.get('response_time'),
+            json.dumps(result, default=str), result.get('query_id')
+        ))
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a transaction; one connection per call keeps Flask worker threads independent."""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA foreign_keys = ON')
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save_results(self, results: List[Dict], run_id: str = None, timestamp: str = None) -> str:
+        """
+        Save API results, replacing any existing run with the same ID.
+
+        Args:
+            results: List of API response dictionaries
+            run_id: Optional run ID, will generate timestamp-based if not provided
+            timestamp: Optional ISO timestamp, defaults to now (used by migrations)
+
+        Returns:
+            Path to the SQLite database
+        """
+        if not run_id:
+            run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        query_ids = {}
+        with self._connect() as conn:
+            conn.execute('DELETE FROM runs WHERE run_id = ?', (run_id,))
+            conn.execute(
+                'INSERT INTO runs (run_id, timestamp, total_queries, total_responses) VALUES (?, ?, ?, ?)',
+                (run_id, timestamp or datetime.now().isoformat(),
+                 len(set(r['query'] for r in results)), len(results))
+            )
+
+            for result in results:
+                query = result['query']
+                if query not in query_ids:
+                    cursor = conn.execute(
+                        'INSERT INTO queries (run_id, position, query) VALUES (?, ?, ?)',
+                        (run_id, len(query_ids), query)
+                    )
+                    query_ids[query] = cursor.lastrowid
+
+                self._insert_response(conn, run_id, query_ids[query], result)
+
+        return self.db_path
+
+    def open_run(self, run_id: str = None, resume: bool = False) -> 'SQLiteRunWriter':
+        """
+        Start an incrementally written run; each appended response is committed immediately.
+
+        Args:
+            run_id: Optional run ID, will generate timestamp-based if not provided
+            resume: Add to the existing run with this ID; without it an
+                existing run ID is rejected rather than replaced
+
+        Returns:
+            SQLiteRunWriter for the run; close it to finish the run
+        """
+        if not run_id:
+            run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if not resume and self.run_exists(run_id):
+            raise ValueError(f"Run {run_id} already exists; resume it or use a new run ID")
+        return SQLiteRunWriter(self, run_id, resume)
+
+    def run_exists(self, run_id: str) -> bool:
+        """Check whether a run with this ID has been saved."""
+        with self._connect() as conn:
+            return conn.execute('SELECT 1 FROM runs WHERE run_id = ?', (run_id,)).fetchone() is not None
+
+    def iter_results(self, run_id: str = None) -> Iterator[Dict]:
+        """Stream a run's responses one at a time."""
+        with self._connect() as conn:
+            run_id = run_id or self._latest_run_id(conn)
+            for row in conn.execute('SELECT data FROM responses WHERE run_id = ? ORDER BY id', (run_id,)):
+                yield json.loads(row['data'])
+
+    def _latest_run_id(self, conn: sqlite3.Connection) -> str:
+        """Get the most recent run ID (run IDs sort chronologically)."""
+        row = conn.execute('SELECT run_id FROM runs ORDER BY run_id DESC LIMIT 1').fetchone()
+        return row['run_id'] if row else None
+
+    def load_results(self, run_id: str = None) -> Dict:
+        """
+        Load results for a run.
+
+        Args:
+            run_id: Run ID to load. If None, loads most recent.
+
+        Returns:
+            Dictionary containing results data
+        """
+        with self._connect() as conn:
+            run_id = run_id or self._latest_run_id(conn)
+            run = conn.execute('SELECT * FROM runs WHERE run_id = ?', (run_id,)).fetchone()
+            if run is None:
+                return None
+
+            rows = conn.execute(
+                'SELECT data FROM responses WHERE run_id = ? ORDER BY id', (run_id,)
+            ).fetchall()
+
+        return {
+            'run_id': run['run_id'],
+            'timestamp': run['timestamp'],
+            'total_queries': run['total_queries'],
+            'total_responses': run['total_responses'],
+            'results': [json.loads(row['data']) for row in rows]
+        }
+
+    def list_runs(self) -> List[Dict]:
+        """List all available result runs."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT run_id, timestamp, total_queries, total_responses FROM runs ORDER BY run_id DESC'
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_comparison_data(self, run_id: str = None) -> Dict:
+        """
+        Get formatted comparison data for UI display.
+
+        Args:
+            run_id: Run ID to load
+
+        Returns:
+            Dictionary with queries and grouped API responses
+        """
+        with self._connect() as conn:
+            run_id = run_id or self._latest_run_id(conn)
+            run = conn.execute('SELECT * FROM runs WHERE run_id = ?', (run_id,)).fetchone()
+            if run is None:
+                return None
+
+            rows = conn.execute(
+                'SELECT q.query, r.data FROM responses r JOIN queries q ON q.id = r.query_id '
+                'WHERE r.run_id = ? ORDER BY q.position, r.id', (run_id,)
+            ).fetchall()
+
+        comparisons = []
+        for row in rows:
+            if not comparisons or comparisons[-1]['query'] != row['query']:
+                comparisons.append({'query': row['query'], 'responses': []})
+            comparisons[-1]['responses'].append(json.loads(row['data']))
+
+        return {
+            'run_id': run['run_id'],
+            'timestamp': run['timestamp'],
+            'comparisons': comparisons
+        }
+
+    def get_query_history(self, query: str, api_name: str = None) -> List[Dict]:
+        """Get every stored response to a query across runs, optionally for one API."""
+        sql = ('SELECT r.run_id, r.data FROM responses r JOIN queries q ON q.id = r.query_id '
+               'WHERE q.query = ?')
+        params = [query]
+        if api_name:
+            sql += ' AND r.api_name = ?'
+            params.append(api_name)
+
+        with self._connect() as conn:
+            rows = conn.execute(sql + ' ORDER BY r.run_id DESC, r.id', params).fetchall()
+        return [dict(json.loads(row['data']), run_id=row['run_id']) for row in rows]
+
+    def get_api_responses(self, api_name: str, run_id: str = None) -> List[Dict]:
+        """Get every stored response from one API, optionally limited to one run."""
+        sql = 'SELECT run_id, data FROM responses WHERE api_name = ?'
+        params = [api_name]
+        if run_id:
+            sql += ' AND run_id = ?'
+            params.append(run_id)
+
+        with self._connect() as conn:
+            rows = conn.execute(sql + ' ORDER BY run_id DESC, id', params).fetchall()
+        return [dict(json.loads(row['data']), run_id=row['run_id']) for row in rows]
+
+
+class SQLiteRunWriter:
+    """Checkpointing run writer for SQLiteResultsDatabase, mirroring RunWriter."""
+
+    def __init__(self, db: SQLiteResultsDatabase, run_id: str, resume: bool = False):
+        self.db = db
+        self.run_id = run_id
+        self.filepath = db.db_path
+        self.timestamp = datetime.now().isoformat()
+        self.resumed = resume
+        self.total_responses = 0
+
+        with db._connect() as conn:
+            if not resume:
+                conn.execute('DELETE FROM runs WHERE run_id = ?', (run_id,))
+            conn.execute(
+                'INSERT OR IGNORE INTO runs (run_id, timestamp, total_queries, total_responses) VALUES (?, ?, 0, 0)',
+                (run_id, self.timestamp)
+            )
+            # Queries are numbered in order of first response; a resumed run continues the count
+            self._next_position = conn.execute(
+                'SELECT COUNT(*) FROM queries WHERE run_id = ?', (run_id,)
+            ).fetchone()[0]
+
+    def append(self, result: Dict):
+        """Commit a single API response, replacing any earlier record of the same (query_id, api_name)."""
+        with self.db._connect() as conn:
+            row = conn.execute(
+                'SELECT id FROM queries WHERE run_id = ? AND query = ?', (self.run_id, result['query'])
+            ).fetchone()
+            if row:
+                query_row_id = row['id']
+            else:
+                query_row_id = conn.execute(
+                    'INSERT INTO queries (run_id, position, query) VALUES (?, ?, ?)',
+                    (self.run_id, self._next_position, result['query'])
+                ).lastrowid
+                self._next_position += 1
+
+            self.db._insert_response(conn, self.run_id, query_row_id, result)
+        self.total_responses += 1
+
+    def close(self):
+        """Update the run's totals."""
+        with self.db._connect() as conn:
+            conn.execute(
+                'UPDATE runs SET '
+                'total_queries = (SELECT COUNT(*) FROM queries WHERE run_id = ?), '
+                'total_responses = (SELECT COUNT(*) FROM responses WHERE run_id = ?) '
+                'WHERE run_id = ?',
+                (self.run_id, self.run_id, self.run_id)
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def get_results_database():
+    """Create the results store selected by the RESULTS_BACKEND env var ('json' or 'sqlite')."""
+    if os.getenv('RESULTS_BACKEND', 'json').lower() == 'sqlite':
+        return SQLiteResultsDatabase()
+    return ResultsDatabase()
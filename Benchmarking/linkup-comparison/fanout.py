@@ -0,0 +1,175 @@
+"""Concurrent fan-out of (query, API) pairs across providers."""
+import asyncio
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterator, Tuple
+
+# Global cap on in-flight provider calls, and per-provider cap so a single
+# slow API cannot hold every slot.
+MAX_CONCURRENCY = int(os.getenv('FANOUT_MAX_CONCURRENCY', '32'))
+PER_PROVIDER_CONCURRENCY = int(os.getenv('FANOUT_PER_PROVIDER_CONCURRENCY', '8'))
+
+
+def failed_response(query: str, api_name: str, error: str) -> Dict[str, Any]:
+    """Build a response record for a call that never produced one."""
+    return {
+        'query': query,
+        'api_name': api_name,
+        'success': False,
+        'error': error,
+        'response_data': None,
+        'response_time': 0
+    }
+
+
+class FanOutEngine:
+    """Runs every (query, API) pair concurrently on top of a QueryExecutor."""
+
+    def __init__(self, executor, max_concurrency: int = None,
+                 per_provider_concurrency: int = None):
+        self.executor = executor
+        self.max_concurrency = max_concurrency or MAX_CONCURRENCY
+        self.per_provider_concurrency = per_provider_concurrency or PER_PROVIDER_CONCURRENCY
+
+    async def execute_pair(self, query: str, api_name: str, global_limit: asyncio.Semaphore,
+                           provider_limits: Dict[str, asyncio.Semaphore],
+                           pool: ThreadPoolExecutor) -> Dict[str, Any]:
+        """Execute one query against one API, honouring both concurrency caps."""
+        loop = asyncio.get_running_loop()
+        async with provider_limits[api_name]:
+            async with global_limit:
+                try:
+                    responses = await loop.run_in_executor(
+                        pool, self.executor.execute_single_query, query, [api_name]
+                    )
+                except Exception as e:
+                    return failed_response(query, api_name, str(e))
+
+        if not responses:
+            return failed_response(query, api_name, 'No response returned')
+        return responses[0]
+
+    async def compare(self, queries: List[str], apis: List[str]) -> List[Dict]:
+        """
+        Execute all queries across all APIs concurrently.
+
+        Args:
+            queries: Query strings, in display order
+            apis: API names to query
+
+        Returns:
+            List of {'query', 'responses'} dicts in the order queries were given,
+            with responses in the order apis were given
+        """
+        results_by_query = [{'query': query, 'responses': [None] * len(apis)} for query in queries]
+
+        async for query_index, api_index, response in self.stream(queries, apis):
+            results_by_query[query_index]['responses'][api_index] = response
+
+        return results_by_query
+
+    async def stream(self, queries: List[str], apis: List[str]):
+        """
+        Execute all queries across all APIs, yielding each response as it finishes.
+
+        Yields:
+            (query_index, api_index, response) tuples in completion order
+        """
+        pairs = [(query, api) for query in queries for api in apis]
+        async for index, response in self.stream_pairs(pairs):
+            yield index // len(apis), index % len(apis), response
+
+    async def stream_pairs(self, pairs: List[Tuple[str, str]]):
+        """
+        Execute an arbitrary list of (query, api_name) pairs concurrently.
+
+        Yields:
+            (pair_index, response) tuples in completion order
+        """
+        global_limit = asyncio.Semaphore(self.max_concurrency)
+        provider_limits = {api: asyncio.Semaphore(self.per_provider_concurrency) for _, api in pairs}
+
+        async def indexed(index, pool):
+            query, api_name = pairs[index]
+            response = await self.execute_pair(query, api_name, global_limit, provider_limits, pool)
+            return index, response
+
+        pool = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        tasks = [asyncio.ensure_future(indexed(index, pool)) for index in range(len(pairs))]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Stopped early (cancelled or closed): drop every call that has not started
+            for task in tasks:
+                task.cancel()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, queries: List[str], apis: List[str]) -> List[Dict]:
+        """Synchronous entry point for Flask views and scripts."""
+        return asyncio.run(self.compare(queries, apis))
+
+    def iter_completed(self, queries: List[str], apis: List[str]) -> Iterator[Tuple[int, int, Dict]]:
+        """
+        Synchronous generator over responses in completion order.
+
+        The event loop runs on a background thread so Flask can stream
+        each response to the client as soon as it is available.
+        """
+        return self._iterate(self.stream(queries, apis))
+
+    def iter_pairs(self, pairs: List[Tuple[str, str]]) -> Iterator[Tuple[int, Dict]]:
+        """Synchronous generator over (pair_index, response) in completion order."""
+        return self._iterate(self.stream_pairs(pairs))
+
+    @staticmethod
+    def _iterate(stream) -> Iterator:
+        """
+        Drive an async generator on a background event loop, yielding its items.
+
+        Closing the generator early, e.g. when an SSE client disconnects,
+        cancels the stream so calls that have not started are never made.
+        """
+        done = object()
+        items = queue.Queue()
+        stop = threading.Event()
+        running = {}
+
+        async def produce():
+            running['loop'], running['task'] = asyncio.get_running_loop(), asyncio.current_task()
+            try:
+                async for item in stream:
+                    if stop.is_set():
+                        break
+                    items.put((None, item))
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                items.put((e, None))
+            finally:
+                items.put(done)
+
+        thread = threading.Thread(target=asyncio.run, args=(produce(),), daemon=True)
+        thread.start()
+
+        finished = False
+        try:
+            while True:
+                entry = items.get()
+                if entry is done:
+                    finished = True
+                    break
+                error, item = entry
+                if error is not None:
+                    raise error
+                yield item
+        finally:
+            stop.set()
+            if not finished and 'task' in running:
+                try:
+                    running['loop'].call_soon_threadsafe(running['task'].cancel)
+                except RuntimeError:
+                    # The loop already finished
+                    pass
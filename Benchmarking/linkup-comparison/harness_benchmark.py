@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Harness throughput benchmark
+Measures the overhead the comparison harness itself adds on top of the
+providers, using the local mock provider server with zero latency, and
+flags regressions against a previous run
+"""
+
+import argparse
+import glob
+import itertools
+import json
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Dict, Any, Callable
+
+from werkzeug.serving import make_server
+
+from mock_providers import MockProviderProfile, MockQueryExecutor, create_app, load_provider_samples
+
+OUTPUT_DIR = "benchmark_runs"
+REGRESSION_THRESHOLD = 10.0  # percent
+BENCH_APIS = ['linkup_standard', 'linkup_deep', 'perplexity', 'exa', 'you', 'tavily', 'valyu']
+
+# Direction in which each metric gets worse
+LOWER_IS_BETTER = ('p50_ms', 'p95_ms', 'p99_ms', 'peak_memory_mb', 'cpu_ms_per_op')
+HIGHER_IS_BETTER = ('ops_per_sec',)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def measure(operation: Callable[[int], Any], iterations: int, units_per_op: int = 1) -> Dict[str, Any]:
+    """
+    Time an operation, then re-run it under tracemalloc for peak memory.
+
+    Args:
+        operation: Callable(iteration) performing one unit of work
+        iterations: Number of timed calls
+        units_per_op: Responses produced per call, for per-response CPU
+
+    Returns:
+        Metrics dictionary
+    """
+    latencies = []
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for i in range(iterations):
+        start = time.perf_counter()
+        operation(i)
+        latencies.append(time.perf_counter() - start)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    # Separate pass so tracing overhead does not skew the timings
+    tracemalloc.start()
+    for i in range(min(iterations, 5)):
+        operation(i)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'iterations': iterations,
+        'ops_per_sec': round(iterations / wall, 2) if wall else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 3),
+        'peak_memory_mb': round(peak / 1024 / 1024, 3),
+        'cpu_ms_per_op': round(cpu / (iterations * units_per_op) * 1000, 3)
+    }
+
+
+class MockServer:
+    """Runs the mock provider server on a background thread."""
+
+    def __init__(self, port: int = 0, **profile_options):
+        profile = MockProviderProfile(latency_scale=0.0, timeout_rate=0.0, **profile_options)
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        self.server = make_server('127.0.0.1', port, create_app(profile), threaded=True)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.server.shutdown()
+
+
+def synthetic_results(count: int) -> List[Dict[str, Any]]:
+    """Build executor-format responses shaped like real ones."""
+    samples = load_provider_samples()
+    results = []
+    for i in range(count):
+        api_name = BENCH_APIS[i % len(BENCH_APIS)]
+        sample = (samples.get(api_name) or [{'source_count': 10, 'word_count': 200}])[0]
+        results.append({
+            'query': f"benchmark query {i // len(BENCH_APIS)}",
+            'api_name': api_name,
+            'success': True,
+            'error': None,
+            'response_data': {
+                'answer': " ".join(['word'] * sample['word_count']),
+                'sources': [{'url': f"https://example.com/{j}"} for j in range(sample['source_count'])]
+            },
+            'response_time': 1.0,
+            'timestamp': time.time()
+        })
+    return results
+
+
+def bench_execute_single_query(server_url: str, iterations: int) -> Dict[str, Any]:
+    executor = MockQueryExecutor(server_url, apis=BENCH_APIS)
+    return measure(
+        lambda i: executor.execute_single_query(f"benchmark query {i}", BENCH_APIS),
+        iterations, units_per_op=len(BENCH_APIS)
+    )
+
+
+def bench_executor_stack(server_url: str, iterations: int) -> Dict[str, Any]:
+    """The executor as the app builds it: hedging over rate limiting over the provider client."""
+    from hedging import HedgedExecutor, LatencyBudgets
+    from rate_limiter import AdaptiveRateLimiter, RateLimitedExecutor
+
+    limiter = AdaptiveRateLimiter({api: 1e6 for api in BENCH_APIS})
+    executor = HedgedExecutor(RateLimitedExecutor(MockQueryExecutor(server_url, apis=BENCH_APIS), limiter),
+                              LatencyBudgets(seeds={}, overrides={}))
+    return measure(
+        lambda i: executor.execute_single_query(f"benchmark query {i}", BENCH_APIS),
+        iterations, units_per_op=len(BENCH_APIS)
+    )
+
+
+def bench_execute_from_database(server_url: str, iterations: int) -> Dict[str, Any]:
+    """A full checkpointed run over queries.json, the equivalent of execute_from_database."""
+    from database import QueryDatabase, ResultsDatabase
+    from runner import CheckpointedRunner
+
+    query_db = QueryDatabase()
+    executor = MockQueryExecutor(server_url, apis=BENCH_APIS)
+    units = len(query_db.get_all_queries()) * len(BENCH_APIS)
+
+    with tempfile.TemporaryDirectory(prefix='harness_bench_') as results_dir:
+        runner = CheckpointedRunner(executor, query_db, ResultsDatabase(results_dir, file_format='jsonl'))
+        # measure() repeats iterations for its memory pass; existing run IDs are refused
+        run_ids = itertools.count()
+        return measure(lambda i: runner.run(api_names=BENCH_APIS, run_id=f"bench_{next(run_ids)}"),
+                       iterations, units_per_op=units)
+
+
+def bench_results_database(iterations: int, responses: int, file_format: str) -> Dict[str, Dict[str, Any]]:
+    from database import ResultsDatabase
+
+    results = synthetic_results(responses)
+    with tempfile.TemporaryDirectory(prefix='harness_bench_') as results_dir:
+        results_db = ResultsDatabase(results_dir, file_format=file_format)
+        return {
+            f'save_results_{file_format}': measure(
+                lambda i: results_db.save_results(results, run_id=f"bench_{i}"),
+                iterations, units_per_op=responses
+            ),
+            f'load_results_{file_format}': measure(
+                lambda i: results_db.load_results(f"bench_{i % iterations}"),
+                iterations, units_per_op=responses
+            )
+        }
+
+
+@contextmanager
+def isolated_results_dir(results_dir: str):
+    """Point Config.RESULTS_DIR (and the serverless /tmp/data switch) at results_dir while active."""
+    from config import Config
+
+    saved_dir, saved_vercel = Config.RESULTS_DIR, os.environ.pop('VERCEL', None)
+    Config.RESULTS_DIR = results_dir
+    try:
+        yield
+    finally:
+        Config.RESULTS_DIR = saved_dir
+        if saved_vercel is not None:
+            os.environ['VERCEL'] = saved_vercel
+
+
+def bench_compare_endpoint(server_url: str, iterations: int) -> Dict[str, Any]:
+    """POST /api/compare through the Flask test client, with the response cache off."""
+    os.environ['MOCK_PROVIDERS_URL'] = server_url
+    import mock_providers
+    mock_providers.MOCK_PROVIDERS_URL = server_url
+
+    with tempfile.TemporaryDirectory(prefix='harness_bench_') as results_dir, isolated_results_dir(results_dir):
+        # Importing app creates its results store, response cache and jobs directory
+        import app as app_module
+
+        # Benchmark the harness, not the per-provider rate limits
+        app_module.rate_limiter.base_rates.update({api: 1e6 for api in BENCH_APIS})
+        client = app_module.app.test_client()
+
+        def post(i):
+            response = client.post('/api/compare', json={
+                'apis': BENCH_APIS, 'queries': [f"benchmark query {i}"], 'use_cache': False
+            })
+            if response.status_code != 200:
+                raise RuntimeError(f"/api/compare returned {response.status_code}")
+
+        return measure(post, iterations, units_per_op=len(BENCH_APIS))
+
+
+def run_suite(iterations: int = 50, responses: int = 1000) -> Dict[str, Any]:
+    """Run every benchmark and return the results document."""
+    results = {}
+    with MockServer() as server:
+        benches = [
+            ('execute_single_query', lambda: bench_execute_single_query(server.url, iterations)),
+            ('executor_stack', lambda: bench_executor_stack(server.url, iterations)),
+            ('execute_from_database', lambda: bench_execute_from_database(server.url, max(1, iterations // 10))),
+            ('compare_endpoint', lambda: bench_compare_endpoint(server.url, iterations)),
+        ]
+        for name, bench in benches:
+            print(f"  Running {name}...")
+            try:
+                results[name] = bench()
+            except Exception as e:
+                print(f"    skipped: {e}")
+                results[name] = {'skipped': str(e)}
+
+    for file_format in ('json', 'jsonl'):
+        print(f"  Running results database ({file_format})...")
+        results.update(bench_results_database(max(1, iterations // 5), responses, file_format))
+
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'iterations': iterations,
+        'responses': responses,
+        'benchmarks': results
+    }
+
+
+def compare_runs(current: Dict[str, Any], baseline: Dict[str, Any],
+                 threshold: float = REGRESSION_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Compare two results documents.
+
+    Returns:
+        One entry per metric that got worse by more than threshold percent
+    """
+    regressions = []
+    for name, metrics in current['benchmarks'].items():
+        previous = baseline.get('benchmarks', {}).get(name)
+        if not previous or 'skipped' in metrics or 'skipped' in previous:
+            continue
+
+        for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            before, after = previous.get(metric), metrics.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before * 100
+            worse = change if metric in LOWER_IS_BETTER else -change
+            if worse > threshold:
+                regressions.append({
+                    'benchmark': name,
+                    'metric': metric,
+                    'baseline': before,
+                    'current': after,
+                    'change_pct': round(change, 2)
+                })
+    return regressions
+
+
+def latest_run(output_dir: str = OUTPUT_DIR) -> str:
+    runs = sorted(glob.glob(os.path.join(output_dir, 'harness_*.json')))
+    return runs[-1] if runs else None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the harness overhead against the local mock provider server'
+    )
+    parser.add_argument('--iterations', type=int, default=50, help='Timed calls per benchmark (default: 50)')
+    parser.add_argument('--responses', type=int, default=1000,
+                        help='Responses per run for the results database benchmarks (default: 1000)')
+    parser.add_argument('--output-dir', default=OUTPUT_DIR, help=f'Where results are stored (default: {OUTPUT_DIR})')
+    parser.add_argument('--baseline', default=None, help='Results file to compare against (default: latest run)')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help=f'Percent change flagged as a regression (default: {REGRESSION_THRESHOLD})')
+
+    args = parser.parse_args()
+    os.makedirs(args.output_dir, exist_ok=True)
+    baseline_path = args.baseline or latest_run(args.output_dir)
+
+    print("Running harness benchmarks...\n")
+    current = run_suite(args.iterations, args.responses)
+
+    output_path = os.path.join(args.output_dir, f"harness_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output_path, 'w') as f:
+        json.dump(current, f, indent=2)
+
+    print(f"\n{'Benchmark':<28} {'ops/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'peak MB':>10} {'CPU ms':>10}")
+    print("-" * 92)
+    for name, m in current['benchmarks'].items():
+        if 'skipped' in m:
+            print(f"{name:<28} skipped")
+            continue
+        print(f"{name:<28} {m['ops_per_sec']:>10} {m['p50_ms']:>10} {m['p95_ms']:>10} "
+              f"{m['p99_ms']:>10} {m['peak_memory_mb']:>10} {m['cpu_ms_per_op']:>10}")
+    print(f"\n  ✓ {output_path}")
+
+    if not baseline_path:
+        print("\nNo baseline run to compare against")
+        return
+
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)
+    regressions = compare_runs(current, baseline, args.threshold)
+
+    print(f"\nCompared with {baseline_path}:")
+    if not regressions:
+        print(f"  No regressions over {args.threshold}%")
+        return
+    for r in regressions:
+        print(f"  ⚠️  {r['benchmark']}.{r['metric']}: {r['baseline']} → {r['current']} ({r['change_pct']:+.1f}%)")
+    raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
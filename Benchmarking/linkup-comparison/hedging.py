@@ -0,0 +1,308 @@
+"""Per-provider latency budgets: hedged duplicate requests and progressive timeouts."""
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Any
+
+from fanout import failed_response
+
+INSIGHTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'analysis_output', 'insights_summary.json')
+
+DEFAULT_P95 = 20.0
+# Attempt n is allowed TIMEOUT_MULTIPLIERS[n] x p95 before it is abandoned
+TIMEOUT_MULTIPLIERS = (1.5, 2.5, 4.0)
+MIN_HEDGE_DELAY = 0.5
+# Observed latencies replace the seeded p95 once this many samples exist
+MIN_SAMPLES = 20
+SAMPLE_WINDOW = 200
+HEDGE_POOL_SIZE = int(os.getenv('HEDGE_POOL_SIZE', '64'))
+# Calls per provider running at once, counting abandoned ones still finishing
+MAX_OUTSTANDING_PER_API = int(os.getenv('HEDGE_MAX_OUTSTANDING', '16'))
+# Extra wait past a call's own timeout before it is abandoned, so the provider's timeout error arrives first
+TIMEOUT_GRACE = 1.0
+
+# Per-API overrides as JSON, e.g. {"linkup_deep": {"hedge_after": null, "timeouts": [40, 80]}}
+LATENCY_BUDGETS = json.loads(os.getenv('LATENCY_BUDGETS', '{}'))
+
+TIMEOUT_PATTERN = re.compile(r'timed out|timeout', re.IGNORECASE)
+
+
+def load_latency_seeds(path: str = INSIGHTS_PATH) -> Dict[str, float]:
+    """
+    Read each API's p95 response time from analyze_benchmark_results.py output.
+
+    Returns:
+        {api_name: p95 seconds}, empty if the insights file is missing
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        rankings = json.load(f).get('performance_rankings', {})
+    return {
+        api: metrics['p95_response_time']
+        for api, metrics in rankings.items()
+        if metrics.get('p95_response_time')
+    }
+
+
+def is_timeout(response: Dict[str, Any]) -> bool:
+    """Check whether a failed response was a timeout rather than a hard error."""
+    return not response.get('success') and bool(TIMEOUT_PATTERN.search(str(response.get('error') or '')))
+
+
+class LatencyBudgets:
+    """
+    Tracks each provider's p95 latency and derives its hedge delay and
+    escalating per-attempt timeouts from it.
+
+    Seeds come from the last benchmark analysis and are replaced by a
+    rolling window of observed successful response times.
+    """
+
+    def __init__(self, seeds: Dict[str, float] = None, overrides: Dict[str, Dict[str, Any]] = None):
+        self.seeds = load_latency_seeds() if seeds is None else seeds
+        self.overrides = LATENCY_BUDGETS if overrides is None else overrides
+        self.samples = {}
+        self._lock = threading.Lock()
+
+    def observe(self, api_name: str, response_time: float):
+        """Record a successful call's latency."""
+        with self._lock:
+            self.samples.setdefault(api_name, deque(maxlen=SAMPLE_WINDOW)).append(response_time)
+
+    def p95(self, api_name: str) -> float:
+        """Current p95 estimate for a provider."""
+        with self._lock:
+            samples = sorted(self.samples.get(api_name, ()))
+        if len(samples) >= MIN_SAMPLES:
+            return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        return self.seeds.get(api_name, DEFAULT_P95)
+
+    def policy(self, api_name: str) -> Dict[str, Any]:
+        """
+        Get a provider's latency policy.
+
+        Returns:
+            {'hedge_after': seconds or None to disable hedging,
+             'timeouts': per-attempt timeouts, one attempt each}
+        """
+        p95 = self.p95(api_name)
+        policy = {
+            'hedge_after': max(MIN_HEDGE_DELAY, p95),
+            'timeouts': [round(p95 * multiplier, 2) for multiplier in TIMEOUT_MULTIPLIERS]
+        }
+        policy.update(self.overrides.get(api_name, {}))
+
+        timeouts = policy['timeouts']
+        if not isinstance(timeouts, (list, tuple)) or not timeouts or \
+                not all(isinstance(t, (int, float)) and t > 0 for t in timeouts):
+            raise ValueError(f"LATENCY_BUDGETS timeouts for {api_name} must be a non-empty list of "
+                             f"positive seconds, got {timeouts!r}")
+        hedge_after = policy['hedge_after']
+        if hedge_after is not None and (not isinstance(hedge_after, (int, float)) or hedge_after <= 0):
+            raise ValueError(f"LATENCY_BUDGETS hedge_after for {api_name} must be positive seconds or null, "
+                             f"got {hedge_after!r}")
+        return policy
+
+
+class _Call:
+    """A provider call handed to the pool; its clock starts when a worker picks it up, not when it is queued."""
+
+    def __init__(self, pool: ThreadPoolExecutor, fn, release, hedge: bool = False):
+        self.submitted = time.monotonic()
+        self.started = None
+        self.hedge = hedge
+        self.future = pool.submit(self._run, fn)
+        self.future.add_done_callback(lambda _: release())
+
+    def _run(self, fn):
+        self.started = time.monotonic()
+        return fn()
+
+
+class HedgedExecutor:
+    """
+    Wraps a QueryExecutor with per-provider latency budgets.
+
+    A call still running after the provider's p95 gets one duplicate
+    request and whichever succeeds first is used. A call that times out is
+    retried as a new request with the next, larger budget as its timeout
+    (executors with per_call_timeout) instead of being recorded as a
+    failure. Budgets are never shorter than the executor's own timeout, so
+    hedging does not turn calls that would succeed into timeouts.
+
+    Abandoned calls cannot be cancelled and finish in the background; they
+    count against both MAX_OUTSTANDING_PER_API and the pool size, so a new
+    call always gets a worker rather than queueing behind them.
+    """
+
+    def __init__(self, executor, budgets: LatencyBudgets = None, pool_size: int = None,
+                 max_outstanding: int = None):
+        self.executor = executor
+        self.budgets = budgets or LatencyBudgets()
+        self.pool_size = pool_size or HEDGE_POOL_SIZE
+        self.pool = ThreadPoolExecutor(max_workers=self.pool_size)
+        self.pool_slots = threading.BoundedSemaphore(self.pool_size)
+        self.max_outstanding = max_outstanding or MAX_OUTSTANDING_PER_API
+        self.slots = {}
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.executor, name)
+
+    def _count(self, api_name: str, stat: str):
+        with self._lock:
+            counts = self.stats.setdefault(api_name, {'hedges': 0, 'hedge_wins': 0, 'retries': 0, 'recovered': 0})
+            counts[stat] += 1
+
+    def _per_call_timeout(self) -> bool:
+        """Whether the wrapped executor takes a timeout per call."""
+        return bool(getattr(self.executor, 'per_call_timeout', False))
+
+    def attempt_timeouts(self, timeouts: List[float]) -> List[float]:
+        """
+        Clamp a policy's timeouts to at least the executor's own timeout,
+        dropping any that would not lengthen the previous attempt's.
+        """
+        floor = getattr(self.executor, 'timeout', None) or 0
+        clamped = []
+        for timeout in timeouts:
+            timeout = max(timeout, floor)
+            if not clamped or timeout > clamped[-1]:
+                clamped.append(timeout)
+        return clamped
+
+    def _call(self, query: str, api_name: str, timeout: float) -> Dict[str, Any]:
+        options = {'timeout': timeout} if self._per_call_timeout() else {}
+        try:
+            responses = self.executor.execute_single_query(query, [api_name], **options)
+        except Exception as e:
+            return failed_response(query, api_name, str(e))
+        return responses[0] if responses else failed_response(query, api_name, 'No response returned')
+
+    def _submit(self, query: str, api_name: str, timeout: float, wait_for_slot: float = None,
+                hedge: bool = False) -> _Call:
+        """
+        Start a call once the provider and the pool both have a free slot.
+
+        Args:
+            timeout: The call's own timeout
+            wait_for_slot: Seconds to wait for a slot; None fails at once
+
+        Returns:
+            The call, or None if no slot freed up in time
+        """
+        with self._lock:
+            slots = self.slots.setdefault(api_name, threading.BoundedSemaphore(self.max_outstanding))
+        deadline = time.monotonic() + (wait_for_slot or 0)
+        if not slots.acquire(wait_for_slot is not None, wait_for_slot):
+            return None
+        remaining = max(0.0, deadline - time.monotonic())
+        if not self.pool_slots.acquire(wait_for_slot is not None, remaining if wait_for_slot is not None else None):
+            slots.release()
+            return None
+
+        def release():
+            self.pool_slots.release()
+            slots.release()
+
+        return _Call(self.pool, lambda: self._call(query, api_name, timeout), release, hedge)
+
+    def _attempt(self, query: str, api_name: str, timeout: float, hedge_after: float = None) -> Dict[str, Any]:
+        """
+        Make one call with the given timeout, hedging after hedge_after
+        seconds; the first success wins.
+
+        A call is abandoned TIMEOUT_GRACE seconds after its own timeout, or
+        after timeout seconds if it never leaves the pool's queue.
+        """
+        primary = self._submit(query, api_name, timeout, wait_for_slot=timeout)
+        if primary is None:
+            return failed_response(query, api_name, f'No free call slot for {api_name} ({self.max_outstanding} per '
+                                                    f'provider, {self.pool_size} in total still outstanding)')
+        calls = [primary]
+        last = None
+        hedged = False
+
+        while calls:
+            now = time.monotonic()
+            call = calls[0]
+            if call.started is None:
+                deadline = call.submitted + timeout
+            else:
+                deadline = call.started + timeout + TIMEOUT_GRACE
+            if now >= deadline:
+                break
+
+            wake = deadline
+            if not hedged and hedge_after is not None and hedge_after < timeout and call.started is not None:
+                if now >= call.started + hedge_after:
+                    hedged = True
+                    hedge = self._submit(query, api_name, timeout, hedge=True)
+                    if hedge is not None:
+                        calls.append(hedge)
+                        self._count(api_name, 'hedges')
+                    continue
+                wake = min(wake, call.started + hedge_after)
+
+            done, _ = wait([call.future for call in calls], timeout=max(0.0, wake - now),
+                           return_when=FIRST_COMPLETED)
+            for call in [call for call in calls if call.future in done]:
+                calls.remove(call)
+                response = call.future.result()
+                if response.get('success'):
+                    if call.hedge:
+                        self._count(api_name, 'hedge_wins')
+                    return response
+                last = response
+
+        for call in calls:
+            # Drops calls still queued; running ones finish in the background
+            call.future.cancel()
+        if calls or last is None:
+            return failed_response(query, api_name, f'Request timed out after {timeout:.1f}s')
+        return last
+
+    def execute_api(self, query: str, api_name: str) -> Dict[str, Any]:
+        """Execute a query against one API within its latency budget."""
+        policy = self.budgets.policy(api_name)
+        timeouts = self.attempt_timeouts(policy['timeouts'])
+        start = time.monotonic()
+
+        for attempt, timeout in enumerate(timeouts, 1):
+            # Only the first attempt hedges; retries already have a larger budget
+            response = self._attempt(query, api_name, timeout, policy['hedge_after'] if attempt == 1 else None)
+            if not is_timeout(response):
+                break
+            if attempt < len(timeouts):
+                self._count(api_name, 'retries')
+
+        if response.get('success'):
+            self.budgets.observe(api_name, response.get('response_time') or time.monotonic() - start)
+            if attempt > 1:
+                self._count(api_name, 'recovered')
+
+        return dict(response, attempts=attempt, wall_time=round(time.monotonic() - start, 3))
+
+    def execute_single_query(self, query: str, apis: List[str]) -> List[Dict]:
+        """Execute a query across APIs, each within its own latency budget."""
+        if len(apis) == 1:
+            return [self.execute_api(query, apis[0])]
+        with ThreadPoolExecutor(max_workers=len(apis)) as pool:
+            return list(pool.map(lambda api_name: self.execute_api(query, api_name), apis))
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Current policy plus hedge/retry counters per provider."""
+        with self._lock:
+            stats = {api_name: dict(counts) for api_name, counts in self.stats.items()}
+        for api_name in set(stats) | set(self.budgets.seeds):
+            stats.setdefault(api_name, {'hedges': 0, 'hedge_wins': 0, 'retries': 0, 'recovered': 0})
+            policy = self.budgets.policy(api_name)
+            stats[api_name].update(policy, timeouts=self.attempt_timeouts(policy['timeouts']),
+                                   p95=round(self.budgets.p95(api_name), 3))
+        return stats
@@ -0,0 +1,503 @@
+"""Mergeable per-API aggregates so benchmark analysis only processes newly appended rows."""
+import hashlib
+import io
+import json
+import math
+import os
+from collections import Counter
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from analyze_benchmark_results import (
+    APIS, COMPLEXITY_BINS, COMPLEXITY_LABELS, OUTPUT_DIR, BenchmarkAnalyzer, categorize_query, melt_results
+)
+from columnar_cache import add_answer_lengths, TEXT_SUFFIXES
+
+STATE_PATH = os.path.join(OUTPUT_DIR, 'aggregates.json')
+STATE_VERSION = 1
+# Sketches keep exact values up to this many, then switch to log buckets
+MAX_EXACT_VALUES = 4096
+RELATIVE_ACCURACY = 0.005
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch.
+
+    Exact (matching pandas' linear interpolation) until it holds more than
+    MAX_EXACT_VALUES values, then log-spaced buckets in the style of
+    DDSketch, so any quantile is within RELATIVE_ACCURACY of the true value.
+    """
+
+    def __init__(self, relative_accuracy: float = RELATIVE_ACCURACY):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.values = []
+        self.buckets = None  # bucket index -> count once no longer exact
+        self.zero_count = 0
+
+    @property
+    def count(self) -> int:
+        if self.buckets is None:
+            return len(self.values)
+        return self.zero_count + sum(self.buckets.values())
+
+    def _bucketize(self, values: np.ndarray):
+        positive = values[values > 0]
+        self.zero_count += int(len(values) - len(positive))
+        indexes = np.ceil(np.log(positive) / math.log(self.gamma)).astype(int)
+        for index, count in zip(*np.unique(indexes, return_counts=True)):
+            self.buckets[int(index)] = self.buckets.get(int(index), 0) + int(count)
+
+    def add(self, values):
+        """Add an array of non-NaN values."""
+        values = np.asarray(values, dtype=float)
+        if self.buckets is None and len(self.values) + len(values) <= MAX_EXACT_VALUES:
+            self.values.extend(values.tolist())
+            return
+        if self.buckets is None:
+            self.buckets = {}
+            values = np.concatenate([np.asarray(self.values, dtype=float), values])
+            self.values = []
+        self._bucketize(values)
+
+    def merge(self, other: 'QuantileSketch'):
+        """Fold another sketch into this one."""
+        if other.buckets is None:
+            self.add(other.values)
+            return
+        if self.buckets is None:
+            self.buckets = {}
+            self._bucketize(np.asarray(self.values, dtype=float))
+            self.values = []
+        self.zero_count += other.zero_count
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+
+    def quantile(self, q: float) -> float:
+        """Estimate the q-quantile (0 <= q <= 1); NaN when empty."""
+        if self.count == 0:
+            return float('nan')
+        if self.buckets is None:
+            return float(np.quantile(self.values, q))
+
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                # Bucket midpoint in relative terms
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self.buckets is None:
+            return {'values': self.values}
+        return {'buckets': {str(k): v for k, v in self.buckets.items()}, 'zero_count': self.zero_count}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'QuantileSketch':
+        sketch = cls()
+        if 'buckets' in data:
+            sketch.buckets = {int(k): v for k, v in data['buckets'].items()}
+            sketch.zero_count = data['zero_count']
+        else:
+            sketch.values = list(data['values'])
+        return sketch
+
+
+def merge_co_moments(a: Dict[str, float], b: Dict[str, float]) -> Dict[str, float]:
+    """
+    Combine (n, mean, second moment, co-moment) summaries of two samples.
+
+    Uses the pairwise update of Chan et al., so correlations stay stable
+    however many batches are folded in.
+    """
+    if not a['n']:
+        return dict(b)
+    if not b['n']:
+        return dict(a)
+
+    n = a['n'] + b['n']
+    dx = b['mean_x'] - a['mean_x']
+    dy = b['mean_y'] - a['mean_y']
+    weight = a['n'] * b['n'] / n
+    return {
+        'n': n,
+        'mean_x': a['mean_x'] + dx * b['n'] / n,
+        'mean_y': a['mean_y'] + dy * b['n'] / n,
+        'm2_x': a['m2_x'] + b['m2_x'] + dx * dx * weight,
+        'm2_y': a['m2_y'] + b['m2_y'] + dy * dy * weight,
+        'c_xy': a['c_xy'] + b['c_xy'] + dx * dy * weight
+    }
+
+
+def co_moments(x: np.ndarray, y: np.ndarray) -> Dict[str, float]:
+    """Summarize one sample of (x, y) pairs."""
+    if len(x) == 0:
+        return {'n': 0, 'mean_x': 0.0, 'mean_y': 0.0, 'm2_x': 0.0, 'm2_y': 0.0, 'c_xy': 0.0}
+    dx = x - x.mean()
+    dy = y - y.mean()
+    return {
+        'n': int(len(x)),
+        'mean_x': float(x.mean()),
+        'mean_y': float(y.mean()),
+        'm2_x': float((dx * dx).sum()),
+        'm2_y': float((dy * dy).sum()),
+        'c_xy': float((dx * dy).sum())
+    }
+
+
+def histogram_median(histogram: Dict[float, int]) -> float:
+    """Median of a value -> count histogram, averaging the middle pair like pandas."""
+    total = sum(histogram.values())
+    ordered = sorted(histogram.items())
+
+    def value_at(rank):
+        seen = 0
+        for value, count in ordered:
+            seen += count
+            if rank < seen:
+                return value
+
+    if total % 2:
+        return value_at(total // 2)
+    return (value_at(total // 2 - 1) + value_at(total // 2)) / 2
+
+
+def empty_api_aggregate() -> Dict[str, Any]:
+    return {
+        'successes': 0, 'failures': 0, 'timeouts': 0, 'failure_timeouts': 0,
+        'ok_count': 0, 'ok_time_count': 0, 'ok_time_sum': 0.0,
+        'ok_answer_length_sum': 0.0, 'ok_sources_sum': 0.0,
+        'time_sketch': QuantileSketch(), 'sources_histogram': Counter(),
+        'co_moments': co_moments(np.array([]), np.array([]))
+    }
+
+
+class AnalysisAggregates:
+    """
+    Running per-API, per-category and per-complexity aggregates.
+
+    Everything is a count, a sum, a mergeable co-moment summary, a source
+    count histogram or a quantile sketch, so a new batch of rows folds in
+    without revisiting earlier ones.
+    """
+
+    def __init__(self, apis: List[str] = None):
+        self.apis = apis or APIS
+        self.total_queries = 0
+        self.api = {api: empty_api_aggregate() for api in self.apis}
+        self.categories = {}
+        self.complexity = {
+            label: {'count': 0, 'successes': {api: 0 for api in self.apis},
+                    'time_sum': {api: 0.0 for api in self.apis}, 'time_count': {api: 0 for api in self.apis}}
+            for label in COMPLEXITY_LABELS
+        }
+        self.source = {'offset': 0, 'sha256': hashlib.sha256().hexdigest()}
+        self.batches = []
+
+    def fold(self, df: pd.DataFrame):
+        """Add a batch of rows in the master CSV layout."""
+        if len(df) == 0:
+            return
+
+        long_df = melt_results(df, self.apis)
+        ok = long_df[long_df['succeeded']]
+        by_api = long_df.groupby('api', observed=False)
+        counts = pd.DataFrame({
+            'successes': by_api['succeeded'].sum(),
+            'failures': by_api['failed'].sum(),
+            'timeouts': by_api['timed_out'].sum(),
+            'failure_timeouts': long_df.assign(
+                failed_timeout=long_df['failed'] & long_df['timed_out']
+            ).groupby('api', observed=False)['failed_timeout'].sum()
+        })
+
+        for api, group in ok.groupby('api', observed=False):
+            agg = self.api[api]
+            row = counts.loc[api]
+            for name in ('successes', 'failures', 'timeouts', 'failure_timeouts'):
+                agg[name] += int(row[name])
+
+            times = group['response_time'].to_numpy(dtype=float)
+            times = times[~np.isnan(times)]
+            agg['ok_count'] += len(group)
+            agg['ok_time_count'] += len(times)
+            agg['ok_time_sum'] += float(times.sum())
+            agg['ok_answer_length_sum'] += float(group['answer_length'].sum())
+            agg['ok_sources_sum'] += float(group['num_sources'].sum())
+            agg['time_sketch'].add(times)
+            agg['sources_histogram'].update(
+                {float(value): int(count) for value, count in group['num_sources'].value_counts().items()}
+            )
+            agg['co_moments'] = merge_co_moments(agg['co_moments'], co_moments(
+                group['num_sources'].to_numpy(dtype=float), group['answer_length'].to_numpy(dtype=float)
+            ))
+
+        # Categories, in order of first appearance like Series.unique()
+        categories = df['query'].apply(categorize_query).to_numpy()
+        category_successes = long_df.assign(category=categories[long_df['row']]).groupby(
+            ['category', 'api'], observed=False)['succeeded'].sum()
+        for category, size in pd.Series(categories).value_counts(sort=False).items():
+            entry = self.categories.setdefault(category, {'count': 0, 'successes': {api: 0 for api in self.apis}})
+            entry['count'] += int(size)
+            for api in self.apis:
+                entry['successes'][api] += int(category_successes.get((category, api), 0))
+
+        buckets = pd.cut(df['query_length'], bins=COMPLEXITY_BINS, labels=COMPLEXITY_LABELS).to_numpy()
+        bucketed = long_df.assign(query_complexity=buckets[long_df['row']])
+        bucket_successes = bucketed.groupby(['query_complexity', 'api'], observed=True)['succeeded'].sum()
+        bucket_times = bucketed[bucketed['succeeded']].groupby(
+            ['query_complexity', 'api'], observed=True)['response_time'].agg(['sum', 'count'])
+        for label, size in pd.Series(buckets).value_counts().items():
+            entry = self.complexity[label]
+            entry['count'] += int(size)
+            for api in self.apis:
+                entry['successes'][api] += int(bucket_successes.get((label, api), 0))
+                if (label, api) in bucket_times.index:
+                    entry['time_sum'][api] += float(bucket_times.loc[(label, api), 'sum'])
+                    entry['time_count'][api] += int(bucket_times.loc[(label, api), 'count'])
+
+        self.total_queries += len(df)
+        self.batches.append({
+            'rows': len(df),
+            'first_query_num': int(df['query_num'].iloc[0]),
+            'last_query_num': int(df['query_num'].iloc[-1])
+        })
+
+    def save(self, path: str = STATE_PATH):
+        """Persist the aggregates as JSON."""
+        state = {
+            'version': STATE_VERSION,
+            'apis': self.apis,
+            'total_queries': self.total_queries,
+            'source': self.source,
+            'batches': self.batches,
+            'api': {
+                api: dict(
+                    agg,
+                    time_sketch=agg['time_sketch'].to_dict(),
+                    sources_histogram={repr(k): v for k, v in agg['sources_histogram'].items()}
+                )
+                for api, agg in self.api.items()
+            },
+            'categories': self.categories,
+            'complexity': self.complexity
+        }
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = STATE_PATH) -> 'AnalysisAggregates':
+        """Load persisted aggregates, or None if there are none (or they are from another version)."""
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            state = json.load(f)
+        if state.get('version') != STATE_VERSION:
+            return None
+
+        aggregates = cls(state['apis'])
+        aggregates.total_queries = state['total_queries']
+        aggregates.source = state['source']
+        aggregates.batches = state['batches']
+        aggregates.categories = state['categories']
+        aggregates.complexity = state['complexity']
+        for api, agg in state['api'].items():
+            agg['time_sketch'] = QuantileSketch.from_dict(agg['time_sketch'])
+            agg['sources_histogram'] = Counter({float(k): v for k, v in agg['sources_histogram'].items()})
+            aggregates.api[api] = agg
+        return aggregates
+
+
+def read_appended_rows(csv_path: str, aggregates: AnalysisAggregates) -> Tuple[pd.DataFrame, bool]:
+    """
+    Read only the rows appended to the CSV since the aggregates were built.
+
+    The bytes already folded in are re-hashed in the same streaming pass
+    that reads the new ones; if they changed (rows edited or re-sorted),
+    the whole file is returned and the caller must start over.
+
+    Returns:
+        (new rows, whether the aggregates are still valid)
+    """
+    offset = aggregates.source['offset']
+    digest = hashlib.sha256()
+
+    with open(csv_path, 'rb') as f:
+        header = f.readline()
+        f.seek(0)
+        remaining = offset
+        while remaining > 0:
+            chunk = f.read(min(remaining, 1 << 20))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+        valid = remaining == 0 and digest.hexdigest() == aggregates.source['sha256']
+
+        if not valid:
+            offset = 0
+            digest = hashlib.sha256()
+            f.seek(0)
+        tail = f.read()
+        digest.update(tail)
+
+    aggregates.source = {'offset': offset + len(tail), 'sha256': digest.hexdigest()}
+    if not tail.strip():
+        return pd.DataFrame(), valid
+
+    df = add_answer_lengths(pd.read_csv(io.BytesIO(header + tail if offset else tail)))
+    return df[[c for c in df.columns if not c.endswith(TEXT_SUFFIXES)]], valid
+
+
+class IncrementalAnalyzer(BenchmarkAnalyzer):
+    """
+    BenchmarkAnalyzer backed by persisted aggregates.
+
+    Each run folds in only the rows appended to the CSV since the last run
+    and regenerates every report from the aggregates. p95/p99 come from a
+    quantile sketch, exact until an API has more than MAX_EXACT_VALUES
+    successful responses.
+    """
+
+    def __init__(self, csv_path, state_path: str = STATE_PATH, rebuild: bool = False):
+        print(f"Loading data from {csv_path}...")
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        self.apis = APIS
+        self.insights = {}
+        self.state_path = state_path
+
+        aggregates = None if rebuild else AnalysisAggregates.load(state_path)
+        if aggregates is None or aggregates.apis != self.apis:
+            aggregates = AnalysisAggregates(self.apis)
+
+        new_rows, valid = read_appended_rows(csv_path, aggregates)
+        if not valid and aggregates.total_queries:
+            print("Previously analyzed rows changed; rebuilding aggregates from scratch")
+            source = aggregates.source
+            aggregates = AnalysisAggregates(self.apis)
+            aggregates.source = source
+
+        aggregates.fold(new_rows)
+        aggregates.save(state_path)
+
+        self.aggregates = aggregates
+        self.df = new_rows
+        self.total_queries = aggregates.total_queries
+
+        print(f"Folded in {len(new_rows)} new queries ({self.total_queries} total)")
+        print(f"Analyzing {len(self.apis)} APIs: {', '.join(self.apis)}")
+
+    def _compute_performance_rankings(self):
+        results = {}
+        for api in self.apis:
+            agg = self.aggregates.api[api]
+            has_successes = agg['ok_count'] > 0
+            avg_time = agg['ok_time_sum'] / agg['ok_time_count'] if agg['ok_time_count'] else float('nan')
+            sketch = agg['time_sketch']
+
+            results[api] = {
+                'total_queries': self.total_queries,
+                'successes': agg['successes'],
+                'success_rate': round((agg['successes'] / self.total_queries) * 100, 2),
+                'timeouts': agg['timeouts'],
+                'avg_response_time': round(avg_time, 2) if has_successes else None,
+                'median_response_time': round(sketch.quantile(0.5), 2) if has_successes else None,
+                'p95_response_time': round(sketch.quantile(0.95), 2) if has_successes else None,
+                'p99_response_time': round(sketch.quantile(0.99), 2) if has_successes else None,
+                'avg_answer_length': round(agg['ok_answer_length_sum'] / agg['ok_count'], 0) if has_successes else 0,
+                'avg_sources': round(agg['ok_sources_sum'] / agg['ok_count'], 1) if has_successes else 0
+            }
+        return results
+
+    def _compute_speed_vs_quality(self):
+        results = {}
+        for api in self.apis:
+            agg = self.aggregates.api[api]
+            if agg['ok_count'] > 0:
+                avg_time = agg['ok_time_sum'] / agg['ok_time_count'] if agg['ok_time_count'] else float('nan')
+                avg_answer_length = agg['ok_answer_length_sum'] / agg['ok_count']
+                avg_sources = agg['ok_sources_sum'] / agg['ok_count']
+
+                chars_per_second = avg_answer_length / avg_time if avg_time > 0 else 0
+                sources_per_second = avg_sources / avg_time if avg_time > 0 else 0
+
+                results[api] = {
+                    'avg_response_time': round(avg_time, 2),
+                    'avg_answer_length': round(avg_answer_length, 0),
+                    'avg_sources': round(avg_sources, 1),
+                    'chars_per_second': round(chars_per_second, 1),
+                    'sources_per_second': round(sources_per_second, 2)
+                }
+        return results
+
+    def _compute_by_category(self):
+        return {
+            category: {
+                api: {
+                    'query_count': entry['count'],
+                    'success_rate': round((entry['successes'][api] / entry['count']) * 100, 1)
+                }
+                for api in self.apis
+            }
+            for category, entry in self.aggregates.categories.items()
+        }
+
+    def _compute_failures(self):
+        results = {}
+        for api in self.apis:
+            agg = self.aggregates.api[api]
+            results[api] = {
+                'total_failures': agg['failures'],
+                'timeouts': agg['failure_timeouts'],
+                'other_errors': agg['failures'] - agg['failure_timeouts'],
+                'timeout_rate': round((agg['failure_timeouts'] / self.total_queries) * 100, 2) if self.total_queries > 0 else 0
+            }
+        return results
+
+    def _compute_sources(self):
+        results = {}
+        for api in self.apis:
+            agg = self.aggregates.api[api]
+            if agg['ok_count'] > 0:
+                histogram = agg['sources_histogram']
+                moments = agg['co_moments']
+                if agg['ok_count'] > 1:
+                    denominator = math.sqrt(moments['m2_x'] * moments['m2_y'])
+                    correlation = moments['c_xy'] / denominator if denominator else float('nan')
+                else:
+                    correlation = 0
+
+                results[api] = {
+                    'avg_sources': round(agg['ok_sources_sum'] / agg['ok_count'], 1),
+                    'median_sources': int(histogram_median(histogram)),
+                    'max_sources': int(max(histogram)),
+                    'min_sources': int(min(histogram)),
+                    'source_answer_correlation': round(correlation, 3)
+                }
+        return results
+
+    def _compute_query_complexity(self):
+        results = {}
+        for label in COMPLEXITY_LABELS:
+            entry = self.aggregates.complexity[label]
+            complex_results = {}
+
+            if entry['count'] > 0:
+                for api in self.apis:
+                    time_count = entry['time_count'][api]
+                    complex_results[api] = {
+                        'query_count': entry['count'],
+                        'success_rate': round((entry['successes'][api] / entry['count']) * 100, 1),
+                        'avg_response_time': round(entry['time_sum'][api] / time_count, 2) if time_count else None
+                    }
+
+            results[label] = complex_results
+        return results
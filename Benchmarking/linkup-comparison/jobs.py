@@ -0,0 +1,240 @@
+"""Background job queue for long benchmark runs, with progress and ETA reporting."""
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, Callable, List, Optional
+
+from config import Config
+
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+# Minimum seconds between progress snapshots written to disk
+SNAPSHOT_INTERVAL = 2.0
+# Unfinished jobs are re-snapshotted this often, so other workers can tell they are alive
+HEARTBEAT_INTERVAL = float(os.getenv('JOB_HEARTBEAT_INTERVAL', '10'))
+# A snapshot whose heartbeat is older than this belongs to a job nobody is running
+HEARTBEAT_TIMEOUT = 3 * HEARTBEAT_INTERVAL
+
+TERMINAL_STATUSES = ('completed', 'failed', 'interrupted')
+
+
+class Job:
+    """State of one queued benchmark run."""
+
+    def __init__(self, job_id: str, params: Dict[str, Any], run_id: str):
+        self.job_id = job_id
+        self.params = params
+        self.run_id = run_id
+        self.status = 'queued'
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.completed = 0
+        self.total = None
+        self.successful = 0
+        self.failed = 0
+        self.summary = None
+        self.error = None
+        self.owner = {'host': socket.gethostname(), 'pid': os.getpid()}
+        # Bumped on every change so event streams can wait for the next one
+        self.version = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = None
+        eta = None
+        if self.started_at:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+            if self.status == 'running' and self.total and self.completed:
+                eta = elapsed / self.completed * (self.total - self.completed)
+
+        return {
+            'job_id': self.job_id,
+            'run_id': self.run_id,
+            'status': self.status,
+            'params': self.params,
+            'created_at': datetime.fromtimestamp(self.created_at).isoformat(),
+            'started_at': datetime.fromtimestamp(self.started_at).isoformat() if self.started_at else None,
+            'finished_at': datetime.fromtimestamp(self.finished_at).isoformat() if self.finished_at else None,
+            'progress': {
+                'completed': self.completed,
+                'total': self.total,
+                'percent': round(self.completed / self.total * 100, 1) if self.total else 0.0
+            },
+            'partial_summary': {
+                'successful': self.successful,
+                'failed': self.failed
+            },
+            'elapsed': round(elapsed, 2) if elapsed is not None else None,
+            'eta_seconds': round(eta, 1) if eta is not None else None,
+            'summary': self.summary,
+            'error': self.error,
+            'owner': self.owner,
+            'heartbeat_at': time.time(),
+            'version': self.version
+        }
+
+
+class JobQueue:
+    """
+    Runs benchmark jobs on a worker pool so HTTP requests return immediately.
+
+    Job state is kept in memory and snapshotted to <jobs_dir>/<job_id>.json,
+    so status survives a restart and can be read by other worker processes
+    sharing jobs_dir. Each snapshot records its owner (host and pid) and a
+    heartbeat refreshed every HEARTBEAT_INTERVAL seconds; a job whose owner
+    is gone or whose heartbeat is stale is reported as 'interrupted' and can
+    be resumed by run_id, since the underlying run is checkpointed.
+
+    Jobs run on a thread pool inside the process that accepted them, and
+    the queue itself is not persisted. On serverless hosts that freeze or
+    stop the process once the response is sent, or after a request timeout,
+    a long job stops with it and is later reported as interrupted; run such
+    benchmarks with runner.py or sharded_runner.py on a long-lived host.
+    """
+
+    def __init__(self, jobs_dir: str = None, workers: int = None):
+        if jobs_dir is None:
+            base_dir = '/tmp/data' if os.getenv('VERCEL') else Config.RESULTS_DIR
+            jobs_dir = os.path.join(base_dir, 'jobs')
+        self.jobs_dir = jobs_dir
+        os.makedirs(self.jobs_dir, exist_ok=True)
+
+        self.pool = ThreadPoolExecutor(max_workers=workers or JOB_WORKERS)
+        self.jobs = {}
+        self._last_snapshot = {}
+        self._changed = threading.Condition()
+        threading.Thread(target=self._heartbeat, daemon=True).start()
+
+    def _heartbeat(self):
+        """Re-snapshot every unfinished job so its heartbeat stays fresh."""
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            with self._changed:
+                for job in list(self.jobs.values()):
+                    if job.status not in TERMINAL_STATUSES:
+                        self._snapshot(job, force=True)
+
+    def _snapshot(self, job: Job, force: bool = False):
+        """Write a job's state to disk, at most every SNAPSHOT_INTERVAL seconds unless forced."""
+        now = time.time()
+        if not force and now - self._last_snapshot.get(job.job_id, 0) < SNAPSHOT_INTERVAL:
+            return
+        self._last_snapshot[job.job_id] = now
+
+        path = os.path.join(self.jobs_dir, f"{job.job_id}.json")
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(job.to_dict(), f, indent=2, default=str)
+        os.replace(tmp_path, path)
+
+    def _update(self, job: Job, force_snapshot: bool = False, **changes):
+        with self._changed:
+            for name, value in changes.items():
+                setattr(job, name, value)
+            job.version += 1
+            self._snapshot(job, force_snapshot)
+            self._changed.notify_all()
+
+    def submit(self, work: Callable[..., Dict[str, Any]], params: Dict[str, Any],
+               run_id: str = None) -> Dict[str, Any]:
+        """
+        Queue a job.
+
+        Args:
+            work: Callable(run_id, on_response) returning a run summary;
+                on_response(response, completed, total) reports progress
+            params: Request parameters, stored with the job for reference
+            run_id: Run to write to; a new one is generated if not provided
+
+        Returns:
+            The queued job as a dictionary
+        """
+        job_id = uuid.uuid4().hex[:12]
+        if not run_id:
+            run_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{job_id[:6]}"
+
+        job = Job(job_id, params, run_id)
+        with self._changed:
+            self.jobs[job_id] = job
+            self._snapshot(job, force=True)
+
+        self.pool.submit(self._run, job, work)
+        return job.to_dict()
+
+    def _run(self, job: Job, work: Callable[..., Dict[str, Any]]):
+        self._update(job, force_snapshot=True, status='running', started_at=time.time())
+
+        def on_response(response, completed, total):
+            succeeded = bool(response.get('success'))
+            self._update(
+                job,
+                completed=completed,
+                total=total,
+                successful=job.successful + succeeded,
+                failed=job.failed + (not succeeded)
+            )
+
+        try:
+            summary = work(job.run_id, on_response)
+            self._update(job, force_snapshot=True, status='completed', finished_at=time.time(),
+                         summary=summary, total=job.total or 0)
+        except Exception as e:
+            self._update(job, force_snapshot=True, status='failed', finished_at=time.time(), error=str(e))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job's current state, falling back to its snapshot on disk."""
+        with self._changed:
+            job = self.jobs.get(job_id)
+            if job is not None:
+                return job.to_dict()
+
+        path = os.path.join(self.jobs_dir, f"{os.path.basename(job_id)}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if data['status'] not in TERMINAL_STATUSES and not self._owner_alive(data):
+            # Snapshot from a process that is no longer running this job
+            data['status'] = 'interrupted'
+            data['eta_seconds'] = None
+        return data
+
+    @staticmethod
+    def _owner_alive(data: Dict[str, Any]) -> bool:
+        """
+        Check whether the process that wrote an unfinished job's snapshot is
+        still running it: its pid must exist when it is on this host, and
+        its heartbeat must be fresh.
+        """
+        owner = data.get('owner') or {}
+        if owner.get('host') == socket.gethostname() and owner.get('pid') != os.getpid():
+            try:
+                os.kill(owner['pid'], 0)
+            except ProcessLookupError:
+                return False
+            except (PermissionError, KeyError, TypeError):
+                pass
+        return time.time() - (data.get('heartbeat_at') or 0) < HEARTBEAT_TIMEOUT
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        """List jobs known to this process, newest first."""
+        with self._changed:
+            jobs = [job.to_dict() for job in self.jobs.values()]
+        return sorted(jobs, key=lambda job: job['created_at'], reverse=True)
+
+    def wait_for_change(self, job_id: str, version: int, timeout: float = 15.0) -> Optional[Dict[str, Any]]:
+        """
+        Block until a job changes past version, or timeout elapses.
+
+        Returns:
+            The job's current state (unchanged if the wait timed out)
+        """
+        with self._changed:
+            job = self.jobs.get(job_id)
+            if job is not None:
+                self._changed.wait_for(lambda: job.version > version, timeout=timeout)
+        return self.get(job_id)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Migrate JSON result runs into the SQLite results database
+Copies every results_*.json run that is not already present
+"""
+
+import argparse
+
+from database import ResultsDatabase, SQLiteResultsDatabase
+
+
+def migrate(results_dir: str = None, db_path: str = None, overwrite: bool = False) -> int:
+    """
+    Copy JSON runs into SQLite.
+
+    Args:
+        results_dir: Directory holding results_*.json files
+        db_path: Path to the SQLite database
+        overwrite: Re-import runs that already exist in the database
+
+    Returns:
+        Number of runs migrated
+    """
+    source = ResultsDatabase(results_dir)
+    target = SQLiteResultsDatabase(db_path)
+    existing = {run['run_id'] for run in target.list_runs()}
+
+    migrated = 0
+    for run in source.list_runs():
+        run_id = run['run_id']
+        if run_id in existing and not overwrite:
+            print(f"  - {run_id} (already migrated)")
+            continue
+
+        data = source.load_results(run_id)
+        target.save_results(data['results'], run_id=run_id, timestamp=data['timestamp'])
+        migrated += 1
+        print(f"  ✓ {run_id} ({data['total_responses']} responses)")
+
+    return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Migrate JSON benchmark runs into the SQLite results database'
+    )
+    parser.add_argument('--results-dir', default=None,
+                        help='Directory with results_*.json files (default: Config.RESULTS_DIR)')
+    parser.add_argument('--db-path', default=None,
+                        help='SQLite database path (default: <results dir>/results.db)')
+    parser.add_argument('--overwrite', action='store_true',
+                        help='Re-import runs that already exist in the database')
+
+    args = parser.parse_args()
+
+    print("Migrating JSON runs to SQLite...\n")
+    migrated = migrate(args.results_dir, args.db_path, args.overwrite)
+    print(f"\nMigrated {migrated} run(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Mock search providers for offline load and latency testing
+Serves every provider's response shape with latencies, timeouts and
+failures sampled from recorded benchmark statistics, plus a drop-in
+executor that queries it instead of the real APIs
+"""
+
+import argparse
+import csv
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import List, Dict, Any
+
+from flask import Flask, jsonify, request
+
+from rate_limiter import ProviderClientPool
+
+STATS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gtm_analysis', 'response_statistics.csv')
+
+# Set to the mock server's base URL (e.g. http://localhost:8090) to run
+# every provider call against it instead of the real APIs
+MOCK_PROVIDERS_URL = os.getenv('MOCK_PROVIDERS_URL')
+MOCK_PROVIDERS_TIMEOUT = float(os.getenv('MOCK_PROVIDERS_TIMEOUT', '30'))
+
+# Providers whose answer text comes back under 'content' (see extract_clean_answer)
+CONTENT_PROVIDERS = ('linkup_standard', 'linkup_deep', 'parallel_oneshot')
+
+# Used for providers without recorded statistics
+DEFAULT_SAMPLES = [{'response_time': 2.0, 'success': True, 'source_count': 8, 'word_count': 200}]
+
+FILLER_WORDS = (
+    'according', 'recent', 'reports', 'data', 'shows', 'analysis', 'sources', 'indicate',
+    'market', 'research', 'official', 'published', 'update', 'results', 'across', 'several'
+)
+
+
+def load_provider_samples(path: str = STATS_PATH) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Read recorded per-call statistics, grouped by API.
+
+    Returns:
+        {api_name: [{'response_time', 'success', 'source_count', 'word_count'}, ...]}
+    """
+    samples = defaultdict(list)
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            samples[row['api_name']].append({
+                'response_time': float(row['response_time'] or 0),
+                'success': row['success'] == 'True',
+                'source_count': int(float(row['source_count'] or 0)),
+                'word_count': int(float(row['word_count'] or 0))
+            })
+    return dict(samples)
+
+
+class MockProviderProfile:
+    """
+    Samples mock call outcomes for each provider.
+
+    Latency, source count and answer length are drawn from recorded calls;
+    a recorded failure is replayed as a timeout. error_rate and
+    throttle_rate inject HTTP 500s and 429s on top.
+    """
+
+    def __init__(self, samples: Dict[str, List[Dict[str, Any]]] = None, seed: int = 0,
+                 latency_scale: float = 1.0, error_rate: float = 0.0, throttle_rate: float = 0.0,
+                 timeout_rate: float = None, timeout_after: float = 35.0, retry_after: float = 1.0):
+        self.samples = load_provider_samples() if samples is None else samples
+        self.latency_scale = latency_scale
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.timeout_rate = timeout_rate
+        self.timeout_after = timeout_after
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self, api_name: str) -> Dict[str, Any]:
+        """
+        Draw one call outcome.
+
+        Returns:
+            {'outcome': 'ok' | 'timeout' | 'error' | 'throttled', 'delay',
+             'source_count', 'word_count'}
+        """
+        with self._lock:
+            recorded = self._random.choice(self.samples.get(api_name) or DEFAULT_SAMPLES)
+            roll = self._random.random()
+
+        if roll < self.throttle_rate:
+            outcome = 'throttled'
+        elif roll < self.throttle_rate + self.error_rate:
+            outcome = 'error'
+        elif self.timeout_rate is not None:
+            timed_out = roll < self.throttle_rate + self.error_rate + self.timeout_rate
+            outcome = 'timeout' if timed_out else 'ok'
+        else:
+            outcome = 'ok' if recorded['success'] else 'timeout'
+
+        delay = self.timeout_after if outcome == 'timeout' else recorded['response_time']
+        if outcome == 'throttled':
+            delay = 0.0
+        return {
+            'outcome': outcome,
+            'delay': delay * self.latency_scale,
+            'source_count': recorded['source_count'],
+            'word_count': recorded['word_count']
+        }
+
+
+def build_response_data(api_name: str, query: str, source_count: int, word_count: int) -> Dict[str, Any]:
+    """Build a response body in the shape the named provider returns."""
+    words = (query.split() + list(FILLER_WORDS)) * (word_count // (len(query.split()) + len(FILLER_WORDS)) + 1)
+    answer = " ".join(words[:word_count])
+    sources = [
+        {'url': f"https://source{i}.{api_name}.mock/{i}", 'name': f"Mock source {i}"}
+        for i in range(source_count)
+    ]
+
+    if api_name in CONTENT_PROVIDERS:
+        return {'content': answer, 'sources': sources}
+    if api_name == 'you':
+        # You.com lists plain URLs
+        return {'answer': answer, 'sources': [source['url'] for source in sources]}
+    return {'answer': answer, 'sources': sources}
+
+
+def create_app(profile: MockProviderProfile = None) -> Flask:
+    """Create the mock provider server."""
+    mock_app = Flask(__name__)
+    profile = profile or MockProviderProfile()
+
+    @mock_app.route('/health')
+    def health():
+        return jsonify({'success': True, 'providers': sorted(profile.samples)})
+
+    @mock_app.route('/<api_name>/search', methods=['POST'])
+    def search(api_name):
+        data = request.get_json(silent=True) or {}
+        query = data.get('query', '')
+        outcome = profile.sample(api_name)
+
+        time.sleep(outcome['delay'])
+
+        if outcome['outcome'] == 'throttled':
+            response = jsonify({'error': 'Too Many Requests'})
+            response.headers['Retry-After'] = str(profile.retry_after)
+            return response, 429
+        if outcome['outcome'] == 'error':
+            return jsonify({'error': 'Internal Server Error'}), 500
+        if outcome['outcome'] == 'timeout':
+            return jsonify({'error': 'Gateway Timeout'}), 504
+
+        return jsonify(build_response_data(api_name, query, outcome['source_count'], outcome['word_count']))
+
+    return mock_app
+
+
+class MockQueryExecutor:
+    """
+    QueryExecutor stand-in that sends every provider call to the mock server.
+
+    Responses use the executor's record format, so the rate limiter,
+    hedging, response cache and runners work unchanged on top of it.
+    """
+
+    # Accepts timeout= per call, so hedged retries can extend it
+    per_call_timeout = True
+
+    def __init__(self, base_url: str = None, timeout: float = None, apis: List[str] = None):
+        self.base_url = (base_url or MOCK_PROVIDERS_URL or 'http://localhost:8090').rstrip('/')
+        self.timeout = timeout or MOCK_PROVIDERS_TIMEOUT
+        self.apis = apis
+        self.clients = ProviderClientPool(timeout=self.timeout)
+
+    def get_available_apis(self) -> List[str]:
+        if self.apis is not None:
+            return self.apis
+        return sorted(load_provider_samples())
+
+    def request_params(self, api_name: str) -> Dict[str, Any]:
+        """Options that shape a provider's response, so cached responses are keyed by them."""
+        return {'base_url': self.base_url}
+
+    def execute_api(self, query: str, api_name: str, timeout: float = None) -> Dict[str, Any]:
+        """Call one mock provider, with timeout overriding the executor's own."""
+        import httpx
+
+        timeout = timeout or self.timeout
+        start = time.time()
+        result = {
+            'query': query,
+            'api_name': api_name,
+            'success': False,
+            'error': None,
+            'response_data': None,
+            'response_time': 0,
+            'timestamp': start
+        }
+
+        try:
+            response = self.clients.get(api_name).post(f"{self.base_url}/{api_name}/search", json={'query': query},
+                                                      timeout=timeout)
+            result['status_code'] = response.status_code
+            if response.status_code == 200:
+                result['success'] = True
+                result['response_data'] = response.json()
+            else:
+                result['error'] = f"HTTP {response.status_code}: {response.text.strip()[:200]}"
+                result['headers'] = dict(response.headers)
+        except httpx.TimeoutException:
+            result['error'] = f"Request timed out after {timeout:.0f}s"
+        except Exception as e:
+            result['error'] = str(e)
+
+        result['response_time'] = time.time() - start
+        return result
+
+    def execute_single_query(self, query: str, apis: List[str], timeout: float = None) -> List[Dict]:
+        """Execute a query across mock providers, one after another."""
+        return [self.execute_api(query, api_name, timeout) for api_name in apis]
+
+
+def create_query_executor():
+    """Get a QueryExecutor, or a MockQueryExecutor when MOCK_PROVIDERS_URL is set."""
+    if MOCK_PROVIDERS_URL:
+        return MockQueryExecutor(MOCK_PROVIDERS_URL)
+
+    from executor import QueryExecutor
+    return QueryExecutor()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Serve mock search providers with latencies sampled from recorded benchmark stats'
+    )
+    parser.add_argument('--port', type=int, default=8090, help='Port to listen on (default: 8090)')
+    parser.add_argument('--stats', default=STATS_PATH,
+                        help='Per-call statistics CSV (default: gtm_analysis/response_statistics.csv)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for reproducible runs')
+    parser.add_argument('--latency-scale', type=float, default=1.0,
+                        help='Multiply every sampled latency, e.g. 0.1 for fast load tests')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of calls answered with HTTP 500')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of calls answered with HTTP 429')
+    parser.add_argument('--timeout-rate', type=float, default=None,
+                        help='Fraction of calls that hang (default: each API\'s recorded failure rate)')
+    parser.add_argument('--timeout-after', type=float, default=35.0,
+                        help='Seconds a timed-out call hangs before answering 504 (default: 35)')
+    parser.add_argument('--retry-after', type=float, default=1.0, help='Retry-After seconds sent with 429s')
+
+    args = parser.parse_args()
+
+    profile = MockProviderProfile(
+        samples=load_provider_samples(args.stats),
+        seed=args.seed,
+        latency_scale=args.latency_scale,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        timeout_rate=args.timeout_rate,
+        timeout_after=args.timeout_after,
+        retry_after=args.retry_after
+    )
+    print(f"Mock providers: {', '.join(sorted(profile.samples))}")
+    print(f"Set MOCK_PROVIDERS_URL=http://localhost:{args.port} to point the executor here")
+    create_app(profile).run(port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Pairwise API comparisons: win/tie/loss matrix, Bradley-Terry ratings and bootstrap confidence intervals."""
+import warnings
+from typing import List, Dict, Any, Tuple
+
+import numpy as np
+import pandas as pd
+
+from quality_analyzer import api_weighted_scores
+
+BOOTSTRAP_SAMPLES = 2000
+CONFIDENCE_LEVEL = 0.95
+# Weighted scores closer than this are a tie
+TIE_TOLERANCE = 1e-9
+# Virtual tie added to every pair so an API that never wins keeps a finite rating
+PRIOR_TIES = 1.0
+BT_MAX_ITERATIONS = 500
+BT_TOLERANCE = 1e-9
+# Ratings are reported on the Elo scale: 400 points = 10x the odds of winning
+ELO_BASE = 1000
+ELO_SCALE = 400
+
+RATING_COLUMNS = ['api', 'rating', 'rating_ci_low', 'rating_ci_high',
+                  'win_rate', 'win_rate_ci_low', 'win_rate_ci_high', 'comparisons']
+PAIRWISE_COLUMNS = ['api', 'opponent', 'wins', 'ties', 'losses',
+                    'win_rate', 'win_rate_ci_low', 'win_rate_ci_high']
+
+
+def score_matrix(analysis_results: List[Dict[str, Any]]) -> Tuple[np.ndarray, List[str]]:
+    """
+    Collect per-query weighted scores into a (query x API) matrix.
+
+    Returns:
+        (scores, apis), with NaN where an API has no response for a query
+    """
+    per_query = [api_weighted_scores(result) for result in analysis_results]
+    apis = list(dict.fromkeys(api for scores in per_query for api in scores))
+    column = {api: i for i, api in enumerate(apis)}
+
+    scores = np.full((len(per_query), len(apis)), np.nan)
+    for row, query_scores in enumerate(per_query):
+        for api, score in query_scores.items():
+            scores[row, column[api]] = score
+    return scores, apis
+
+
+def pairwise_outcomes(scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compare every pair of APIs on every query.
+
+    Returns:
+        (wins, ties) as (query x API x API) arrays; wins[q, i, j] is 1 when
+        API i beat API j on query q. Pairs missing a response count as neither.
+    """
+    diff = scores[:, :, None] - scores[:, None, :]
+    compared = ~np.isnan(diff)
+    wins = compared & (diff > TIE_TOLERANCE)
+    ties = compared & (np.abs(diff) <= TIE_TOLERANCE)
+    diagonal = np.eye(scores.shape[1], dtype=bool)
+    ties[:, diagonal] = False
+    return wins.astype(float), ties.astype(float)
+
+
+def bradley_terry(wins: np.ndarray, ties: np.ndarray) -> np.ndarray:
+    """
+    Fit Bradley-Terry strengths with Hunter's MM algorithm.
+
+    A tie counts as half a win for each side. Works on a stack of
+    (API x API) tables at once, e.g. one per bootstrap resample.
+
+    Args:
+        wins: (..., API, API) win counts
+        ties: (..., API, API) tie counts
+
+    Returns:
+        (..., API) strengths with geometric mean 1
+    """
+    num_apis = wins.shape[-1]
+    if num_apis < 2:
+        return np.ones(wins.shape[:-1])
+    off_diagonal = 1 - np.eye(num_apis)
+    won = wins + 0.5 * ties + 0.5 * PRIOR_TIES * off_diagonal
+    games = won + np.swapaxes(won, -1, -2)
+    total_won = won.sum(axis=-1)
+
+    strength = np.ones(wins.shape[:-1])
+    for _ in range(BT_MAX_ITERATIONS):
+        pair_sums = strength[..., :, None] + strength[..., None, :]
+        updated = total_won / (games / pair_sums).sum(axis=-1)
+        updated /= np.exp(np.log(updated).mean(axis=-1, keepdims=True))
+        converged = np.abs(np.log(updated) - np.log(strength)).max() < BT_TOLERANCE
+        strength = updated
+        if converged:
+            break
+    return strength
+
+
+def to_rating(strength: np.ndarray) -> np.ndarray:
+    return ELO_BASE + ELO_SCALE * np.log10(strength)
+
+
+def win_rates(wins: np.ndarray, ties: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Win rates counting ties as half a win.
+
+    Returns:
+        (pairwise (..., API, API), overall (..., API)); NaN where no
+        comparisons were made
+    """
+    points = wins + 0.5 * ties
+    games = points + np.swapaxes(points, -1, -2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pairwise = points / games
+        overall = points.sum(axis=-1) / games.sum(axis=-1)
+    return pairwise, overall
+
+
+def compare_apis(analysis_results: List[Dict[str, Any]], samples: int = BOOTSTRAP_SAMPLES,
+                 confidence: float = CONFIDENCE_LEVEL, seed: int = 0) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Rate APIs from per-query weighted scores, with bootstrap CIs over queries.
+
+    Each resample draws the queries with replacement, as a (resample x
+    query) count matrix; multiplying it with the per-query outcomes gives
+    every resample's win/tie tables in one matrix product, and all
+    resamples are fitted together.
+
+    Returns:
+        (ratings, pairwise) DataFrames: one row per API, sorted by rating,
+        and one row per ordered API pair
+    """
+    scores, apis = score_matrix(analysis_results)
+    num_queries, num_apis = scores.shape
+    if not num_queries or not num_apis:
+        return pd.DataFrame(columns=RATING_COLUMNS), pd.DataFrame(columns=PAIRWISE_COLUMNS)
+    wins, ties = pairwise_outcomes(scores)
+    total_wins, total_ties = wins.sum(axis=0), ties.sum(axis=0)
+
+    rating = to_rating(bradley_terry(total_wins, total_ties))
+    pairwise_rate, overall_rate = win_rates(total_wins, total_ties)
+
+    rng = np.random.default_rng(seed)
+    counts = rng.multinomial(num_queries, np.full(num_queries, 1 / num_queries), size=samples)
+    boot_wins = (counts @ wins.reshape(num_queries, num_apis ** 2)).reshape(samples, num_apis, num_apis)
+    boot_ties = (counts @ ties.reshape(num_queries, num_apis ** 2)).reshape(samples, num_apis, num_apis)
+    boot_rating = to_rating(bradley_terry(boot_wins, boot_ties))
+    boot_pairwise, boot_overall = win_rates(boot_wins, boot_ties)
+
+    tail = (1 - confidence) / 2 * 100
+    bounds = (tail, 100 - tail)
+    rating_ci = np.percentile(boot_rating, bounds, axis=0)
+    with warnings.catch_warnings():
+        # Pairs that never met (and the diagonal) have no win rate in any resample
+        warnings.simplefilter('ignore', RuntimeWarning)
+        overall_ci = np.nanpercentile(boot_overall, bounds, axis=0)
+        pairwise_ci = np.nanpercentile(boot_pairwise, bounds, axis=0)
+
+    ratings = pd.DataFrame({
+        'api': apis,
+        'rating': rating,
+        'rating_ci_low': rating_ci[0],
+        'rating_ci_high': rating_ci[1],
+        'win_rate': overall_rate,
+        'win_rate_ci_low': overall_ci[0],
+        'win_rate_ci_high': overall_ci[1],
+        'comparisons': (total_wins + total_ties + np.swapaxes(total_wins, 0, 1)).sum(axis=1).astype(int)
+    }).sort_values('rating', ascending=False, ignore_index=True)
+
+    i, j = np.where(~np.eye(num_apis, dtype=bool))
+    pairwise = pd.DataFrame({
+        'api': [apis[k] for k in i],
+        'opponent': [apis[k] for k in j],
+        'wins': total_wins[i, j].astype(int),
+        'ties': total_ties[i, j].astype(int),
+        'losses': total_wins[j, i].astype(int),
+        'win_rate': pairwise_rate[i, j],
+        'win_rate_ci_low': pairwise_ci[0][i, j],
+        'win_rate_ci_high': pairwise_ci[1][i, j]
+    })
+    return ratings[RATING_COLUMNS], pairwise[PAIRWISE_COLUMNS]
@@ -7,10 +7,17 @@ Creates comparison CSVs for GTM analysis
 
 import json
 import csv
-import pandas as pd
+import tempfile
 from pathlib import Path
 import argparse
-from typing import Dict, List, Any
+from typing import Dict, List, Iterable, Iterator
+
+from results_io import iter_benchmark_items, text_key
+from source_index import INDEX_FILENAME, SourceIndex, unique_source_urls
+
+CLEAN_COLUMNS = ['query', 'api_name', 'full_answer', 'source_count', 'word_count', 'response_time', 'success',
+                 'timestamp']
+STATS_COLUMNS = [column for column in CLEAN_COLUMNS if column != 'full_answer']
 
 
 def extract_clean_answer(api_name: str, response_data: Dict) -> tuple:
@@ -43,10 +50,8 @@ def extract_clean_answer(api_name: str, response_data: Dict) -> tuple:
     return answer, sources
 
 
-def process_benchmark_data(json_data: List[Dict]) -> List[Dict]:
-    """Process the benchmark JSON data structure"""
-    results = []
-
+def iter_processed_responses(json_data: Iterable[Dict]) -> Iterator[Dict]:
+    """Yield one cleaned record per response in the benchmark JSON data structure"""
     for item in json_data:
         query = item.get("query", "")
         responses = item.get("responses", [])
@@ -61,14 +66,8 @@ def process_benchmark_data(json_data: List[Dict]) -> List[Dict]:
             # Count sources
             source_count = len(sources) if isinstance(sources, list) else 0
 
-            # Extract source URLs if available
-            source_urls = []
-            if isinstance(sources, list):
-                for source in sources:
-                    if isinstance(source, dict) and "url" in source:
-                        source_urls.append(source["url"])
-                    elif isinstance(source, str):
-                        source_urls.append(source)
+            # Canonical source URLs, each page once
+            source_urls = unique_source_urls(sources)
 
             # Clean answer (remove excessive whitespace)
             if answer:
@@ -77,7 +76,7 @@ def process_benchmark_data(json_data: List[Dict]) -> List[Dict]:
             else:
                 answer_preview = ""
 
-            results.append({
+            yield {
                 "query": query,
                 "api_name": api_name,
                 "answer_preview": answer_preview,
@@ -88,40 +87,91 @@ def process_benchmark_data(json_data: List[Dict]) -> List[Dict]:
                 "success": response.get("success", False),
                 "timestamp": response.get("timestamp", ""),
                 "word_count": len(answer.split()) if answer else 0
-            })
+            }
 
-    return results
 
+def process_benchmark_data(json_data: Iterable[Dict]) -> List[Dict]:
+    """Process the benchmark JSON data structure"""
+    return list(iter_processed_responses(json_data))
 
-def create_comparison_csv(results: List[Dict], output_dir: Path):
-    """Create side-by-side comparison CSV"""
-    comparison_data = {}
 
-    for result in results:
-        query = result['query']
-        api = result['api_name']
+class ComparisonWriter:
+    """
+    Writes the side-by-side comparison CSV (one row per query, four columns
+    per API) from a stream of processed responses.
+
+    The API columns are only known once every response has been seen, so
+    finished rows are spooled to a temporary JSONL file and copied into the
+    CSV on close; only the current row and, per query, a 16-byte digest of
+    the query and its file offsets stay in memory. Responses to the same
+    query are merged into one row even when they are not consecutive.
+    """
 
-        if query not in comparison_data:
-            comparison_data[query] = {'query': query}
+    def __init__(self, output_path: Path):
+        self.output_path = Path(output_path)
+        self.columns = {'query': None}
+        self.offsets = {}  # text_key(query) -> spool offsets of its rows
+        self._spool = tempfile.TemporaryFile('w+', encoding='utf-8')
+        self._row = None
 
-        comparison_data[query][f'{api}_answer'] = result['full_answer']
-        comparison_data[query][f'{api}_sources'] = result['source_count']
-        comparison_data[query][f'{api}_time'] = result['response_time']
-        comparison_data[query][f'{api}_word_count'] = result['word_count']
+    def add(self, result: Dict):
+        query = result['query']
+        api = result['api_name']
 
-    df_comparison = pd.DataFrame(list(comparison_data.values()))
-    output_path = output_dir / 'api_comparison.csv'
-    df_comparison.to_csv(output_path, index=False)
-    print(f"  ✓ {output_path}")
+        if self._row is None or self._row['query'] != query:
+            self._flush()
+            self._row = {'query': query}
+
+        self._row[f'{api}_answer'] = result['full_answer']
+        self._row[f'{api}_sources'] = result['source_count']
+        self._row[f'{api}_time'] = result['response_time']
+        self._row[f'{api}_word_count'] = result['word_count']
+        self.columns.update(dict.fromkeys(self._row))
+
+    def _flush(self):
+        if self._row is not None:
+            key = text_key(self._row['query'])
+            self.offsets[key] = self.offsets.get(key, ()) + (self._spool.tell(),)
+            self._spool.write(json.dumps(self._row, default=str) + '\n')
+            self._row = None
+
+    def close(self) -> int:
+        """
+        Write the CSV and drop the spool.
+
+        Returns:
+            Number of query rows written
+        """
+        self._flush()
+        with open(self.output_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(self.columns), lineterminator='\n')
+            writer.writeheader()
+            for offsets in self.offsets.values():
+                row = {}
+                for offset in offsets:
+                    self._spool.seek(offset)
+                    row.update(json.loads(self._spool.readline()))
+                writer.writerow(row)
+        self._spool.close()
+        return len(self.offsets)
+
+
+def create_comparison_csv(results: Iterable[Dict], output_dir: Path) -> int:
+    """Create side-by-side comparison CSV"""
+    comparison = ComparisonWriter(output_dir / 'api_comparison.csv')
+    for result in results:
+        comparison.add(result)
+    count = comparison.close()
+    print(f"  ✓ {comparison.output_path}")
 
-    return df_comparison
+    return count
 
 
 def main():
     parser = argparse.ArgumentParser(
         description='Process API benchmark results and generate analysis CSVs'
     )
-    parser.add_argument('input_file', help='Path to benchmark results JSON file')
+    parser.add_argument('input_file', help='Path to benchmark results JSON or JSONL (.jsonl, .jsonl.gz, .jsonl.zst) file')
     parser.add_argument('--output-dir', default='analysis_results',
                         help='Output directory for CSV files (default: analysis_results)')
     parser.add_argument('--create-comparison', action='store_true',
@@ -137,56 +187,61 @@ def main():
     print("API RESPONSE PROCESSING")
     print(f"{'='*80}\n")
 
-    # Load data
+    # Stream data (JSON, or JSONL read line by line)
     print(f"Loading: {args.input_file}")
-    with open(args.input_file, 'r') as f:
-        data = json.load(f)
-
-    if not isinstance(data, list):
-        data = [data]
-
-    # Process data
-    print(f"Processing {len(data)} queries...")
-    results = process_benchmark_data(data)
+    data = iter_benchmark_items(args.input_file)
 
-    # Save outputs
+    # Process data, writing every report row by row in one pass
+    print("Processing queries...")
     print(f"\nGenerating reports in: {output_dir}/\n")
 
     # 1. Full responses CSV (clean answers without source listings)
-    df_full = pd.DataFrame(results)
-    df_full[['query', 'api_name', 'full_answer', 'source_count', 'word_count', 'response_time', 'success', 'timestamp']].to_csv(
-        output_dir / 'clean_responses.csv', index=False
-    )
-    print(f"  ✓ {output_dir / 'clean_responses.csv'}")
-
     # 2. Statistics CSV (metrics only, no full text)
-    df_stats = pd.DataFrame(results)
-    df_stats[['query', 'api_name', 'source_count', 'word_count', 'response_time', 'success', 'timestamp']].to_csv(
-        output_dir / 'response_statistics.csv', index=False
-    )
-    print(f"  ✓ {output_dir / 'response_statistics.csv'}")
-
     # 3. Comparison CSV (side-by-side)
-    if args.create_comparison or True:  # Always create by default
-        create_comparison_csv(results, output_dir)
+    comparison = ComparisonWriter(output_dir / 'api_comparison.csv')  # Always created by default
+    # 4. Source index (domain -> (api, query)) and cross-API source overlap
+    source_index = SourceIndex()
+    total_responses = 0
+    api_stats = {}
+
+    with open(output_dir / 'clean_responses.csv', 'w', newline='', encoding='utf-8') as clean_file, \
+            open(output_dir / 'response_statistics.csv', 'w', newline='', encoding='utf-8') as stats_file:
+        clean_writer = csv.DictWriter(clean_file, fieldnames=CLEAN_COLUMNS, extrasaction='ignore', lineterminator='\n')
+        stats_writer = csv.DictWriter(stats_file, fieldnames=STATS_COLUMNS, extrasaction='ignore', lineterminator='\n')
+        clean_writer.writeheader()
+        stats_writer.writeheader()
+
+        for result in iter_processed_responses(data):
+            clean_writer.writerow(result)
+            stats_writer.writerow(result)
+            comparison.add(result)
+            if result['source_urls']:
+                source_index.add(result['query'], result['api_name'], result['source_urls'].split('; '))
+
+            total_responses += 1
+            api = result['api_name']
+            if api not in api_stats:
+                api_stats[api] = {'count': 0, 'avg_sources': 0, 'avg_time': 0, 'avg_words': 0}
+            api_stats[api]['count'] += 1
+            api_stats[api]['avg_sources'] += result['source_count']
+            api_stats[api]['avg_time'] += result['response_time']
+            api_stats[api]['avg_words'] += result['word_count']
+
+    print(f"  ✓ {output_dir / 'clean_responses.csv'}")
+    print(f"  ✓ {output_dir / 'response_statistics.csv'}")
+    comparison.close()
+    print(f"  ✓ {comparison.output_path}")
+    source_index.save(output_dir / INDEX_FILENAME)
+    print(f"  ✓ {output_dir / INDEX_FILENAME}")
+    source_index.overlap_stats().to_csv(output_dir / 'source_overlap.csv', index=False)
+    print(f"  ✓ {output_dir / 'source_overlap.csv'}")
 
     # Print summary
     print(f"\n{'='*80}")
     print("PROCESSING SUMMARY")
     print(f"{'='*80}\n")
-    print(f"Total responses processed: {len(results)}")
-    print(f"Unique queries: {len(set(r['query'] for r in results))}")
-
-    # API statistics
-    api_stats = {}
-    for result in results:
-        api = result['api_name']
-        if api not in api_stats:
-            api_stats[api] = {'count': 0, 'avg_sources': 0, 'avg_time': 0, 'avg_words': 0}
-        api_stats[api]['count'] += 1
-        api_stats[api]['avg_sources'] += result['source_count']
-        api_stats[api]['avg_time'] += result['response_time']
-        api_stats[api]['avg_words'] += result['word_count']
+    print(f"Total responses processed: {total_responses}")
+    print(f"Unique queries: {len(comparison.offsets)}")
 
     print("\nAPI Statistics:")
     print(f"{'API':<20} {'Responses':<12} {'Avg Sources':<12} {'Avg Words':<12} {'Avg Time (s)':<12}")
@@ -201,6 +256,8 @@ def main():
     print("  1. clean_responses.csv - Full responses without source listings")
     print("  2. response_statistics.csv - Metrics only (no full text)")
     print("  3. api_comparison.csv - Side-by-side comparison of APIs")
+    print(f"  4. {INDEX_FILENAME} - Cited pages by domain, API and query (query with source_index.py)")
+    print("  5. source_overlap.csv - Pages and domains each pair of APIs both cite")
     print("\nNext step: Run quality_analyzer.py for competitive analysis")
 
 
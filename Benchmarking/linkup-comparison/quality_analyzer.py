@@ -4,14 +4,166 @@ Advanced quality analysis for API responses
 Identifies competitive advantages and use cases
 """
 
-import json
+import argparse
 import csv
+import os
 import pandas as pd
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterator, Tuple
 import re
-from collections import Counter
+from collections import Counter, deque
+
+from results_io import iter_benchmark_items
+from source_index import source_summary
+
+# Queries handed to each worker process at a time
+QUALITY_CHUNK_SIZE = 50
+
+STOP_WORDS = {'the', 'a', 'an', 'is', 'are', 'was', 'were', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'}
+
+# Specific indicators (good). Scores only ask whether a pattern occurs, so
+# repetitions that cannot change that are trimmed (the full form is noted)
+SPECIFIC_PATTERNS = [
+    re.compile(r'\d'),  # Numbers: \d+
+    re.compile(r'\d[/-]\d{1,2}[/-]\d\d'),  # Dates: \d{1,2}[/-]\d{1,2}[/-]\d{2,4}
+    re.compile(r'\$[\d,]'),  # Money: \$[\d,]+
+    re.compile(r'\d%'),  # Percentages: \d+%
+    re.compile(r'[A-Z][a-z]+ [A-Z][a-z]'),  # Proper names: [A-Z][a-z]+ [A-Z][a-z]+
+]
+
+# Vague indicators (bad)
+VAGUE_PHRASES = [
+    'multiple', 'various', 'several', 'many', 'some',
+    'exact number is not specified', 'approximately',
+    'it depends', 'varies', 'unclear'
+]
+
+# High confidence indicators
+CONFIDENT_PHRASES = ['specifically', 'exactly', 'definitely', 'clearly', 'total of']
+
+# Low confidence indicators
+UNCERTAIN_PHRASES = [
+    'may', 'might', 'possibly', 'appears', 'seems',
+    'not specified', 'unclear', 'approximately', 'about'
+]
+
+ALL_PHRASES = tuple(dict.fromkeys(VAGUE_PHRASES + CONFIDENT_PHRASES + UNCERTAIN_PHRASES))
+
+# Actionable indicators, matched case-insensitively
+ACTION_PATTERNS = [
+    re.compile(r'call \d{3}-\d{3}-\d{4}', re.IGNORECASE),  # Phone numbers
+    re.compile(r'visit [a-zA-Z]+\.com', re.IGNORECASE),  # Website references
+    re.compile(r'contact', re.IGNORECASE),
+    re.compile(r'schedule', re.IGNORECASE),
+    re.compile(r'locate', re.IGNORECASE)
+]
+
+# The same patterns for ASCII text that has already been lowercased, where
+# plain matching is equivalent and much cheaper than IGNORECASE
+LOWERCASE_ACTION_PATTERNS = [
+    re.compile(r'call \d{3}-\d{3}-\d{4}'),
+    re.compile(r'visit [a-z]+\.com'),
+    'contact',
+    'schedule',
+    'locate'
+]
+
+# \d+ (locations?|offices?|centers?), trimmed like SPECIFIC_PATTERNS
+LOCATION_COUNT_PATTERN = re.compile(r'\d (?:location|office|center)')
+PROPER_NOUN_PATTERN = re.compile(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b')
+
+# Substrings at least one of which a slow pattern needs in order to match;
+# a cheap substring check rules most answers out before the regex runs
+PATTERN_HINTS = {
+    SPECIFIC_PATTERNS[1]: ('/', '-'),
+    SPECIFIC_PATTERNS[3]: ('%',),
+    LOCATION_COUNT_PATTERN: ('location', 'office', 'center')
+}
+
+
+def pattern_occurs(pattern: re.Pattern, text: str) -> bool:
+    hints = PATTERN_HINTS.get(pattern)
+    if hints and not any(hint in text for hint in hints):
+        return False
+    return pattern.search(text) is not None
+
+
+# determine_winner's weighted score, summed in this order
+WINNER_WEIGHTS = [
+    ('completeness_score', 0.3),
+    ('specificity_score', 0.25),
+    ('source_quality', 0.15),
+    ('confidence_level', 0.15),
+    ('actionability', 0.15)
+]
+
+# With a semantic relevance score, it takes half of keyword completeness's weight
+SEMANTIC_WINNER_WEIGHTS = [
+    ('completeness_score', 0.15),
+    ('semantic_relevance', 0.15),
+    ('specificity_score', 0.25),
+    ('source_quality', 0.15),
+    ('confidence_level', 0.15),
+    ('actionability', 0.15)
+]
+
+
+class AnswerFeatures:
+    """
+    Everything the quality scores read from one answer.
+
+    The answer is lowercased once, each phrase and pattern is searched for
+    once (shared phrases like 'unclear' are not searched twice), and scans
+    stop as soon as their outcome is known.
+    """
+
+    def __init__(self, answer: str):
+        self.lower = answer.lower()
+        self.phrases = {phrase for phrase in ALL_PHRASES if phrase in self.lower}
+
+        self.has_numbers = pattern_occurs(SPECIFIC_PATTERNS[0], answer)
+        self.specific_matches = [self.has_numbers] + [
+            pattern_occurs(pattern, answer) for pattern in SPECIFIC_PATTERNS[1:]
+        ]
+
+        if answer.isascii():
+            self.action_matches = [
+                (pattern in self.lower) if isinstance(pattern, str) else pattern.search(self.lower) is not None
+                for pattern in LOWERCASE_ACTION_PATTERNS
+            ]
+        else:
+            self.action_matches = [pattern.search(answer) is not None for pattern in ACTION_PATTERNS]
+        self.has_location_count = pattern_occurs(LOCATION_COUNT_PATTERN, answer)
+
+        # Only whether there are more than two proper nouns matters
+        proper_nouns = islice(PROPER_NOUN_PATTERN.finditer(answer), 3)
+        self.has_specific_names = sum(1 for _ in proper_nouns) > 2
+
+
+def weighted_score(api_metrics: Dict[str, Any]) -> float:
+    """The overall score determine_winner ranks one API's response by"""
+    weights = SEMANTIC_WINNER_WEIGHTS if "semantic_relevance" in api_metrics else WINNER_WEIGHTS
+    score = 0.0
+    for column, weight in weights:
+        score += api_metrics[column] * weight
+
+    # Penalty for slow response
+    if api_metrics["response_time"] > 1.0:
+        score *= 0.9
+
+    return score
+
+
+def api_weighted_scores(metrics: Dict[str, Any]) -> Dict[str, float]:
+    """Weighted score of every API in one analyze_response_quality result"""
+    return {
+        key.replace("_metrics", ""): weighted_score(value)
+        for key, value in metrics.items() if key.endswith("_metrics")
+    }
+
 
 class APIResponseAnalyzer:
     def __init__(self):
@@ -27,19 +179,23 @@ class APIResponseAnalyzer:
             answer = response_data.get("answer", "")
             sources = response_data.get("sources", [])
             response_time = response_data.get("response_time", 0)
+            features = AnswerFeatures(answer)
 
             # Calculate quality metrics
             metrics[f"{api_name}_metrics"] = {
-                "completeness_score": self.score_completeness(answer, query),
-                "specificity_score": self.score_specificity(answer),
+                "completeness_score": self.score_completeness(answer, query, features),
+                "specificity_score": self.score_specificity(answer, features),
                 "source_quality": self.score_source_quality(sources),
                 "response_time": response_time,
                 "word_count": len(answer.split()),
-                "has_numbers": bool(re.search(r'\d+', answer)),
-                "has_specific_names": self.has_specific_names(answer),
-                "confidence_level": self.score_confidence(answer),
-                "actionability": self.score_actionability(answer)
+                "has_numbers": features.has_numbers,
+                "has_specific_names": features.has_specific_names,
+                "confidence_level": self.score_confidence(answer, features),
+                "actionability": self.score_actionability(answer, features)
             }
+            # Set by add_semantic_relevance when a semantic scorer stage ran
+            if "semantic_relevance" in response_data:
+                metrics[f"{api_name}_metrics"]["semantic_relevance"] = response_data["semantic_relevance"]
 
         # Determine winner for this query
         metrics["winner"] = self.determine_winner(metrics)
@@ -47,17 +203,17 @@ class APIResponseAnalyzer:
 
         return metrics
 
-    def score_completeness(self, answer: str, query: str) -> float:
+    def score_completeness(self, answer: str, query: str, features: AnswerFeatures = None) -> float:
         """Score how completely the answer addresses the query"""
+        features = features or AnswerFeatures(answer)
         score = 0.0
 
         # Check if answer directly addresses the question
         query_keywords = set(query.lower().split())
-        answer_lower = answer.lower()
+        answer_lower = features.lower
 
         # Remove common words
-        stop_words = {'the', 'a', 'an', 'is', 'are', 'was', 'were', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'}
-        query_keywords = query_keywords - stop_words
+        query_keywords = query_keywords - STOP_WORDS
 
         # Check keyword coverage
         keywords_found = sum(1 for kw in query_keywords if kw in answer_lower)
@@ -65,42 +221,26 @@ class APIResponseAnalyzer:
             score = keywords_found / len(query_keywords)
 
         # Bonus for specific numbers/data
-        if re.search(r'\d+', answer):
+        if features.has_numbers:
             score += 0.2
 
         # Bonus for direct answer format
-        if answer.strip() and not answer.lower().startswith(("i don't", "i cannot", "the exact")):
+        if answer.strip() and not answer_lower.startswith(("i don't", "i cannot", "the exact")):
             score += 0.1
 
         return min(score, 1.0)
 
-    def score_specificity(self, answer: str) -> float:
+    def score_specificity(self, answer: str, features: AnswerFeatures = None) -> float:
         """Score how specific vs vague the answer is"""
+        features = features or AnswerFeatures(answer)
         score = 0.5  # Start neutral
 
-        # Specific indicators (good)
-        specific_patterns = [
-            r'\d+',  # Numbers
-            r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}',  # Dates
-            r'\$[\d,]+',  # Money
-            r'\d+%',  # Percentages
-            r'[A-Z][a-z]+ [A-Z][a-z]+',  # Proper names
-        ]
-
-        for pattern in specific_patterns:
-            if re.search(pattern, answer):
+        for matched in features.specific_matches:
+            if matched:
                 score += 0.1
 
-        # Vague indicators (bad)
-        vague_phrases = [
-            'multiple', 'various', 'several', 'many', 'some',
-            'exact number is not specified', 'approximately',
-            'it depends', 'varies', 'unclear'
-        ]
-
-        answer_lower = answer.lower()
-        for phrase in vague_phrases:
-            if phrase in answer_lower:
+        for phrase in VAGUE_PHRASES:
+            if phrase in features.phrases:
                 score -= 0.15
 
         return max(0, min(score, 1.0))
@@ -110,63 +250,42 @@ class APIResponseAnalyzer:
         if not sources:
             return 0.0
 
-        score = min(len(sources) * 0.2, 0.6)  # Base score for having sources
+        # The same page cited twice counts once
+        count, authoritative = source_summary(sources)
+        score = min(count * 0.2, 0.6)  # Base score for having sources
 
-        # Check for authoritative domains
-        authoritative_domains = ['.gov', '.edu', '.org', 'official', 'optum.com']
-        for source in sources:
-            url = source.get('url', '') if isinstance(source, dict) else str(source)
-            for domain in authoritative_domains:
-                if domain in url.lower():
-                    score += 0.1
-                    break
+        # Bonus for each authoritative domain (see source_index.AUTHORITY_TIERS)
+        for _ in range(authoritative):
+            score += 0.1
 
         return min(score, 1.0)
 
-    def score_confidence(self, answer: str) -> float:
+    def score_confidence(self, answer: str, features: AnswerFeatures = None) -> float:
         """Score the confidence level of the answer"""
+        features = features or AnswerFeatures(answer)
         score = 0.7  # Start with moderate confidence
 
-        # High confidence indicators
-        confident_phrases = ['specifically', 'exactly', 'definitely', 'clearly', 'total of']
-
-        # Low confidence indicators
-        uncertain_phrases = [
-            'may', 'might', 'possibly', 'appears', 'seems',
-            'not specified', 'unclear', 'approximately', 'about'
-        ]
-
-        answer_lower = answer.lower()
-
-        for phrase in confident_phrases:
-            if phrase in answer_lower:
+        for phrase in CONFIDENT_PHRASES:
+            if phrase in features.phrases:
                 score += 0.15
 
-        for phrase in uncertain_phrases:
-            if phrase in answer_lower:
+        for phrase in UNCERTAIN_PHRASES:
+            if phrase in features.phrases:
                 score -= 0.1
 
         return max(0, min(score, 1.0))
 
-    def score_actionability(self, answer: str) -> float:
+    def score_actionability(self, answer: str, features: AnswerFeatures = None) -> float:
         """Score how actionable the answer is"""
+        features = features or AnswerFeatures(answer)
         score = 0.5
 
-        # Actionable indicators
-        action_patterns = [
-            r'call \d{3}-\d{3}-\d{4}',  # Phone numbers
-            r'visit [a-zA-Z]+\.com',  # Website references
-            r'contact',
-            r'schedule',
-            r'locate'
-        ]
-
-        for pattern in action_patterns:
-            if re.search(pattern, answer, re.IGNORECASE):
+        for matched in features.action_matches:
+            if matched:
                 score += 0.2
 
         # Direct answer is actionable
-        if re.search(r'\d+ (locations?|offices?|centers?)', answer):
+        if features.has_location_count:
             score += 0.3
 
         return min(score, 1.0)
@@ -174,32 +293,11 @@ class APIResponseAnalyzer:
     def has_specific_names(self, answer: str) -> bool:
         """Check if answer contains specific location/entity names"""
         # Look for capitalized words (proper nouns)
-        proper_nouns = re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', answer)
-        return len(proper_nouns) > 2
+        return AnswerFeatures(answer).has_specific_names
 
     def determine_winner(self, metrics: Dict) -> str:
         """Determine which API gave the best response"""
-        api_scores = {}
-
-        for key in metrics:
-            if key.endswith("_metrics"):
-                api_name = key.replace("_metrics", "")
-                api_metrics = metrics[key]
-
-                # Calculate weighted score
-                score = (
-                    api_metrics["completeness_score"] * 0.3 +
-                    api_metrics["specificity_score"] * 0.25 +
-                    api_metrics["source_quality"] * 0.15 +
-                    api_metrics["confidence_level"] * 0.15 +
-                    api_metrics["actionability"] * 0.15
-                )
-
-                # Penalty for slow response
-                if api_metrics["response_time"] > 1.0:
-                    score *= 0.9
-
-                api_scores[api_name] = score
+        api_scores = api_weighted_scores(metrics)
 
         if not api_scores:
             return "none"
@@ -225,10 +323,236 @@ class APIResponseAnalyzer:
             reasons.append("confident answer")
         if winner_metrics.get("response_time", 999) < 0.5:
             reasons.append("fast response")
+        if winner_metrics.get("semantic_relevance", 0) > 0.7:
+            reasons.append("semantically relevant")
 
         return "; ".join(reasons) if reasons else "overall better quality"
 
 
+# Flat per-(query, API) metrics table, in analyze_response_quality's metric order
+METRIC_COLUMNS = [
+    'completeness_score', 'specificity_score', 'source_quality', 'response_time', 'word_count',
+    'has_numbers', 'has_specific_names', 'confidence_level', 'actionability'
+]
+
+
+def responses_frame(items: List[Tuple[str, Dict[str, Any]]]) -> pd.DataFrame:
+    """
+    Flatten (query, responses_by_api) pairs into one row per response.
+
+    Returns:
+        DataFrame with columns query_index, query, api, answer, sources,
+        response_time, plus semantic_relevance if add_semantic_relevance ran
+    """
+    rows = []
+    for query_index, (query, responses) in enumerate(items):
+        for api_name, response in responses.items():
+            rows.append(dict(response, query_index=query_index, query=query, api=api_name))
+    columns = ['query_index', 'query', 'api', 'answer', 'sources', 'response_time']
+    if rows and "semantic_relevance" in rows[0]:
+        columns.append("semantic_relevance")
+    frame = pd.DataFrame(rows, columns=columns)
+    # Object dtype keeps each response time's own type (e.g. int 0 for a
+    # missing time) instead of upcasting the column to float
+    frame['response_time'] = pd.Series([row.get('response_time') for row in rows], index=frame.index, dtype=object)
+    return frame
+
+
+def _pattern_column(texts: pd.Series, pattern: re.Pattern) -> np.ndarray:
+    """Vectorized pattern_occurs."""
+    candidates = np.ones(len(texts), dtype=bool)
+    if pattern in PATTERN_HINTS:
+        candidates = np.zeros(len(texts), dtype=bool)
+        for hint in PATTERN_HINTS[pattern]:
+            candidates |= texts.str.contains(hint, regex=False).to_numpy(dtype=bool)
+
+    matched = np.zeros(len(texts), dtype=bool)
+    matched[candidates] = texts[candidates].str.contains(pattern).to_numpy(dtype=bool)
+    return matched
+
+
+def _add_sequentially(score: np.ndarray, flags: np.ndarray, step: float) -> np.ndarray:
+    """score += step where flags, one step at a time as the per-answer scorer does."""
+    return np.where(flags, score + step, score)
+
+
+def _source_quality_column(sources: pd.Series) -> np.ndarray:
+    """Vectorized score_source_quality."""
+    summaries = sources.map(source_summary)
+    counts = np.array([count for count, _ in summaries], dtype=int)
+    hits = np.array([authoritative for _, authoritative in summaries], dtype=int)
+
+    score = np.minimum(counts * 0.2, 0.6)
+    step = 0
+    while step < hits.max(initial=0) and (score[hits > step] < 1.0).any():
+        score = _add_sequentially(score, hits > step, 0.1)
+        step += 1
+    return np.where(counts > 0, np.minimum(score, 1.0), 0.0)
+
+
+def score_responses_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compute every quality metric as a column over a responses_frame.
+
+    Scores are identical to analyze_response_quality's: each indicator is
+    one pandas string operation over all answers, and bonuses and
+    penalties are applied in the same order so floats round the same way.
+
+    Returns:
+        The frame's query_index, query and api columns plus METRIC_COLUMNS
+        (and semantic_relevance when the frame has it)
+    """
+    # Object dtype keeps Python's str.lower and re semantics (Arrow-backed
+    # strings lowercase and match some non-ASCII text differently)
+    answers = frame['answer'].fillna('').astype(str).astype(object)
+    lower = answers.str.lower()
+    n = len(frame)
+
+    phrases = {phrase: lower.str.contains(phrase, regex=False).to_numpy(dtype=bool) for phrase in ALL_PHRASES}
+    specific = [_pattern_column(answers, pattern) for pattern in SPECIFIC_PATTERNS]
+    # As in AnswerFeatures, ASCII answers skip IGNORECASE matching
+    is_ascii = answers.map(str.isascii).to_numpy(dtype=bool)
+    actions = []
+    for pattern, lowercase_pattern in zip(ACTION_PATTERNS, LOWERCASE_ACTION_PATTERNS):
+        matched = np.zeros(n, dtype=bool)
+        matched[is_ascii] = lower[is_ascii].str.contains(lowercase_pattern, regex=not isinstance(lowercase_pattern, str))
+        matched[~is_ascii] = answers[~is_ascii].str.contains(pattern)
+        actions.append(matched)
+    has_numbers = specific[0]
+    has_location_count = _pattern_column(answers, LOCATION_COUNT_PATTERN)
+    has_specific_names = answers.map(
+        lambda answer: sum(1 for _ in islice(PROPER_NOUN_PATTERN.finditer(answer), 3)) > 2
+    ).to_numpy(dtype=bool)
+
+    # Completeness: query keyword coverage, then the number and direct answer bonuses
+    keywords = frame['query'].map({
+        query: list(set(query.lower().split()) - STOP_WORDS) for query in frame['query'].unique()
+    })
+    completeness = np.array([
+        sum(1 for kw in kws if kw in answer_lower) / len(kws) if kws else 0.0
+        for kws, answer_lower in zip(keywords, lower)
+    ], dtype=float)
+    completeness = _add_sequentially(completeness, has_numbers, 0.2)
+    direct = (answers.str.strip() != '') & ~lower.str.startswith(("i don't", "i cannot", "the exact"))
+    completeness = np.minimum(_add_sequentially(completeness, direct.to_numpy(dtype=bool), 0.1), 1.0)
+
+    specificity = np.full(n, 0.5)
+    for matched in specific:
+        specificity = _add_sequentially(specificity, matched, 0.1)
+    for phrase in VAGUE_PHRASES:
+        specificity = _add_sequentially(specificity, phrases[phrase], -0.15)
+
+    confidence = np.full(n, 0.7)
+    for phrase in CONFIDENT_PHRASES:
+        confidence = _add_sequentially(confidence, phrases[phrase], 0.15)
+    for phrase in UNCERTAIN_PHRASES:
+        confidence = _add_sequentially(confidence, phrases[phrase], -0.1)
+
+    actionability = np.full(n, 0.5)
+    for matched in actions:
+        actionability = _add_sequentially(actionability, matched, 0.2)
+    actionability = np.minimum(_add_sequentially(actionability, has_location_count, 0.3), 1.0)
+
+    return pd.DataFrame({
+        'query_index': frame['query_index'].to_numpy(),
+        'query': frame['query'].to_numpy(),
+        'api': frame['api'].to_numpy(),
+        'completeness_score': completeness,
+        'specificity_score': np.maximum(0, np.minimum(specificity, 1.0)),
+        'source_quality': _source_quality_column(frame['sources']),
+        'response_time': pd.to_numeric(frame['response_time']).to_numpy(dtype=float),
+        'word_count': answers.map(lambda answer: len(answer.split())).to_numpy(dtype=int),
+        'has_numbers': has_numbers,
+        'has_specific_names': has_specific_names,
+        'confidence_level': np.maximum(0, np.minimum(confidence, 1.0)),
+        'actionability': actionability,
+        **({'semantic_relevance': frame['semantic_relevance'].to_numpy(dtype=float)}
+           if 'semantic_relevance' in frame else {})
+    })
+
+
+def pick_winners(metrics: pd.DataFrame, num_queries: int = None) -> pd.DataFrame:
+    """
+    Vectorized determine_winner and explain_win.
+
+    The weighted scores form a (query x API) matrix and the winner is its
+    row-wise argmax; ties go to the API that responded first, as with
+    max() over the per-query dict.
+
+    Returns:
+        One row per query_index with columns winner and win_reason
+    """
+    num_queries = num_queries if num_queries is not None else (
+        int(metrics['query_index'].max()) + 1 if len(metrics) else 0
+    )
+
+    weights = SEMANTIC_WINNER_WEIGHTS if 'semantic_relevance' in metrics else WINNER_WEIGHTS
+    weighted = np.zeros(len(metrics))
+    for index, (column, weight) in enumerate(weights):
+        term = metrics[column].to_numpy(dtype=float) * weight
+        weighted = term if index == 0 else weighted + term
+    weighted = np.where(metrics['response_time'].to_numpy() > 1.0, weighted * 0.9, weighted)
+
+    # A repeated API keeps its first position but its last response
+    scored = metrics.assign(weighted=weighted, row=np.arange(len(metrics)))
+    scored['slot'] = scored.groupby(['query_index', 'api'], sort=False)['row'].transform('first')
+    scored = scored.drop_duplicates(['query_index', 'api'], keep='last').sort_values(['query_index', 'slot'])
+    scored['slot'] = scored.groupby('query_index').cumcount()
+
+    matrix = np.full((num_queries, int(scored['slot'].max()) + 1 if len(scored) else 1), -np.inf)
+    matrix[scored['query_index'].to_numpy(dtype=int), scored['slot'].to_numpy(dtype=int)] = scored['weighted']
+    best_slot = matrix.argmax(axis=1)
+
+    best = scored.set_index(['query_index', 'slot'])
+    winners = pd.DataFrame({'query_index': np.arange(num_queries), 'slot': best_slot})
+    winners = winners.join(best, on=['query_index', 'slot'])
+    answered = winners['api'].notna()
+
+    checks = [
+        (winners['has_numbers'].astype(bool), "provides specific numbers"),
+        (winners['specificity_score'] > 0.7, "gives specific details"),
+        (winners['source_quality'] > 0.5, "has quality sources"),
+        (winners['confidence_level'] > 0.7, "confident answer"),
+        (winners['response_time'] < 0.5, "fast response")
+    ]
+    if 'semantic_relevance' in winners:
+        checks.append((winners['semantic_relevance'] > 0.7, "semantically relevant"))
+    reasons = np.array([
+        np.where(flags.to_numpy(dtype=bool), reason, '') for flags, reason in checks
+    ], dtype=object).T.reshape(num_queries, len(checks))
+
+    return pd.DataFrame({
+        'query_index': winners['query_index'],
+        'winner': winners['api'].where(answered, 'none'),
+        'win_reason': [
+            ("; ".join(r for r in row if r) or "overall better quality") if ok else "No clear winner"
+            for row, ok in zip(reasons, answered)
+        ]
+    })
+
+
+def results_from_frame(queries: List[str], frame: pd.DataFrame, metrics: pd.DataFrame,
+                       winners: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Rebuild analyze_response_quality's per-query dicts from the flat tables."""
+    results = [{"query": query} for query in queries]
+    # Raw response times keep their original type (e.g. int 0) in the dicts
+    columns = METRIC_COLUMNS + (['semantic_relevance'] if 'semantic_relevance' in metrics else [])
+    records = metrics[columns].assign(response_time=frame['response_time'].to_numpy()).to_dict('records')
+
+    for query_index, api_name, record in zip(metrics['query_index'], metrics['api'], records):
+        record['has_numbers'] = bool(record['has_numbers'])
+        record['has_specific_names'] = bool(record['has_specific_names'])
+        # max(0, ...) in the per-answer scorer yields int 0
+        for column in ('specificity_score', 'confidence_level'):
+            if record[column] == 0:
+                record[column] = 0
+        results[query_index][f"{api_name}_metrics"] = record
+    for result, winner, reason in zip(results, winners['winner'], winners['win_reason']):
+        result["winner"] = winner
+        result["win_reason"] = reason
+    return results
+
+
 def identify_use_cases(analysis_results: List[Dict]) -> Dict[str, List[str]]:
     """
     Identify specific use cases where each API excels
@@ -266,47 +590,130 @@ def identify_use_cases(analysis_results: List[Dict]) -> Dict[str, List[str]]:
     return use_cases
 
 
-def generate_quality_report(input_file: str, output_dir: str = "."):
+def organize_responses(item: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Collect each API's answer, sources and response time for one benchmark item"""
+    responses_by_api = {}
+    for response in item.get("responses", []):
+        api_name = response.get("api_name", "")
+        response_data_raw = response.get("response_data", {})
+
+        # Handle None response_data
+        if response_data_raw is None:
+            response_data_raw = {}
+
+        # Extract answer and sources based on API format
+        answer = response_data_raw.get("answer", "") or response_data_raw.get("content", "")
+        sources = response_data_raw.get("sources", [])
+
+        responses_by_api[api_name] = {
+            "answer": answer,
+            "sources": sources,
+            "response_time": response.get("response_time", 0)
+        }
+
+    return responses_by_api
+
+
+def add_semantic_relevance(items: List[Tuple[str, Dict[str, Any]]], scorer) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Scorer stage: set "semantic_relevance" on every response.
+
+    All (query, answer) pairs are scored in one call, so an embedding
+    scorer can batch them and reuse its cache. The score becomes a metric
+    and takes part in determine_winner's weighting.
+
+    Args:
+        items: (query, responses_by_api) pairs, updated in place
+        scorer: A semantic_relevance scorer (see create_semantic_scorer)
+    """
+    pairs = [(query, response) for query, responses in items for response in responses.values()]
+    scores = scorer.score_pairs([query for query, _ in pairs], [response["answer"] or "" for _, response in pairs])
+    for (_, response), score in zip(pairs, scores):
+        response["semantic_relevance"] = float(score)
+    return items
+
+
+def score_chunk(chunk: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Score a chunk of (query, responses_by_api) pairs; runs in worker processes"""
+    analyzer = APIResponseAnalyzer()
+    return [analyzer.analyze_response_quality(query, responses) for query, responses in chunk]
+
+
+def iter_chunks(items: Iterator, chunk_size: int) -> Iterator[List]:
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def score_items(items: Iterator[Tuple[str, Dict[str, Any]]], workers: int = 1,
+                chunk_size: int = QUALITY_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Score (query, responses_by_api) pairs, in input order.
+
+    With workers > 1 chunks are scored in a process pool. At most two
+    chunks per worker are in flight, so large inputs are still streamed.
+    """
+    if workers <= 1:
+        yield from score_chunk(items)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in iter_chunks(items, chunk_size):
+            pending.append(pool.submit(score_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def generate_quality_report(input_file: str, output_dir: str = ".", workers: int = 1, batch: bool = False,
+                            semantic: str = None):
     """
     Generate comprehensive quality analysis report
+
+    Args:
+        input_file: Benchmark results (JSON or JSONL)
+        output_dir: Where the reports are written
+        workers: Processes to score queries in; output is identical for any value
+        batch: Score all responses as columns with the vectorized path (split
+            across workers) and also write the flat quality_metrics.csv, one
+            typed row per query and API
+        semantic: Semantic relevance backend to score with first ('tfidf' or
+            'embedding'); None keeps keyword completeness only
     """
     output_dir = Path(output_dir)
     output_dir.mkdir(exist_ok=True)
 
-    # Load data
-    with open(input_file, 'r') as f:
-        data = json.load(f)
-
-    analyzer = APIResponseAnalyzer()
-    analysis_results = []
+    # Stream data (JSON, or JSONL read line by line)
+    data = iter_benchmark_items(input_file)
 
     # Analyze each query
-    for item in data:
-        query = item.get("query", "")
-
-        # Organize responses by API
-        responses_by_api = {}
-        for response in item.get("responses", []):
-            api_name = response.get("api_name", "")
-            response_data_raw = response.get("response_data", {})
-
-            # Handle None response_data
-            if response_data_raw is None:
-                response_data_raw = {}
-
-            # Extract answer and sources based on API format
-            answer = response_data_raw.get("answer", "") or response_data_raw.get("content", "")
-            sources = response_data_raw.get("sources", [])
-
-            responses_by_api[api_name] = {
-                "answer": answer,
-                "sources": sources,
-                "response_time": response.get("response_time", 0)
-            }
-
-        # Analyze quality
-        metrics = analyzer.analyze_response_quality(query, responses_by_api)
-        analysis_results.append(metrics)
+    items = ((item.get("query", ""), organize_responses(item)) for item in data)
+    if semantic:
+        from semantic_relevance import create_semantic_scorer
+        items = add_semantic_relevance(list(items), create_semantic_scorer(semantic))
+
+    if batch:
+        items = list(items)
+        frame = responses_frame(items)
+        if workers > 1 and len(frame) > 0:
+            bounds = np.linspace(0, len(frame), workers + 1).astype(int)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parts = pool.map(score_responses_frame, [frame.iloc[a:b] for a, b in zip(bounds, bounds[1:])])
+                metrics = pd.concat(list(parts), ignore_index=True)
+        else:
+            metrics = score_responses_frame(frame)
+        winners = pick_winners(metrics, len(items))
+        metrics.merge(winners, on='query_index').drop(columns='query_index').to_csv(
+            output_dir / "quality_metrics.csv", index=False
+        )
+        analysis_results = results_from_frame([query for query, _ in items], frame, metrics, winners)
+    else:
+        analysis_results = list(score_items(items, workers))
 
     # Generate reports
     # 1. Quality metrics CSV
@@ -346,6 +753,12 @@ def generate_quality_report(input_file: str, output_dir: str = "."):
     advantages_df = pd.DataFrame(advantages)
     advantages_df.to_csv(output_dir / "competitive_advantages.csv", index=False)
 
+    # 5. Pairwise win rates and ratings with bootstrap confidence intervals
+    from pairwise_ratings import compare_apis
+    ratings_df, pairwise_df = compare_apis(analysis_results)
+    ratings_df.to_csv(output_dir / "ratings.csv", index=False)
+    pairwise_df.to_csv(output_dir / "pairwise_win_rates.csv", index=False)
+
     # Print summary
     print("=== QUALITY ANALYSIS REPORT ===")
     print(f"\nTotal queries analyzed: {len(analysis_results)}")
@@ -358,17 +771,32 @@ def generate_quality_report(input_file: str, output_dir: str = "."):
     print(f"  • win_rates.csv - Summary of win rates")
     print(f"  • use_cases.txt - Identified use cases")
     print(f"  • competitive_advantages.csv - Where each API excels")
+    print(f"  • ratings.csv - Bradley-Terry ratings with bootstrap confidence intervals")
+    print(f"  • pairwise_win_rates.csv - Head-to-head win/tie/loss for each pair of APIs")
+    if batch:
+        print(f"  • quality_metrics.csv - Flat metrics for each query and API")
 
     return analysis_results
 
 
-# Example usage
-if __name__ == "__main__":
-    import sys
+def main():
+    parser = argparse.ArgumentParser(description='Score answer quality and identify where each API wins')
+    parser.add_argument('input_file', help='Benchmark results (JSON or JSONL)')
+    parser.add_argument('output_dir', nargs='?', default='quality_analysis',
+                        help='Where reports are written (default: quality_analysis)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Processes to score queries in (default: one per CPU)')
+    parser.add_argument('--batch', action='store_true',
+                        help='Score every response at once with vectorized pandas/NumPy operations '
+                             'and also write the flat quality_metrics.csv')
 
-    if len(sys.argv) > 1:
-        input_file = sys.argv[1]
-        output_dir = sys.argv[2] if len(sys.argv) > 2 else "quality_analysis"
-        generate_quality_report(input_file, output_dir)
-    else:
-        print("Usage: python quality_analyzer.py <input_json> [output_dir]")
+    parser.add_argument('--semantic', choices=['tfidf', 'embedding'], default=None,
+                        help='Also score query/answer semantic relevance with TF-IDF or a local embedding model '
+                             '(sentence-transformers; embeddings are cached)')
+
+    args = parser.parse_args()
+    generate_quality_report(args.input_file, args.output_dir, args.workers, args.batch, args.semantic)
+
+
+if __name__ == "__main__":
+    main()
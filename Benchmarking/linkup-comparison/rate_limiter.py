@@ -0,0 +1,235 @@
+"""Per-provider adaptive rate limiting and long-lived HTTP client pools."""
+import re
+import threading
+import time
+from typing import List, Dict, Any, Tuple
+
+# Starting requests/second per provider; the limiter probes upward from here
+# until a provider answers 429, then backs off.
+PROVIDER_RATE_LIMITS = {
+    'linkup_standard': 10.0,
+    'linkup_deep': 2.0,
+    'perplexity': 5.0,
+    'exa': 5.0,
+    'you': 10.0,
+    'tavily': 10.0,
+    'valyu': 5.0,
+}
+DEFAULT_RATE_LIMIT = 5.0
+MAX_RATE_MULTIPLIER = 4.0   # never probe beyond 4x the configured rate
+MIN_RATE = 0.1
+DEFAULT_RETRY_AFTER = 5.0
+
+THROTTLE_PATTERN = re.compile(r'\b429\b|too many requests|rate.?limit', re.IGNORECASE)
+
+
+def parse_throttle(response: Dict[str, Any]) -> Tuple[bool, float]:
+    """
+    Detect a throttled provider response.
+
+    Returns:
+        (throttled, retry_after_seconds or None)
+    """
+    if not response or response.get('success'):
+        return False, None
+
+    status = response.get('status_code')
+    throttled = status == 429 or bool(THROTTLE_PATTERN.search(str(response.get('error') or '')))
+    if not throttled:
+        return False, None
+
+    retry_after = response.get('retry_after')
+    headers = response.get('headers') or {}
+    for name, value in headers.items():
+        if name.lower() == 'retry-after':
+            retry_after = value
+    try:
+        return True, float(retry_after) if retry_after is not None else None
+    except (TypeError, ValueError):
+        # HTTP-date form of Retry-After; fall back to the default pause
+        return True, None
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket using reservations.
+
+    reserve() returns how long the caller must wait before its request, so
+    the bucket can be shared across threads and separate asyncio loops.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token and return the delay (seconds) before it may be used."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(delay, self.blocked_until - now)
+
+    def block_for(self, seconds: float):
+        """Hold every new reservation for at least the given number of seconds."""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self.rate = rate
+            self.capacity = max(1.0, rate)
+            self.tokens = min(self.tokens, self.capacity)
+
+
+class AdaptiveRateLimiter:
+    """
+    One token bucket per provider with AIMD rate adaptation.
+
+    Each successful call nudges the provider's rate up. A 429 halves it
+    and pauses the provider for Retry-After seconds (or a default).
+    """
+
+    def __init__(self, rates: Dict[str, float] = None, increase: float = 0.05):
+        self.base_rates = dict(PROVIDER_RATE_LIMITS, **(rates or {}))
+        self.increase = increase
+        self.buckets = {}
+        self.throttle_counts = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, api_name: str) -> TokenBucket:
+        with self._lock:
+            if api_name not in self.buckets:
+                self.buckets[api_name] = TokenBucket(self.base_rates.get(api_name, DEFAULT_RATE_LIMIT))
+                self.throttle_counts[api_name] = 0
+            return self.buckets[api_name]
+
+    def reserve(self, api_name: str) -> float:
+        """Reserve a request slot for a provider; returns seconds to wait first."""
+        return self._bucket(api_name).reserve()
+
+    def record(self, api_name: str, response: Dict[str, Any]) -> Tuple[bool, float]:
+        """
+        Adapt the provider's rate to a response.
+
+        Returns:
+            (throttled, seconds to wait before retrying)
+        """
+        bucket = self._bucket(api_name)
+        throttled, retry_after = parse_throttle(response)
+        base_rate = self.base_rates.get(api_name, DEFAULT_RATE_LIMIT)
+
+        if throttled:
+            pause = retry_after if retry_after is not None else DEFAULT_RETRY_AFTER
+            bucket.set_rate(max(MIN_RATE, bucket.rate / 2))
+            bucket.block_for(pause)
+            with self._lock:
+                self.throttle_counts[api_name] += 1
+            return True, pause
+
+        if response and response.get('success'):
+            bucket.set_rate(min(base_rate * MAX_RATE_MULTIPLIER, bucket.rate + self.increase * base_rate))
+        return False, 0.0
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Current rate and 429 count per provider."""
+        with self._lock:
+            return {
+                api_name: {
+                    'rate_per_second': round(bucket.rate, 3),
+                    'throttled': self.throttle_counts[api_name]
+                }
+                for api_name, bucket in self.buckets.items()
+            }
+
+
+class RateLimitedExecutor:
+    """
+    Wraps a QueryExecutor so every provider call first waits for a slot in
+    that provider's bucket, and throttled calls are retried after the
+    provider's Retry-After instead of being recorded as failures.
+    """
+
+    def __init__(self, executor, limiter: AdaptiveRateLimiter, max_throttle_retries: int = 3):
+        self.executor = executor
+        self.limiter = limiter
+        self.max_throttle_retries = max_throttle_retries
+
+    def __getattr__(self, name):
+        return getattr(self.executor, name)
+
+    def execute_single_query(self, query: str, apis: List[str], **options) -> List[Dict]:
+        """Execute a query across APIs within each provider's rate limit; options go to the executor."""
+        results = {}
+        pending = list(apis)
+
+        for attempt in range(self.max_throttle_retries + 1):
+            delay = max(self.limiter.reserve(api_name) for api_name in pending)
+            if delay > 0:
+                time.sleep(delay)
+
+            throttled = []
+            for response in self.executor.execute_single_query(query, pending, **options):
+                api_name = response.get('api_name')
+                results[api_name] = response
+                if self.limiter.record(api_name, response)[0]:
+                    throttled.append(api_name)
+
+            if not throttled or attempt == self.max_throttle_retries:
+                break
+            pending = throttled
+
+        return [results[api_name] for api_name in apis if api_name in results]
+
+
+class ProviderClientPool:
+    """
+    Long-lived httpx clients, one per provider, with keep-alive and HTTP/2
+    when the optional `h2` package is installed.
+    """
+
+    def __init__(self, max_connections: int = 20, keepalive_expiry: float = 60.0, timeout: float = 30.0):
+        self.max_connections = max_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self.clients = {}
+        self._lock = threading.Lock()
+
+        try:
+            import h2  # noqa: F401
+            self.http2 = True
+        except ImportError:
+            self.http2 = False
+
+    def get(self, api_name: str):
+        """Get (creating on first use) the shared client for a provider."""
+        import httpx
+
+        with self._lock:
+            client = self.clients.get(api_name)
+            if client is None:
+                client = httpx.Client(
+                    http2=self.http2,
+                    timeout=self.timeout,
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections,
+                        keepalive_expiry=self.keepalive_expiry
+                    )
+                )
+                self.clients[api_name] = client
+            return client
+
+    def close(self):
+        """Close every pooled client."""
+        with self._lock:
+            for client in self.clients.values():
+                client.close()
+            self.clients = {}
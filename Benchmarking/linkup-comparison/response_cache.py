@@ -0,0 +1,211 @@
+"""Persistent provider response cache with per-category TTLs and LRU eviction."""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterator
+
+from config import Config
+
+# Seconds a cached answer stays valid, by queries.json category
+CATEGORY_TTLS = {
+    'real-time': 5 * 60,
+    'factual': 7 * 24 * 3600,
+    'technical': 7 * 24 * 3600,
+    'comparative': 24 * 3600,
+    'complex-reasoning': 24 * 3600,
+}
+DEFAULT_TTL = 6 * 3600
+MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '50000'))
+
+
+def normalize_query(query: str) -> str:
+    """Normalize query text so trivially different spellings share a cache entry."""
+    return " ".join(query.lower().split())
+
+
+def cache_key(api_name: str, query: str, params: Dict[str, Any] = None) -> str:
+    """Hash (api, normalized query, request params) into a cache key."""
+    raw = json.dumps([api_name, normalize_query(query), params or {}], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite-backed cache of successful provider responses.
+
+    Entries expire after their category's TTL and the least recently used
+    entries are evicted once max_entries is exceeded.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            api_name TEXT NOT NULL,
+            query TEXT NOT NULL,
+            category TEXT,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_cache_last_access ON responses(last_access);
+    """
+
+    def __init__(self, db_path: str = None, max_entries: int = None, ttls: Dict[str, int] = None):
+        if db_path is None:
+            cache_dir = '/tmp/data' if os.getenv('VERCEL') else Config.RESULTS_DIR
+            os.makedirs(cache_dir, exist_ok=True)
+            db_path = os.path.join(cache_dir, 'response_cache.db')
+        self.db_path = db_path
+        self.max_entries = max_entries or MAX_ENTRIES
+        self.ttls = ttls or CATEGORY_TTLS
+
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'stores': 0, 'evictions': 0}
+
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a transaction on the cache database."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _count(self, stat: str, amount: int = 1):
+        with self._lock:
+            self.stats[stat] += amount
+
+    def ttl_for(self, category: str = None) -> int:
+        """Get the TTL in seconds for a query category."""
+        return self.ttls.get(category, DEFAULT_TTL)
+
+    def get(self, api_name: str, query: str, params: Dict[str, Any] = None) -> Dict:
+        """Get a cached response, or None on a miss or expired entry."""
+        key = cache_key(api_name, query, params)
+        now = time.time()
+
+        with self._connect() as conn:
+            row = conn.execute('SELECT response, expires_at FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self._count('misses')
+                return None
+
+            if row['expires_at'] <= now:
+                conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self._count('expired')
+                self._count('misses')
+                return None
+
+            conn.execute('UPDATE responses SET last_access = ? WHERE key = ?', (now, key))
+
+        self._count('hits')
+        return json.loads(row['response'])
+
+    def put(self, api_name: str, query: str, response: Dict, category: str = None,
+            params: Dict[str, Any] = None):
+        """Store a response and evict least recently used entries beyond max_entries."""
+        now = time.time()
+
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO responses '
+                '(key, api_name, query, category, response, created_at, expires_at, last_access) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (cache_key(api_name, query, params), api_name, normalize_query(query), category,
+                 json.dumps(response, default=str), now, now + self.ttl_for(category), now)
+            )
+
+            overflow = conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    'DELETE FROM responses WHERE key IN '
+                    '(SELECT key FROM responses ORDER BY last_access LIMIT ?)', (overflow,)
+                )
+                self._count('evictions', overflow)
+
+        self._count('stores')
+
+    def clear(self):
+        """Remove every cached response."""
+        with self._connect() as conn:
+            conn.execute('DELETE FROM responses')
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters for this process plus current cache size."""
+        with self._connect() as conn:
+            entries = conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+        with self._lock:
+            stats = dict(self.stats)
+
+        lookups = stats['hits'] + stats['misses']
+        stats.update(
+            entries=entries,
+            max_entries=self.max_entries,
+            hit_rate=round(stats['hits'] / lookups * 100, 2) if lookups else 0.0
+        )
+        return stats
+
+
+class CachedExecutor:
+    """
+    Wraps a QueryExecutor so repeated (api, query, params) calls are served
+    from a ResponseCache instead of re-billing the provider.
+    """
+
+    def __init__(self, executor, cache: ResponseCache, query_db=None, params: Dict[str, Any] = None):
+        self.executor = executor
+        self.cache = cache
+        self.params = params
+        self._categories = {}
+        if query_db is not None:
+            self._categories = {
+                normalize_query(q['query']): q.get('category') for q in query_db.get_all_queries()
+            }
+
+    def __getattr__(self, name):
+        # Everything except execute_single_query goes straight to the executor
+        return getattr(self.executor, name)
+
+    def request_params(self, api_name: str) -> Dict[str, Any]:
+        """
+        Parameters that shape an API's response, keying its cache entries:
+        the executor's own request options for it (e.g. model or search
+        depth), when it reports them, plus any given to this wrapper.
+        """
+        executor_params = getattr(self.executor, 'request_params', None)
+        params = dict(executor_params(api_name)) if callable(executor_params) else {}
+        params.update(self.params or {})
+        return params
+
+    def execute_single_query(self, query: str, apis: List[str]) -> List[Dict]:
+        """Execute a query across APIs, only calling providers on cache misses."""
+        params = {api_name: self.request_params(api_name) for api_name in apis}
+        cached = {}
+        for api_name in apis:
+            response = self.cache.get(api_name, query, params[api_name])
+            if response is not None:
+                cached[api_name] = dict(response, query=query, cached=True)
+
+        missing = [api_name for api_name in apis if api_name not in cached]
+        fresh = {}
+        if missing:
+            category = self._categories.get(normalize_query(query))
+            for response in self.executor.execute_single_query(query, missing):
+                fresh[response.get('api_name')] = response
+                if response.get('success'):
+                    api_name = response.get('api_name')
+                    self.cache.put(api_name, query, response, category, params.get(api_name))
+
+        return [cached.get(api_name) or fresh.get(api_name) for api_name in apis
+                if api_name in cached or api_name in fresh]
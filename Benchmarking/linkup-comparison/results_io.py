@@ -0,0 +1,330 @@
+"""Line-delimited (JSONL) results files, written incrementally and read as streams."""
+import gzip
+import hashlib
+import io
+import json
+import os
+import tempfile
+import zlib
+from typing import Dict, Iterator, Any, List
+
+JSONL_EXTENSIONS = ('.jsonl', '.jsonl.gz', '.jsonl.zst')
+COMPRESSED_EXTENSIONS = ('.gz', '.zst')
+# Leading bytes skipped when sniffing whether a JSON file holds a list or an object
+JSON_WHITESPACE = b' \t\r\n\xef\xbb\xbf'
+
+# Decompressed bytes read at a time when streaming results files
+READ_CHUNK_SIZE = 64 * 1024
+# zlib window bits selecting the gzip container
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+# Non-response lines written by ResultsDatabase run files
+CONTROL_RECORD_TYPES = ('run', 'run_resume', 'run_end')
+
+
+def ijson_available() -> bool:
+    try:
+        import ijson  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def is_jsonl(path: str) -> bool:
+    """Check whether a path names a (possibly compressed) JSONL file."""
+    return str(path).endswith(JSONL_EXTENSIONS)
+
+
+def open_results_file(path: str, mode: str = 'rt'):
+    """
+    Open a results file, transparently handling gzip and zstd compression.
+
+    zstd needs the optional `zstandard` package.
+    """
+    path = str(path)
+    text = 't' in mode
+    binary_mode = mode.replace('t', '').replace('b', '') + 'b'
+
+    if path.endswith('.gz'):
+        return gzip.open(path, mode if text else binary_mode, encoding='utf-8' if text else None)
+
+    if path.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("Reading or writing .zst results requires the 'zstandard' package")
+        raw = zstandard.open(path, binary_mode)
+        return io.TextIOWrapper(raw, encoding='utf-8') if text else raw
+
+    return open(path, mode, encoding='utf-8' if text else None)
+
+
+def _salvage(decompressor, data: bytes) -> bytes:
+    """Output of the longest prefix of data that decompresses without error."""
+    good, bad = 0, len(data)
+    while bad - good > 1:
+        middle = (good + bad) // 2
+        try:
+            decompressor.copy().decompress(data[:middle])
+            good = middle
+        except zlib.error:
+            bad = middle
+    return decompressor.decompress(data[:good])
+
+
+def _iter_gzip_chunks(path: str) -> Iterator[bytes]:
+    """
+    Yield the decompressed data of every gzip member in turn.
+
+    Decompression stops at the first truncated or corrupt byte, e.g. where a
+    member left unterminated by a crash runs into the next one, after
+    yielding everything that precedes it.
+    """
+    with open(path, 'rb') as f:
+        decompressor = zlib.decompressobj(GZIP_WBITS)
+        data = f.read(READ_CHUNK_SIZE)
+        while data:
+            checkpoint = decompressor.copy()
+            try:
+                chunk = decompressor.decompress(data)
+            except zlib.error:
+                yield _salvage(checkpoint, data)
+                return
+            yield chunk
+            if decompressor.eof:
+                # Start of the next member, if any
+                data = decompressor.unused_data
+                decompressor = zlib.decompressobj(GZIP_WBITS)
+            else:
+                data = b''
+            data = data or f.read(READ_CHUNK_SIZE)
+
+
+def _iter_chunks(path: str) -> Iterator[bytes]:
+    """Yield the decompressed contents of a results file, ending early at a truncated compressed block."""
+    path = str(path)
+    if path.endswith('.gz'):
+        yield from _iter_gzip_chunks(path)
+        return
+
+    with open_results_file(path, 'rb') as f:
+        errors = (EOFError,)
+        if path.endswith('.zst'):
+            import zstandard
+            errors += (zstandard.ZstdError,)
+        try:
+            for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b''):
+                yield chunk
+        except errors:
+            return
+
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield one record per line.
+
+    A partially written line (left by a crash mid-run) is skipped and a
+    truncated or corrupt compressed block ends the stream instead of
+    raising, so every line decoded before it is kept.
+    """
+    pending = b''
+    for chunk in _iter_chunks(path):
+        lines = (pending + chunk).split(b'\n')
+        pending = lines.pop()
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+
+    try:
+        if pending.strip():
+            yield json.loads(pending)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        pass
+
+
+def text_key(text: str) -> bytes:
+    """Fixed-size digest of a text, for indexes that should not hold every string."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+def response_key(record: Dict[str, Any]):
+    """Identify a checkpointed (query_id, api_name) pair, or None for untagged responses."""
+    if 'query_id' not in record:
+        return None
+    return record['query_id'], record.get('api_name')
+
+
+def iter_run_responses(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the responses of a JSONL run file, skipping control lines.
+
+    A resumed run can hold several records for the same (query_id, api_name)
+    pair, e.g. a failure followed by a successful rerun; only the latest is
+    yielded. This takes two streaming passes, keeping just one index per pair.
+    """
+    def responses():
+        return (r for r in iter_jsonl(path) if r.get('type') not in CONTROL_RECORD_TYPES)
+
+    latest = {}
+    keyed = 0
+    for i, record in enumerate(responses()):
+        key = response_key(record)
+        if key is not None:
+            latest[key] = i
+            keyed += 1
+
+    superseded = keyed != len(latest)
+    for i, record in enumerate(responses()):
+        key = response_key(record)
+        if not superseded or key is None or latest[key] == i:
+            yield record
+
+
+def run_finished(path: str) -> bool:
+    """Whether a JSONL run's last control line is its run_end footer, i.e. no session is still writing it."""
+    last = None
+    for record in iter_jsonl(path):
+        if record.get('type') in CONTROL_RECORD_TYPES:
+            last = record['type']
+    return last == 'run_end'
+
+
+class JSONLWriter:
+    """Appends one JSON record per line, flushing after each so a crash loses nothing written."""
+
+    def __init__(self, path: str, append: bool = False):
+        self.path = str(path)
+        if append and self.path.endswith(COMPRESSED_EXTENSIONS) and os.path.exists(self.path):
+            self._rewrite_readable()
+        self._file = open_results_file(self.path, 'at' if append else 'wt')
+        if append:
+            # Terminate any partial line left by an interrupted writer
+            self._file.write('\n')
+
+    def _rewrite_readable(self):
+        """
+        Replace a compressed file with a cleanly terminated copy of its readable records.
+
+        An interrupted writer leaves its last compressed stream unterminated;
+        a stream appended after it would make everything from that point on
+        unreadable, so the copy is swapped in before appending.
+        """
+        tmp_path = self.path + '.tmp' + self.path[self.path.rindex('.'):]
+        with open_results_file(tmp_path, 'wt') as f:
+            for record in iter_jsonl(self.path):
+                f.write(json.dumps(record, default=str) + '\n')
+        os.replace(tmp_path, self.path)
+
+    def write(self, record: Dict[str, Any]):
+        """Write and flush a single record."""
+        self._file.write(json.dumps(record, default=str) + '\n')
+        self._file.flush()
+
+    def close(self):
+        """Close the underlying file."""
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def load_json_records(path: str) -> List[Dict[str, Any]]:
+    """Load every record of a JSON results file at once."""
+    with open_results_file(path, 'rt') as f:
+        data = json.load(f)
+    if isinstance(data, dict) and 'results' in data:
+        return data['results']
+    return data if isinstance(data, list) else [data]
+
+
+def iter_json_records(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the records of a JSON results file: the items of a top-level list,
+    the 'results' of a ResultsDatabase run, or a single item.
+
+    With the optional `ijson` package the file is parsed incrementally, so
+    only one record is held in memory at a time; without it the whole file
+    is loaded first.
+    """
+    if not ijson_available():
+        yield from load_json_records(path)
+        return
+
+    import ijson
+
+    with open_results_file(path, 'rb') as f:
+        head = f.read(64).lstrip(JSON_WHITESPACE)
+        while not head:
+            chunk = f.read(64)
+            if not chunk:
+                break
+            head = chunk.lstrip(JSON_WHITESPACE)
+
+    prefix = 'item' if head.startswith(b'[') else 'results.item'
+    found = False
+    with open_results_file(path, 'rb') as f:
+        for record in ijson.items(f, prefix, use_float=True):
+            found = True
+            yield record
+
+    # A single item (or a run without results) is small enough to load whole
+    if not found and prefix == 'results.item':
+        yield from load_json_records(path)
+
+
+def _group_key(record: Dict[str, Any]) -> bytes:
+    """Digest of the query a flat response belongs to: its query_id, else its text."""
+    if 'query_id' in record:
+        return text_key(f"id:{record['query_id']}")
+    return text_key(f"query:{record.get('query', '')}")
+
+
+def iter_benchmark_items(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield {'query', 'responses'} items from any supported results file.
+
+    Supports:
+        - a JSON list of items (or a single item)
+        - a ResultsDatabase JSON run ({'run_id', ..., 'results': [...]})
+          JSON is parsed incrementally when `ijson` is installed
+        - JSONL with one item per line
+        - JSONL with one response per line (e.g. written by ResultsDatabase),
+          grouped into one item per query_id (or query text) across the
+          whole file, since a runner writes responses as they complete
+
+    Flat responses are spooled to a temporary file with, per query, a
+    16-byte digest and the offsets of its lines, so only the index stays in
+    memory. Items are yielded in order of each query's first response.
+    """
+    records = iter_run_responses(path) if is_jsonl(path) else iter_json_records(path)
+
+    offsets = {}  # _group_key(record) -> spool offsets of its responses
+    with tempfile.TemporaryFile('w+', encoding='utf-8') as spool:
+        for record in records:
+            # Run header/footer lines carry no responses
+            if record.get('type') in CONTROL_RECORD_TYPES:
+                continue
+
+            if 'responses' in record:
+                yield record
+                continue
+
+            key = _group_key(record)
+            offsets.setdefault(key, []).append(spool.tell())
+            spool.write(json.dumps(record, default=str) + '\n')
+
+        for group in offsets.values():
+            responses = []
+            for offset in group:
+                spool.seek(offset)
+                responses.append(json.loads(spool.readline()))
+            yield {'query': responses[0].get('query', ''), 'responses': responses}
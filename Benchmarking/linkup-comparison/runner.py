@@ -0,0 +1,118 @@
+"""Checkpointed benchmark execution with resume and targeted reruns."""
+import time
+from typing import List, Dict, Any, Callable
+
+from config import Config
+from fanout import FanOutEngine
+
+
+class CheckpointedRunner:
+    """
+    Executes database queries across APIs, persisting each (query_id, api)
+    response the moment it completes.
+
+    Runs are stored as JSONL through ResultsDatabase.open_run, so an
+    interrupted run can be resumed by run_id and only missing pairs are
+    executed again.
+    """
+
+    def __init__(self, executor, query_db, results_db, engine: FanOutEngine = None):
+        self.executor = executor
+        self.query_db = query_db
+        self.results_db = results_db
+        self.engine = engine or FanOutEngine(executor)
+
+    def _completed_pairs(self, run_id: str) -> Dict[tuple, bool]:
+        """Map each (query_id, api_name) already in a run to whether it succeeded."""
+        completed = {}
+        for result in self.results_db.iter_results(run_id):
+            if 'query_id' in result:
+                completed[(result['query_id'], result.get('api_name'))] = bool(result.get('success'))
+        return completed
+
+    def plan(self, query_ids: List[int] = None, api_names: List[str] = None,
+             run_id: str = None, resume: bool = False,
+             rerun_failures_for: List[str] = None) -> List[tuple]:
+        """
+        Work out which (query, api_name) pairs still need to run.
+
+        Args:
+            query_ids: Query IDs to run, or None for every query
+            api_names: APIs to run, or None for every available API
+            run_id: Existing run to resume or patch
+            resume: Skip pairs already recorded in run_id
+            rerun_failures_for: Only rerun pairs for these APIs that did not
+                succeed in run_id; successful calls are never repeated
+
+        Returns:
+            List of (query dict, api_name) pairs
+        """
+        if query_ids:
+            queries = [q for q in (self.query_db.get_query_by_id(qid) for qid in query_ids) if q]
+        else:
+            queries = self.query_db.get_all_queries()
+
+        if rerun_failures_for:
+            api_names = rerun_failures_for
+        elif not api_names:
+            api_names = Config.get_available_apis()
+
+        completed = self._completed_pairs(run_id) if run_id and (resume or rerun_failures_for) else {}
+
+        pairs = []
+        for query in queries:
+            for api_name in api_names:
+                key = (query['id'], api_name)
+                if rerun_failures_for and completed.get(key):
+                    continue
+                if resume and not rerun_failures_for and key in completed:
+                    continue
+                pairs.append((query, api_name))
+
+        return pairs
+
+    def run(self, query_ids: List[int] = None, api_names: List[str] = None,
+            run_id: str = None, resume: bool = False,
+            rerun_failures_for: List[str] = None,
+            on_response: Callable[[Dict, int, int], None] = None) -> Dict[str, Any]:
+        """
+        Execute the planned pairs, checkpointing every response.
+
+        Args:
+            query_ids, api_names, run_id, resume, rerun_failures_for: See plan()
+            on_response: Optional callback(response, completed, total) invoked
+                after each response is persisted
+
+        Returns:
+            Summary dictionary for the work done in this call
+        """
+        pairs = self.plan(query_ids, api_names, run_id, resume, rerun_failures_for)
+        start_time = time.time()
+        successful = failed = 0
+
+        with self.results_db.open_run(run_id, resume=bool(resume or rerun_failures_for)) as writer:
+            work = [(query['query'], api_name) for query, api_name in pairs]
+
+            for completed, (index, response) in enumerate(self.engine.iter_pairs(work), 1):
+                query, _ = pairs[index]
+                response = dict(response, query_id=query['id'], category=query.get('category'))
+                writer.append(response)
+
+                if response.get('success'):
+                    successful += 1
+                else:
+                    failed += 1
+
+                if on_response:
+                    on_response(response, completed, len(pairs))
+
+        return {
+            'run_id': writer.run_id,
+            'total_queries': len(set(query['id'] for query, _ in pairs)),
+            'total_responses': successful + failed,
+            'total_time': time.time() - start_time,
+            'apis_used': sorted(set(api_name for _, api_name in pairs)),
+            'successful': successful,
+            'failed': failed,
+            'results_file': writer.filepath
+        }
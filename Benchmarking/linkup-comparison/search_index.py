@@ -0,0 +1,153 @@
+"""Inverted full-text index over benchmark queries and answers."""
+import math
+import re
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from heapq import nlargest
+from typing import List, Dict, Tuple, Iterable
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Matches in the query text count for more than matches inside an answer
+FIELD_WEIGHTS = {'query': 2.0}
+# Most frequent terms a prefix expands to; rarer completions add few rows
+MAX_PREFIX_EXPANSIONS = 500
+# Postings scored per expanded prefix, so a keystroke's work is bounded by results, not vocabulary
+MAX_PREFIX_POSTINGS = 20000
+# Shorter trailing words are matched exactly rather than expanded
+MIN_PREFIX_LENGTH = 3
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric terms."""
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+class InvertedIndex:
+    """
+    Term -> postings index over (row, field) documents with BM25 ranking.
+
+    Each row of the benchmark results contributes one document for the
+    query text and one per API answer. Searches return rows, so a row
+    matches when every search term appears in at least one of its fields.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(dict)  # term -> {doc_id: term frequency}
+        self.doc_keys = []                 # doc_id -> (row, field)
+        self.doc_lengths = []
+        self.vocabulary = []
+        self.avg_doc_length = 0.0
+
+    def add(self, row: int, field: str, text: str):
+        """Index one field of one row."""
+        terms = tokenize(text)
+        if not terms:
+            return
+
+        doc_id = len(self.doc_keys)
+        self.doc_keys.append((row, field))
+        self.doc_lengths.append(len(terms))
+
+        for term, count in Counter(terms).items():
+            self.postings[term][doc_id] = count
+
+    def finalize(self):
+        """Freeze the index after all documents have been added."""
+        self.postings = dict(self.postings)
+        self.vocabulary = sorted(self.postings)
+        self.avg_doc_length = sum(self.doc_lengths) / len(self.doc_lengths) if self.doc_lengths else 0.0
+
+    def expand_prefix(self, prefix: str) -> List[str]:
+        """
+        Get indexed terms starting with prefix, so partially typed words still match.
+
+        Prefixes shorter than MIN_PREFIX_LENGTH only match themselves. Longer
+        ones keep their most frequent completions (the prefix itself first,
+        if indexed), up to MAX_PREFIX_EXPANSIONS terms and MAX_PREFIX_POSTINGS
+        postings in total.
+        """
+        if len(prefix) < MIN_PREFIX_LENGTH:
+            return [prefix]
+
+        start = bisect_left(self.vocabulary, prefix)
+        end = bisect_left(self.vocabulary, prefix + '\U0010ffff', lo=start)
+        matches = nlargest(MAX_PREFIX_EXPANSIONS, self.vocabulary[start:end],
+                           key=lambda term: len(self.postings[term]))
+        if prefix in self.postings:
+            # The word as typed so far always counts
+            matches = [prefix] + [term for term in matches if term != prefix]
+
+        expanded = []
+        total = 0
+        for term in matches:
+            total += len(self.postings[term])
+            if expanded and total > MAX_PREFIX_POSTINGS:
+                break
+            expanded.append(term)
+        return expanded
+
+    def _score_term(self, terms: Iterable[str], fields) -> Dict[int, list]:
+        """BM25 contribution of one search term, summed per row."""
+        total_docs = len(self.doc_keys)
+        row_scores = {}
+
+        for term in terms:
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+
+            for doc_id, tf in postings.items():
+                row, field = self.doc_keys[doc_id]
+                if fields is not None and field not in fields:
+                    continue
+                norm = 1 - self.b + self.b * self.doc_lengths[doc_id] / self.avg_doc_length
+                score = idf * tf * (self.k1 + 1) / (tf + self.k1 * norm) * FIELD_WEIGHTS.get(field, 1.0)
+
+                entry = row_scores.setdefault(row, [0.0, set()])
+                entry[0] += score
+                entry[1].add(field)
+
+        return row_scores
+
+    def search(self, text: str, fields: Iterable[str] = None, limit: int = None) -> List[Tuple[int, float, List[str]]]:
+        """
+        Find rows containing every term of text.
+
+        Args:
+            text: Search text; the last term is treated as a prefix
+            fields: Restrict matches to these fields ('query' or API names)
+            limit: Maximum number of rows to return
+
+        Returns:
+            List of (row, score, matched_fields) sorted by descending score
+        """
+        terms = tokenize(text)
+        if not terms:
+            return []
+        fields = set(fields) if fields is not None else None
+
+        results = None
+        for i, term in enumerate(terms):
+            expanded = self.expand_prefix(term) if i == len(terms) - 1 else [term]
+            term_scores = self._score_term(expanded, fields)
+
+            if results is None:
+                results = term_scores
+            else:
+                results = {
+                    row: [entry[0] + term_scores[row][0], entry[1] | term_scores[row][1]]
+                    for row, entry in results.items()
+                    if row in term_scores
+                }
+            if not results:
+                return []
+
+        ranked = sorted(
+            ((row, score, sorted(matched)) for row, (score, matched) in results.items()),
+            key=lambda hit: (-hit[1], hit[0])
+        )
+        return ranked[:limit] if limit else ranked
@@ -0,0 +1,201 @@
+"""Query/answer semantic relevance scorers (TF-IDF or a local embedding model) with an embedding cache."""
+import hashlib
+import math
+import os
+import re
+import sqlite3
+from collections import Counter
+from contextlib import contextmanager
+from typing import List, Dict, Iterator
+
+import numpy as np
+
+# Any sentence-transformers model name or local path; small CPU models work well
+SEMANTIC_MODEL = os.getenv('SEMANTIC_MODEL', 'sentence-transformers/all-MiniLM-L6-v2')
+EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', '64'))
+SEMANTIC_BACKENDS = ('tfidf', 'embedding')
+
+TOKEN_PATTERN = re.compile(r'\w+')
+# Keys per SELECT ... IN (...), under SQLite's bound parameter limit
+LOOKUP_CHUNK = 500
+
+
+def sentence_transformers_available() -> bool:
+    try:
+        import sentence_transformers  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def embedding_key(model_name: str, text: str) -> str:
+    """Hash (model, text) into a cache key."""
+    return hashlib.sha256(f"{model_name}\0{text}".encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed store of text embeddings keyed by content hash.
+
+    Entries never expire: an embedding only depends on the model and the
+    exact text, so rerunning over the same answers reads every vector back.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS embeddings (
+            key TEXT PRIMARY KEY,
+            model TEXT NOT NULL,
+            dim INTEGER NOT NULL,
+            vector BLOB NOT NULL
+        );
+    """
+
+    def __init__(self, db_path: str = None):
+        if db_path is None:
+            from config import Config
+
+            cache_dir = '/tmp/data' if os.getenv('VERCEL') else Config.RESULTS_DIR
+            os.makedirs(cache_dir, exist_ok=True)
+            db_path = os.path.join(cache_dir, 'embedding_cache.db')
+        self.db_path = db_path
+        self.stats = {'hits': 0, 'misses': 0}
+
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a transaction on the cache database."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_many(self, model_name: str, texts: List[str]) -> Dict[str, np.ndarray]:
+        """Get cached embeddings for texts; missing texts are left out."""
+        keys = {embedding_key(model_name, text): text for text in texts}
+        found = {}
+
+        with self._connect() as conn:
+            key_list = list(keys)
+            for start in range(0, len(key_list), LOOKUP_CHUNK):
+                chunk = key_list[start:start + LOOKUP_CHUNK]
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for key, vector in rows:
+                    found[keys[key]] = np.frombuffer(vector, dtype=np.float32)
+
+        self.stats['hits'] += len(found)
+        self.stats['misses'] += len(keys) - len(found)
+        return found
+
+    def put_many(self, model_name: str, embeddings: Dict[str, np.ndarray]):
+        """Store embeddings for texts."""
+        with self._connect() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO embeddings (key, model, dim, vector) VALUES (?, ?, ?, ?)',
+                [(embedding_key(model_name, text), model_name, len(vector),
+                  np.asarray(vector, dtype=np.float32).tobytes())
+                 for text, vector in embeddings.items()]
+            )
+
+
+class TfidfRelevance:
+    """
+    Cosine similarity of TF-IDF vectors.
+
+    IDF is fitted on the queries and answers being scored, so scores are
+    relative to that corpus. Cheap enough that nothing is cached.
+    """
+
+    name = 'tfidf'
+
+    def score_pairs(self, queries: List[str], answers: List[str]) -> np.ndarray:
+        """Relevance of each answer to its query, between 0 and 1."""
+        counts = {}
+        for text in list(queries) + list(answers):
+            if text not in counts:
+                counts[text] = Counter(TOKEN_PATTERN.findall(text.lower()))
+
+        document_frequency = Counter()
+        for terms in counts.values():
+            document_frequency.update(terms.keys())
+        # Smoothed IDF, as in scikit-learn's TfidfVectorizer
+        idf = {term: math.log((1 + len(counts)) / (1 + df)) + 1 for term, df in document_frequency.items()}
+        norms = {
+            text: math.sqrt(sum((tf * idf[term]) ** 2 for term, tf in terms.items()))
+            for text, terms in counts.items()
+        }
+
+        scores = np.zeros(len(queries))
+        for i, (query, answer) in enumerate(zip(queries, answers)):
+            if not norms[query] or not norms[answer]:
+                continue
+            query_terms, answer_terms = counts[query], counts[answer]
+            if len(answer_terms) < len(query_terms):
+                query_terms, answer_terms = answer_terms, query_terms
+            dot = sum(tf * answer_terms[term] * idf[term] ** 2
+                      for term, tf in query_terms.items() if term in answer_terms)
+            scores[i] = dot / (norms[query] * norms[answer])
+        return scores
+
+
+class EmbeddingRelevance:
+    """
+    Cosine similarity of sentence embeddings from a local CPU model.
+
+    Needs the optional `sentence-transformers` package. Only texts missing
+    from the cache are embedded, in batches of batch_size.
+    """
+
+    name = 'embedding'
+
+    def __init__(self, model_name: str = None, cache: EmbeddingCache = None, batch_size: int = None):
+        self.model_name = model_name or SEMANTIC_MODEL
+        self.cache = cache or EmbeddingCache()
+        self.batch_size = batch_size or EMBEDDING_BATCH_SIZE
+        self._model = None
+
+    def _load_model(self):
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(self.model_name, device='cpu')
+        return self._model
+
+    def embed(self, texts: List[str]) -> Dict[str, np.ndarray]:
+        """Get unit-length embeddings for texts, from the cache where possible."""
+        unique = list(dict.fromkeys(texts))
+        embeddings = self.cache.get_many(self.model_name, unique)
+
+        missing = [text for text in unique if text not in embeddings]
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            vectors = self._load_model().encode(batch, batch_size=self.batch_size, normalize_embeddings=True)
+            computed = dict(zip(batch, np.asarray(vectors, dtype=np.float32)))
+            self.cache.put_many(self.model_name, computed)
+            embeddings.update(computed)
+
+        return embeddings
+
+    def score_pairs(self, queries: List[str], answers: List[str]) -> np.ndarray:
+        """Relevance of each answer to its query, between 0 and 1."""
+        embeddings = self.embed(list(queries) + list(answers))
+        scores = np.zeros(len(queries))
+        for i, (query, answer) in enumerate(zip(queries, answers)):
+            if answer.strip():
+                scores[i] = float(np.dot(embeddings[query], embeddings[answer]))
+        return np.clip(scores, 0.0, 1.0)
+
+
+def create_semantic_scorer(backend: str = 'tfidf', **kwargs):
+    """Create the relevance scorer for a backend name in SEMANTIC_BACKENDS."""
+    if backend == 'tfidf':
+        return TfidfRelevance()
+    if backend == 'embedding':
+        if not sentence_transformers_available():
+            raise RuntimeError("The 'embedding' backend requires the 'sentence-transformers' package")
+        return EmbeddingRelevance(**kwargs)
+    raise ValueError(f"Unknown semantic backend: {backend}")
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Sharded benchmark runner
+Splits the query set across worker processes or machines, each writing its
+own checkpointed partial results, and merges the shards into the master CSV
+"""
+
+import argparse
+import csv
+import glob
+import hashlib
+import os
+from multiprocessing import Process
+from typing import List, Dict, Any
+
+from analyze_benchmark_results import APIS
+from config import Config
+from database import QueryDatabase, ResultsDatabase
+from process_api_responses import extract_clean_answer
+from runner import CheckpointedRunner
+
+SHARD_STRATEGIES = ('range', 'hash')
+DEFAULT_SHARDS_DIR = os.path.join(Config.RESULTS_DIR, 'shards')
+
+# Per-API columns of master_results_all_batches.csv, in order
+API_COLUMNS = ('success', 'response_time_s', 'answer', 'num_sources', 'source_urls', 'error')
+
+
+def shard_name(shard_index: int, num_shards: int) -> str:
+    return f"shard_{shard_index:03d}_of_{num_shards:03d}"
+
+
+def shard_query_ids(query_ids: List[int], shard_index: int, num_shards: int,
+                    strategy: str = 'range') -> List[int]:
+    """
+    Select the query IDs belonging to one shard.
+
+    Args:
+        query_ids: Every query ID in the benchmark
+        shard_index: Zero-based shard number
+        num_shards: Total number of shards
+        strategy: 'range' splits the sorted IDs into contiguous, near-equal
+            blocks; 'hash' assigns each ID by a stable hash, so adding
+            queries later does not move existing ones between shards
+
+    Returns:
+        Sorted query IDs for the shard
+    """
+    if not 0 <= shard_index < num_shards:
+        raise ValueError(f"shard_index must be between 0 and {num_shards - 1}")
+    if strategy not in SHARD_STRATEGIES:
+        raise ValueError(f"Unknown shard strategy: {strategy}")
+
+    ids = sorted(query_ids)
+    if strategy == 'range':
+        start = len(ids) * shard_index // num_shards
+        end = len(ids) * (shard_index + 1) // num_shards
+        return ids[start:end]
+
+    return [
+        qid for qid in ids
+        if int(hashlib.sha1(str(qid).encode('utf-8')).hexdigest(), 16) % num_shards == shard_index
+    ]
+
+
+def make_shard_executor(num_shards: int):
+    """
+    Build an executor for one shard process.
+
+    Each shard gets 1/num_shards of every provider's starting rate limit so
+    the shards together stay within the limits a single process would use.
+    """
+    from hedging import HedgedExecutor
+    from mock_providers import create_query_executor
+    from rate_limiter import PROVIDER_RATE_LIMITS, AdaptiveRateLimiter, RateLimitedExecutor
+
+    limiter = AdaptiveRateLimiter({api: rate / num_shards for api, rate in PROVIDER_RATE_LIMITS.items()})
+    return HedgedExecutor(RateLimitedExecutor(create_query_executor(), limiter))
+
+
+def run_shard(shard_index: int, num_shards: int, output_dir: str = DEFAULT_SHARDS_DIR,
+              strategy: str = 'range', api_names: List[str] = None,
+              queries_file: str = 'queries.json', resume: bool = True) -> Dict[str, Any]:
+    """
+    Execute one shard, checkpointing every response to its own JSONL run.
+
+    Re-running a shard with resume=True only executes pairs it has not
+    recorded yet.
+
+    Returns:
+        Run summary from CheckpointedRunner
+    """
+    name = shard_name(shard_index, num_shards)
+    query_db = QueryDatabase(queries_file)
+    query_ids = shard_query_ids([q['id'] for q in query_db.get_all_queries()], shard_index, num_shards, strategy)
+
+    if not query_ids:
+        print(f"[{name}] No queries assigned")
+        return {'run_id': name, 'total_queries': 0, 'total_responses': 0, 'successful': 0, 'failed': 0}
+
+    results_db = ResultsDatabase(os.path.join(output_dir, name), file_format='jsonl')
+    runner = CheckpointedRunner(make_shard_executor(num_shards), query_db, results_db)
+
+    def report(response, completed, total):
+        if completed % 50 == 0 or completed == total:
+            print(f"[{name}] {completed}/{total} responses")
+
+    print(f"[{name}] Running {len(query_ids)} queries (ids {query_ids[0]}-{query_ids[-1]})")
+    summary = runner.run(query_ids=query_ids, api_names=api_names, run_id=name,
+                         resume=resume, on_response=report)
+    print(f"[{name}] Done: {summary['successful']} successful, {summary['failed']} failed "
+          f"in {summary['total_time']:.1f}s")
+    return summary
+
+
+def run_local_shards(num_shards: int, **kwargs):
+    """Run every shard in its own local process and wait for all of them."""
+    processes = [
+        Process(target=run_shard, args=(shard_index, num_shards), kwargs=kwargs)
+        for shard_index in range(num_shards)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    failed = [shard_name(i, num_shards) for i, p in enumerate(processes) if p.exitcode != 0]
+    if failed:
+        raise RuntimeError(f"Shards failed: {', '.join(failed)}")
+
+
+def iter_shard_responses(output_dir: str):
+    """Yield every response recorded in the shard runs under output_dir."""
+    for shard_dir in sorted(glob.glob(os.path.join(output_dir, 'shard_*'))):
+        results_db = ResultsDatabase(shard_dir, file_format='jsonl')
+        yield from results_db.iter_results(os.path.basename(shard_dir))
+
+
+def response_columns(response: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten one API response into its master CSV cells."""
+    api_name = response.get('api_name', '')
+    answer, sources = extract_clean_answer(api_name, response.get('response_data'))
+    sources = sources if isinstance(sources, list) else []
+
+    source_urls = []
+    for source in sources:
+        if isinstance(source, dict) and 'url' in source:
+            source_urls.append(source['url'])
+        elif isinstance(source, str):
+            source_urls.append(source)
+
+    return {
+        'success': bool(response.get('success')),
+        'response_time_s': response.get('response_time'),
+        'answer': " ".join(answer.split()) if answer else '',
+        'num_sources': len(sources),
+        'source_urls': "; ".join(source_urls),
+        'error': response.get('error') or ''
+    }
+
+
+def merge_shards(output_dir: str = DEFAULT_SHARDS_DIR,
+                 output_file: str = 'master_results_all_batches.csv') -> int:
+    """
+    Merge shard runs into one CSV in the layout analyze_benchmark_results.py reads.
+
+    Columns are query_num, query, query_length, then for every API:
+    {api}_success, {api}_response_time_s, {api}_answer, {api}_num_sources,
+    {api}_source_urls, {api}_error. Rows are ordered by query_num.
+
+    Returns:
+        Number of query rows written
+    """
+    rows = {}
+    apis = list(APIS)
+
+    for response in iter_shard_responses(output_dir):
+        query_id = response.get('query_id')
+        api_name = response.get('api_name')
+        if query_id is None or not api_name:
+            continue
+        if api_name not in apis:
+            apis.append(api_name)
+
+        query = response.get('query', '')
+        row = rows.setdefault(query_id, {'query_num': query_id, 'query': query, 'query_length': len(query)})
+        for column, value in response_columns(response).items():
+            row[f'{api_name}_{column}'] = value
+
+    fieldnames = ['query_num', 'query', 'query_length'] + [
+        f'{api}_{column}' for api in apis for column in API_COLUMNS
+    ]
+    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        for query_id in sorted(rows):
+            writer.writerow(rows[query_id])
+
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Run the benchmark in shards across processes or machines, then merge the results'
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Execute one shard, or every shard as local processes')
+    run_parser.add_argument('--num-shards', type=int, required=True,
+                            help='Total number of shards across all workers')
+    run_parser.add_argument('--shard-index', type=int, default=None,
+                            help='Zero-based shard to run on this machine (default: run all shards locally)')
+    run_parser.add_argument('--strategy', choices=SHARD_STRATEGIES, default='range',
+                            help='Split by query id range or by query id hash (default: range)')
+    run_parser.add_argument('--apis', nargs='+', default=None,
+                            help='APIs to run (default: every configured API)')
+    run_parser.add_argument('--queries-file', default='queries.json',
+                            help='Query set to shard (default: queries.json)')
+    run_parser.add_argument('--output-dir', default=DEFAULT_SHARDS_DIR,
+                            help='Directory for shard results (default: <results dir>/shards)')
+    run_parser.add_argument('--no-resume', action='store_true',
+                            help='Start shards over instead of skipping recorded pairs')
+
+    merge_parser = subparsers.add_parser('merge', help='Merge shard results into the master CSV')
+    merge_parser.add_argument('--output-dir', default=DEFAULT_SHARDS_DIR,
+                              help='Directory holding shard results (default: <results dir>/shards)')
+    merge_parser.add_argument('--output', default='master_results_all_batches.csv',
+                              help='Merged CSV path (default: master_results_all_batches.csv)')
+
+    args = parser.parse_args()
+
+    if args.command == 'merge':
+        print(f"Merging shards from {args.output_dir}...")
+        count = merge_shards(args.output_dir, args.output)
+        print(f"  ✓ {args.output} ({count} queries)")
+        return
+
+    options = {
+        'output_dir': args.output_dir,
+        'strategy': args.strategy,
+        'api_names': args.apis,
+        'queries_file': args.queries_file,
+        'resume': not args.no_resume
+    }
+    if args.shard_index is None:
+        run_local_shards(args.num_shards, **options)
+    else:
+        run_shard(args.shard_index, args.num_shards, **options)
+
+
+if __name__ == "__main__":
+    main()
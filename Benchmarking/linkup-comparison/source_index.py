@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""
+Source URL canonicalization, deduplication and a domain index
+Answers' sources are canonicalized so the same page cited in different forms
+(http/https, www., tracking parameters, fragments) counts once per answer and
+is shared across APIs. The index maps every domain and page to the (api,
+query) pairs citing it and makes cross-API overlap a cheap lookup.
+"""
+
+import argparse
+import json
+import os
+import re
+import string
+import tempfile
+from array import array
+from functools import lru_cache
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+from urllib.parse import urlsplit, parse_qsl, urlencode, quote
+
+import numpy as np
+import pandas as pd
+
+from results_io import text_key
+
+INDEX_VERSION = 2
+INDEX_FILENAME = 'source_index.npz'
+# Citation id columns are 32-bit while being built
+ID_TYPECODE = 'i'
+# Distinct URLs remembered by canonicalize_url; benchmark runs cite the same pages repeatedly
+URL_CACHE_SIZE = 65536
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {'gclid', 'fbclid', 'msclkid', 'yclid', 'dclid', 'igshid', 'mc_cid', 'mc_eid',
+                   'ref', 'ref_src', 'srsltid', '_ga', '_gl'}
+TRACKING_PREFIXES = ('utm_',)
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+# Characters left unescaped in canonical paths (RFC 3986 pchar plus '/')
+PATH_SAFE = "/:@!$&'()*+,;=-._~"
+PERCENT_ESCAPE = re.compile(r'%([0-9A-Fa-f]{2})')
+# Escaped characters that mean the same thing unescaped (RFC 3986 section 6.2.2.2)
+UNRESERVED = frozenset(string.ascii_letters + string.digits + '-._~')
+
+# Authority tier of a registrable suffix or domain, looked up for the host
+# and each parent domain, most specific first
+AUTHORITY_TIERS = {
+    'optum.com': 'official',
+    'gov': 'government',
+    'mil': 'government',
+    'gov.uk': 'government',
+    'gov.au': 'government',
+    'gc.ca': 'government',
+    'gov.in': 'government',
+    'gov.cn': 'government',
+    'go.jp': 'government',
+    'govt.nz': 'government',
+    'europa.eu': 'government',
+    'edu': 'academic',
+    'ac.uk': 'academic',
+    'edu.au': 'academic',
+    'ac.in': 'academic',
+    'edu.cn': 'academic',
+    'ac.jp': 'academic',
+    'ac.nz': 'academic',
+    'org': 'nonprofit',
+    'org.uk': 'nonprofit',
+    'org.au': 'nonprofit',
+    'org.nz': 'nonprofit',
+}
+
+
+def normalize_path(path: str) -> str:
+    """
+    Escape a URL path consistently.
+
+    Escapes of unreserved characters are decoded and the rest uppercased;
+    reserved escapes such as %2F stay escaped, since decoding them would
+    change the path. Raw characters that need escaping are escaped.
+    """
+    def replace(match):
+        char = chr(int(match.group(1), 16))
+        return char if char in UNRESERVED else f'%{match.group(1).upper()}'
+
+    return quote(PERCENT_ESCAPE.sub(replace, path), safe=PATH_SAFE + '%')
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def canonicalize_url(url: str) -> str:
+    """
+    Canonical form of a URL, used to tell whether two citations are the same page.
+
+    http and https are merged, the host is lowercased without 'www.' or a
+    default port, the path is re-escaped consistently without a trailing
+    slash, tracking parameters and the fragment are dropped and the
+    remaining query parameters are sorted. Text that does not parse as a
+    URL is returned stripped.
+    """
+    text = url.strip()
+    if not text:
+        return ''
+
+    try:
+        parts = urlsplit(text if '://' in text else 'https://' + text)
+        port = parts.port
+    except ValueError:
+        return text
+    host = (parts.hostname or '').rstrip('.')
+    if not host or any(char.isspace() for char in host):
+        return text
+    if host.startswith('www.'):
+        host = host[len('www.'):]
+
+    scheme = parts.scheme.lower()
+    if ':' in host:
+        host = f'[{host}]'  # IPv6 literal
+    netloc = host if port is None or port == DEFAULT_PORTS.get(scheme) else f'{host}:{port}'
+    path = normalize_path(parts.path).rstrip('/')
+    params = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    query = f'?{urlencode(params)}' if params else ''
+    return f'https://{netloc}{path}{query}'
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def url_domain(url: str) -> str:
+    """Host of a canonical URL ('' if it has none)."""
+    try:
+        return urlsplit(url).hostname or ''
+    except ValueError:
+        return ''
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def domain_tier(domain: str) -> Optional[str]:
+    """Authority tier of a host, or None."""
+    labels = domain.split('.')
+    for i in range(len(labels)):
+        tier = AUTHORITY_TIERS.get('.'.join(labels[i:]))
+        if tier:
+            return tier
+    return None
+
+
+def authority_tier(url: str) -> Optional[str]:
+    """Authority tier of a canonical URL's host, or None."""
+    return domain_tier(url_domain(url))
+
+
+def source_url(source: Any) -> str:
+    """Raw URL of a source, given as a {'url': ...} dict or a plain string."""
+    if isinstance(source, dict):
+        return source.get('url') or ''
+    return source if isinstance(source, str) else ''
+
+
+def unique_source_urls(sources: Iterable[Any]) -> List[str]:
+    """Canonical URLs of an answer's sources, deduplicated in citation order."""
+    if not isinstance(sources, list):
+        return []
+    urls = (canonicalize_url(source_url(source)) for source in sources)
+    return list(dict.fromkeys(url for url in urls if url))
+
+
+def source_summary(sources: Iterable[Any]) -> Tuple[int, int]:
+    """
+    Count an answer's distinct sources and how many are authoritative.
+
+    Sources without a URL cannot be compared, so each counts once.
+
+    Returns:
+        (distinct sources, sources with an authority tier)
+    """
+    if not isinstance(sources, list) or not sources:
+        return 0, 0
+    urls = unique_source_urls(sources)
+    unlinked = sum(1 for source in sources if not source_url(source).strip())
+    authoritative = sum(1 for url in urls if authority_tier(url))
+    return len(urls) + unlinked, authoritative
+
+
+def _intern(ids: Dict[str, int], value: str) -> int:
+    return ids.setdefault(value, len(ids))
+
+
+def _distinct_counts(keys: np.ndarray, values: np.ndarray, num_values: int, num_keys: int) -> np.ndarray:
+    """Number of distinct values paired with each key id."""
+    num_values = max(num_values, 1)
+    pairs = np.unique(keys.astype(np.int64) * num_values + values)
+    return np.bincount(pairs // num_values, minlength=num_keys)
+
+
+class TextTable:
+    """
+    Interned strings kept in a temporary file instead of memory.
+
+    Ids are looked up by a 16-byte digest of the text; the texts are
+    written back to back and read again by offset.
+    """
+
+    def __init__(self):
+        self.ids = {}  # text_key(text) -> id
+        self.ends = array('q')  # id -> end offset of its text
+        self._file = tempfile.TemporaryFile()
+
+    def __len__(self) -> int:
+        return len(self.ends)
+
+    def get(self, text: str) -> Optional[int]:
+        return self.ids.get(text_key(text))
+
+    def intern(self, text: str) -> int:
+        key = text_key(text)
+        text_id = self.ids.get(key)
+        if text_id is None:
+            text_id = self.ids[key] = len(self.ends)
+            self._file.seek(0, os.SEEK_END)
+            self._file.write(text.encode('utf-8'))
+            self.ends.append(self._file.tell())
+        return text_id
+
+    def __getitem__(self, text_id: int) -> str:
+        start = self.ends[text_id - 1] if text_id else 0
+        self._file.seek(start)
+        return self._file.read(self.ends[text_id] - start).decode('utf-8')
+
+    def to_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(UTF-8 bytes of every text, end offsets) for saving."""
+        self._file.seek(0)
+        return np.frombuffer(self._file.read(), dtype=np.uint8), np.asarray(self.ends, dtype=np.int64)
+
+    @classmethod
+    def from_arrays(cls, text: np.ndarray, ends: np.ndarray) -> 'TextTable':
+        table = cls()
+        table._file.write(text.tobytes())
+        table.ends = array('q', ends.astype(np.int64).tobytes())
+        for text_id in range(len(table.ends)):
+            table.ids[text_key(table[text_id])] = text_id
+        return table
+
+
+class SourceIndex:
+    """
+    Index of cited pages: every (canonical URL, api, query) citation once.
+
+    APIs, queries, URLs and domains are interned to integer ids and the
+    citations kept as packed id columns, so the index saves compactly and
+    lookups and overlap counts are NumPy operations over those columns.
+    Query and URL texts live in TextTables, so building the index holds
+    neither in memory.
+    """
+
+    def __init__(self):
+        self.api_ids = {}
+        self.domain_ids = {}
+        self.queries = TextTable()
+        self.urls = TextTable()
+        self.url_domains = array(ID_TYPECODE)  # url id -> domain id
+        self.citations = {name: array(ID_TYPECODE) for name in ('url', 'api', 'query')}
+        self._arrays = None
+
+    def __len__(self) -> int:
+        return len(self.citations['url'])
+
+    def add(self, query: str, api: str, sources: Iterable[Any]):
+        """Add one answer's sources (dicts, raw or canonical URLs), deduplicated."""
+        urls = unique_source_urls(sources)
+        if not urls:
+            return
+        api_id = _intern(self.api_ids, api)
+        query_id = self.queries.intern(query)
+        for url in urls:
+            url_id = self.urls.intern(url)
+            if url_id == len(self.url_domains):
+                self.url_domains.append(_intern(self.domain_ids, url_domain(url)))
+            self.citations['url'].append(url_id)
+            self.citations['api'].append(api_id)
+            self.citations['query'].append(query_id)
+        self._arrays = None
+
+    @property
+    def apis(self) -> List[str]:
+        return list(self.api_ids)
+
+    def _columns(self) -> Dict[str, np.ndarray]:
+        """Citation id columns as arrays, plus each citation's domain id."""
+        if self._arrays is None:
+            self._arrays = {name: np.asarray(ids, dtype=np.int32) for name, ids in self.citations.items()}
+            self._arrays['domain'] = np.asarray(self.url_domains, dtype=np.int32)[self._arrays['url']] \
+                if self.url_domains else np.zeros(0, dtype=np.int32)
+        return self._arrays
+
+    def _citations_of(self, column: str, value_id: Optional[int]) -> List[Tuple[str, str]]:
+        if value_id is None:
+            return []
+        columns = self._columns()
+        mask = columns[column] == value_id
+        apis = self.apis
+        pairs = np.unique(np.stack([columns['api'][mask], columns['query'][mask]], axis=1), axis=0)
+        return [(apis[a], self.queries[q]) for a, q in pairs]
+
+    def domain_citations(self, domain: str) -> List[Tuple[str, str]]:
+        """(api, query) pairs citing any page on a domain."""
+        domain = domain.strip().lower()
+        if domain.startswith('www.'):
+            domain = domain[len('www.'):]
+        return self._citations_of('domain', self.domain_ids.get(domain))
+
+    def url_citations(self, url: str) -> List[Tuple[str, str]]:
+        """(api, query) pairs citing a page, in any URL form."""
+        return self._citations_of('url', self.urls.get(canonicalize_url(url)))
+
+    def _incidence(self, level: str, per_query: bool) -> np.ndarray:
+        """Boolean (item x api) matrix: which APIs cite each page or domain (per query, if asked)."""
+        columns = self._columns()
+        items = columns[level]
+        num_items = len(self.urls if level == 'url' else self.domain_ids)
+        if per_query:
+            items = columns['query'].astype(np.int64) * num_items + items
+        keys, rows = np.unique(items, return_inverse=True)
+        incidence = np.zeros((len(keys), len(self.api_ids)), dtype=bool)
+        incidence[rows, columns['api']] = True
+        return incidence
+
+    def overlap_matrix(self, level: str = 'url', per_query: bool = False) -> pd.DataFrame:
+        """
+        Count the pages (or domains) each pair of APIs both cite.
+
+        Args:
+            level: 'url' for identical pages, 'domain' for the same site
+            per_query: Only count shared citations within the same query
+
+        Returns:
+            API x API DataFrame; the diagonal is each API's distinct total
+        """
+        incidence = self._incidence(level, per_query).astype(np.int64)
+        return pd.DataFrame(incidence.T @ incidence, index=self.apis, columns=self.apis)
+
+    def overlap_stats(self, per_query: bool = False) -> pd.DataFrame:
+        """
+        Shared pages and domains for every pair of APIs, with Jaccard similarity.
+
+        Returns:
+            DataFrame with api, other_api, shared_urls, url_jaccard,
+            shared_domains, domain_jaccard
+        """
+        stats = {}
+        for level in ('url', 'domain'):
+            shared = self.overlap_matrix(level, per_query).to_numpy()
+            totals = np.diag(shared)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                jaccard = shared / (totals[:, None] + totals[None, :] - shared)
+            stats[level] = (shared, jaccard)
+
+        i, j = np.triu_indices(len(self.api_ids), k=1)
+        apis = self.apis
+        return pd.DataFrame({
+            'api': [apis[k] for k in i],
+            'other_api': [apis[k] for k in j],
+            'shared_urls': stats['url'][0][i, j],
+            'url_jaccard': stats['url'][1][i, j],
+            'shared_domains': stats['domain'][0][i, j],
+            'domain_jaccard': stats['domain'][1][i, j]
+        })
+
+    def api_summary(self) -> pd.DataFrame:
+        """
+        Per-API citation counts.
+
+        Returns:
+            DataFrame with api, citations, unique_urls, unique_domains,
+            exclusive_urls (cited by no other API) and one column per
+            authority tier counting distinct pages
+        """
+        urls = self._incidence('url', per_query=False)
+        domains = self._incidence('domain', per_query=False)
+        exclusive = urls & (urls.sum(axis=1) == 1)[:, None]
+        url_keys = np.unique(self._columns()['url'])
+        domain_tiers = np.array([domain_tier(domain) or '' for domain in self.domain_ids], dtype=object)
+        tiers = domain_tiers[np.asarray(self.url_domains, dtype=np.int32)[url_keys]]
+
+        summary = pd.DataFrame({
+            'api': self.apis,
+            'citations': np.bincount(self._columns()['api'], minlength=len(self.api_ids)),
+            'unique_urls': urls.sum(axis=0),
+            'unique_domains': domains.sum(axis=0),
+            'exclusive_urls': exclusive.sum(axis=0)
+        })
+        for tier in dict.fromkeys(AUTHORITY_TIERS.values()):
+            summary[f'{tier}_urls'] = urls[tiers == tier].sum(axis=0)
+        return summary
+
+    def top_domains(self, limit: int = 20) -> pd.DataFrame:
+        """Most cited domains, with how many APIs and queries cite them and their tier."""
+        columns = self._columns()
+        domains = list(self.domain_ids)
+        num_domains = len(domains)
+        citations = np.bincount(columns['domain'], minlength=num_domains)
+        apis = _distinct_counts(columns['domain'], columns['api'], len(self.api_ids), num_domains)
+        queries = _distinct_counts(columns['domain'], columns['query'], len(self.queries), num_domains)
+        order = np.argsort(-citations, kind='stable')[:limit]
+        return pd.DataFrame({
+            'domain': [domains[k] for k in order],
+            'tier': [domain_tier(domains[k]) or '' for k in order],
+            'citations': citations[order],
+            'apis': apis[order],
+            'queries': queries[order]
+        })
+
+    def save(self, path: str):
+        """
+        Write the index as a compressed .npz: the id columns as int32
+        arrays, query and URL texts as UTF-8 buffers with end offsets, and
+        the API and domain tables as JSON.
+        """
+        tables = {'version': INDEX_VERSION, 'apis': self.apis, 'domains': list(self.domain_ids)}
+        arrays = {
+            'tables': np.frombuffer(json.dumps(tables).encode('utf-8'), dtype=np.uint8),
+            'url_domains': np.asarray(self.url_domains, dtype=np.int32),
+        }
+        for name, table in (('query', self.queries), ('url', self.urls)):
+            arrays[f'{name}_text'], arrays[f'{name}_ends'] = table.to_arrays()
+        for name, ids in self.citations.items():
+            arrays[f'citation_{name}'] = np.asarray(ids, dtype=np.int32)
+
+        tmp_path = str(path) + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'SourceIndex':
+        """Load a saved index, or None if there is none (or it is from another version)."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as saved:
+                arrays = {name: saved[name] for name in saved.files}
+            tables = json.loads(arrays['tables'].tobytes().decode('utf-8'))
+        except (OSError, ValueError, KeyError):
+            return None
+        if tables.get('version') != INDEX_VERSION:
+            return None
+
+        index = cls()
+        index.api_ids = {api: i for i, api in enumerate(tables['apis'])}
+        index.domain_ids = {domain: i for i, domain in enumerate(tables['domains'])}
+        index.url_domains = array(ID_TYPECODE, arrays['url_domains'].tobytes())
+        for name in index.citations:
+            index.citations[name] = array(ID_TYPECODE, arrays[f'citation_{name}'].tobytes())
+        index.queries = TextTable.from_arrays(arrays['query_text'], arrays['query_ends'])
+        index.urls = TextTable.from_arrays(arrays['url_text'], arrays['url_ends'])
+        return index
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Query a source index written by process_api_responses.py'
+    )
+    parser.add_argument('index_path', nargs='?', default=os.path.join('analysis_results', INDEX_FILENAME),
+                        help=f'Saved index (default: analysis_results/{INDEX_FILENAME})')
+    parser.add_argument('--domain', default=None, help='List the (api, query) pairs citing a domain')
+    parser.add_argument('--url', default=None, help='List the (api, query) pairs citing a page')
+    parser.add_argument('--per-query', action='store_true',
+                        help='Only count pages shared by APIs within the same query')
+    parser.add_argument('--top', type=int, default=20, help='Most cited domains to show (default: 20)')
+
+    args = parser.parse_args()
+
+    index = SourceIndex.load(args.index_path)
+    if index is None:
+        raise SystemExit(f"No source index at {args.index_path}; run process_api_responses.py first")
+
+    if args.domain or args.url:
+        pairs = index.domain_citations(args.domain) if args.domain else index.url_citations(args.url)
+        print(f"{len(pairs)} (api, query) pairs cite {args.domain or canonicalize_url(args.url)}")
+        for api, query in pairs:
+            print(f"  {api:<20} {query}")
+        return
+
+    print(f"{len(index)} citations of {len(index.urls)} pages on {len(index.domain_ids)} domains\n")
+    print(index.api_summary().to_string(index=False))
+    print("\nCross-API overlap:")
+    print(index.overlap_stats(args.per_query).to_string(index=False, float_format='%.3f'))
+    print("\nTop domains:")
+    print(index.top_domains(args.top).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
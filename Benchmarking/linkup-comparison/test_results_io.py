@@ -0,0 +1,56 @@
+"""Tests for reading benchmark results files."""
+import json
+import os
+import tempfile
+import unittest
+
+from results_io import iter_benchmark_items
+
+
+class IterBenchmarkItemsTest(unittest.TestCase):
+
+    def write_jsonl(self, records):
+        fd, path = tempfile.mkstemp(suffix='.jsonl')
+        with os.fdopen(fd, 'w') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_interleaved_run_groups_by_query(self):
+        # A runner writes responses as they complete, so queries interleave
+        queries = {1: 'alpha', 2: 'beta', 3: 'gamma'}
+        apis = ['exa', 'tavily', 'linkup_standard']
+        responses = [
+            {'query_id': query_id, 'query': queries[query_id], 'api_name': api, 'success': True}
+            for api in apis for query_id in queries
+        ]
+        path = self.write_jsonl([{'type': 'run', 'run_id': 'r', 'timestamp': 't'}] + responses
+                                + [{'type': 'run_end', 'total_queries': 3, 'total_responses': 9}])
+
+        items = list(iter_benchmark_items(path))
+
+        self.assertEqual([item['query'] for item in items], ['alpha', 'beta', 'gamma'])
+        for item in items:
+            self.assertEqual([r['api_name'] for r in item['responses']], apis)
+
+    def test_groups_by_query_text_without_query_id(self):
+        path = self.write_jsonl([
+            {'query': 'alpha', 'api_name': 'exa'},
+            {'query': 'beta', 'api_name': 'exa'},
+            {'query': 'alpha', 'api_name': 'tavily'}
+        ])
+
+        items = list(iter_benchmark_items(path))
+
+        self.assertEqual([(item['query'], len(item['responses'])) for item in items], [('alpha', 2), ('beta', 1)])
+
+    def test_items_pass_through(self):
+        item = {'query': 'alpha', 'responses': [{'api_name': 'exa'}]}
+        path = self.write_jsonl([item])
+
+        self.assertEqual(list(iter_benchmark_items(path)), [item])
+
+
+if __name__ == '__main__':
+    unittest.main()